@@ -16,6 +16,13 @@ from wowspy import WowsAsync
 from config import Config
 from data_manager import DataManager
 from data_manager.data_utils import get_prefix
+from music.download_policy import DownloadPolicy
+from music.file_index import FileIndex
+from music.music_cache import MusicCache
+from music.music_metrics import MusicMetrics
+from music.opus_cache import OpusCache
+from music.ytdl_info_cache import YTDLInfoCache
+from music.ytdl_pool import YTDLPool
 from scripts.helpers import code_block
 from world_of_warships import WowsManager
 from .anime_searcher import AnimeSearcher
@@ -34,7 +41,14 @@ class Yasen(AutoShardedBot):
                  wows_api=WowsAsync,
                  data_manager: DataManager,
                  wows_manager: WowsManager,
-                 anime_search: AnimeSearcher):
+                 anime_search: AnimeSearcher,
+                 music_cache: MusicCache,
+                 ytdl_cache: YTDLInfoCache,
+                 ytdl_pool: YTDLPool,
+                 file_index: FileIndex,
+                 opus_cache: Optional[OpusCache],
+                 download_policy: DownloadPolicy,
+                 music_metrics: MusicMetrics):
         self.config = config
         self.logger = logger
         self.version = version
@@ -44,6 +58,13 @@ class Yasen(AutoShardedBot):
         self.session_manager = anime_search.session_manager
         self.wows_manager = wows_manager
         self.wows_api = wows_api
+        self.music_cache = music_cache
+        self.ytdl_cache = ytdl_cache
+        self.ytdl_pool = ytdl_pool
+        self.file_index = file_index
+        self.opus_cache = opus_cache
+        self.download_policy = download_policy
+        self.music_metrics = music_metrics
         super().__init__(get_prefix)
 
     @property
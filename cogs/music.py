@@ -98,7 +98,8 @@ class Music:
             If the bot is already playing music,
             you must be in the same voice channel as the bot."
         Usage: "`{prefix}play some song name or url`
-        Must provide a name or url."
+        Must provide a name or url.
+        Playlist urls enqueue up to 500 songs from the playlist."
         Note: This will terminate the default playlist if it is current.
         """
         if not search:
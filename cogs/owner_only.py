@@ -1,9 +1,14 @@
-from discord import Forbidden, TextChannel
+from io import BytesIO
+from json import dumps
+from time import time
+
+from discord import File, Forbidden, TextChannel
 from discord.embeds import Embed
 from discord.ext.commands import Context, command
 
 from bot import Yasen
 from scripts.checks import is_owner
+from scripts.helpers import parse_number
 
 
 class OwnerOnly:
@@ -29,6 +34,88 @@ class OwnerOnly:
         )
         await send_anncoucements(self.bot, res)
 
+    @command()
+    async def wowscache(self, ctx: Context):
+        """
+        Display the World of Warships player and embed cache counters.
+
+        This is hidden in the help message
+        """
+        res = Embed(
+            colour=self.bot.config.colour,
+            title='World of Warships player cache'
+        )
+        for key, val in self.bot.wows_manager.players.stats.items():
+            res.add_field(name=key, value=str(val))
+        for key, val in self.bot.wows_manager.embeds.stats.items():
+            res.add_field(name=f'embeds {key}', value=str(val))
+        await ctx.send(embed=res)
+
+    @command()
+    async def musicstats(self, ctx: Context):
+        """
+        Display the music caches, youtube-dl pool and policy counters.
+
+        This is hidden in the help message
+        """
+        res = Embed(
+            colour=self.bot.config.colour,
+            title='Music stats'
+        )
+        for name, obj in (('files', self.bot.music_cache),
+                          ('info', self.bot.ytdl_cache),
+                          ('pool', self.bot.ytdl_pool),
+                          ('index', self.bot.file_index),
+                          ('opus', self.bot.opus_cache),
+                          ('policy', self.bot.download_policy)):
+            stats = obj.stats if obj else {}
+            for key, val in stats.items():
+                res.add_field(name=f'{name} {key}', value=str(val))
+        await ctx.send(embed=res)
+
+    @command()
+    async def musiclatency(self, ctx: Context, arg: str = None):
+        """
+        Display the music latency histograms and event counts for all
+        guilds, for a guild id, or for this guild with `here`.
+        Use `export` to get everything as a JSON file.
+
+        This is hidden in the help message
+        """
+        metrics = self.bot.music_metrics
+        if arg == 'export':
+            data = dumps(metrics.export(), indent=2).encode()
+            file = File(BytesIO(data), f'{int(time())}_music_latency.json')
+            await ctx.send(file=file)
+            return
+        if arg == 'here':
+            guild_id = ctx.guild.id if ctx.guild else None
+        elif arg:
+            guild_id = parse_number(arg, int)
+            if guild_id is None:
+                await ctx.send(f'{arg} is not a guild id.')
+                return
+        else:
+            guild_id = None
+        spans, counts = metrics.summary(guild_id)
+        res = Embed(
+            colour=self.bot.config.colour,
+            title=f'Music latency for {guild_id or "all guilds"}'
+        )
+        for name, s in spans.items():
+            res.add_field(
+                name=name,
+                value=(f'n={s["count"]} p50={s["p50"]}s p95={s["p95"]}s\n'
+                       f'mean={s["mean"]}s max={s["max"]}s')
+            )
+        if counts:
+            events = '\n'.join(
+                f'{source} {event}: {count}'
+                for (source, event), count in counts.items()
+            )
+            res.add_field(name='Events', value=events, inline=False)
+        await ctx.send(embed=res)
+
 
 async def send_anncoucements(bot: Yasen, embed: Embed):
     for guild in bot.guilds:
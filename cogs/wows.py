@@ -1,3 +1,4 @@
+from datetime import timedelta
 from time import time
 
 from discord import Embed, File
@@ -5,11 +6,13 @@ from discord.ext import commands
 from discord.ext.commands import Context
 from wowspy import Region
 
-import world_of_warships.war_gaming as wg
 from bot import Yasen
 from data_manager.data_utils import get_prefix
-from world_of_warships.shell_handler import ConvertRegion, get_clan_id, \
-    get_player_id
+from scripts.helpers import code_block, timedelta_str
+from world_of_warships.embed_builder import build_history_embed
+from world_of_warships.shell_handler import ConvertRegion, \
+    cached_player_id, get_clan_id, get_player_id
+from world_of_warships.wtr import choose_colour
 
 
 class WorldOfWarships:
@@ -18,7 +21,7 @@ class WorldOfWarships:
     def __init__(self, bot: Yasen):
         self.bot = bot
 
-    @commands.command()
+    @commands.group(invoke_without_command=True)
     async def shame(self, ctx: Context, name=None,
                     region: ConvertRegion() = None):
         """
@@ -27,7 +30,8 @@ class WorldOfWarships:
         Usage: "`{prefix}shame player_name region`
         region defaults to NA if not provided."
         Extra: "You can look up player by using a mention if the player is
-        registered in the database via the `{prefix}shamelist add` command."
+        registered in the database via the `{prefix}shamelist add` command.
+        Use `{prefix}shame history` to get a player's WTR history."
         """
         async with ctx.typing():
             region = region or Region.NA
@@ -43,6 +47,28 @@ class WorldOfWarships:
                 file=file
             )
 
+    @shame.command()
+    async def history(self, ctx: Context, name=None,
+                      region: ConvertRegion() = None):
+        """
+        Description: Get the WTR history of a World of Warships player.
+        Regions: "`NA, EU, RU, AS`"
+        Usage: "`{prefix}shame history player_name region`
+        region defaults to NA if not provided."
+        Extra: "History is only recorded for players looked up with
+        `{prefix}shame` or registered in a shamelist."
+        """
+        region = region or Region.NA
+        player_id = await get_player_id(ctx, name, region)
+        manager = self.bot.wows_manager
+        player = manager.get_player(region, str(player_id))
+        embed = build_history_embed(
+            Embed(colour=choose_colour(player.wtr)), player.nick or name,
+            manager.wtr_history(region, str(player_id)),
+            player.warships_today_url
+        )
+        await ctx.send(embed=embed)
+
     @commands.command()
     async def clan(self, ctx: Context, name=None,
                    region: ConvertRegion() = None):
@@ -79,6 +105,7 @@ class WorldOfWarships:
             `{prefix}shamelist` to get the list of players.
             `{prefix}shamelist add` to add yourself to the shamelist.
             `{prefix}shamelist remove` to remove yourself from the shamelist.
+            `{prefix}shamelist top` to get the WTR leaderboard.
         """
         if ctx.invoked_subcommand:
             return
@@ -121,9 +148,7 @@ class WorldOfWarships:
             await ctx.send('Please enter a World of Warships player name.')
             return
         region = region or Region.NA
-        player_id = await wg.get_player_id(
-            region, self.bot.wows_api, self.bot.logger, name
-        )
+        player_id = await cached_player_id(self.bot, region, name)
         if not player_id:
             await ctx.send(f'Player **{name}** not found!')
         else:
@@ -157,3 +182,46 @@ class WorldOfWarships:
         await ctx.send(
             f'You deleted yourself from the shamelist in {region} {noun}'
         )
+
+    @shamelist.command()
+    @commands.guild_only()
+    async def top(self, ctx: Context, region: ConvertRegion() = None):
+        """
+        Description: "Get the WTR leaderboard of the guild shamelist.
+        The leaderboard is updated periodically in the background."
+        Restriction: Cannot be used in PM.
+        Regions: "`NA, EU, RU, AS`"
+        Usage: "`{prefix}shamelist top region` region defaults to NA if
+        not provided."
+        """
+        region = region or Region.NA
+        store = self.bot.wows_manager.store
+        guild = ctx.guild
+        rows = store.get_leaderboard(str(guild.id), region.name) \
+            if store else []
+        data_manager = self.bot.data_manager
+        lines = []
+        for member_id, player_id, nick, battles, wtr, updated_at in rows:
+            member = guild.get_member(int(member_id))
+            saved = data_manager.get_shame(
+                str(guild.id), member_id, region.name
+            )
+            if not member or saved != player_id:
+                continue
+            lines.append(
+                f'{len(lines) + 1:>2}. {wtr:>5,} {nick} ({member.name}) '
+                f'| {battles:,} Battles'
+            )
+        if not lines:
+            await ctx.send(
+                f'No leaderboard available for {region} region yet.'
+            )
+            return
+        embed = Embed(
+            colour=self.bot.config.colour,
+            title=f'WTR Leaderboard for {guild} in {region} region',
+            description=code_block('\n'.join(lines[:25]))[0]
+        )
+        age = timedelta_str(timedelta(seconds=int(time()) - updated_at))
+        embed.set_footer(text=f'Updated {age} ago')
+        await ctx.send(embed=embed)
@@ -111,6 +111,76 @@ class Config:
         if p.is_dir() and tuple(p.iterdir()):
             return p
 
+    @property
+    def music_cache_size(self) -> int:
+        """
+        :return: the disk budget of the music cache in bytes.
+        """
+        return int(self.__content.get('music_cache_size') or 2 ** 31)
+
+    @property
+    def opus_cache_size(self) -> int:
+        """
+        :return: the disk budget of the Opus encoded music cache in bytes,
+            0 to disable Opus passthrough.
+        """
+        size = self.__content.get('opus_cache_size')
+        return 2 ** 30 if size is None or size == '' else int(size)
+
+    @property
+    def ytdl_workers(self) -> int:
+        """
+        :return: the number of youtube-dl worker threads.
+        """
+        return int(self.__content.get('ytdl_workers') or 4)
+
+    @property
+    def ytdl_max_downloads(self) -> int:
+        """
+        :return: the max number of concurrent youtube-dl downloads.
+        """
+        return int(self.__content.get('ytdl_max_downloads') or 2)
+
+    @property
+    def wtr_refresh_interval(self) -> int:
+        """
+        :return: the interval between refreshes of the WTR reference data
+            in seconds.
+        """
+        return int(self.__content.get('wtr_refresh_interval') or 6 * 60 * 60)
+
+    @property
+    def leaderboard_interval(self) -> int:
+        """
+        :return: the interval between rebuilds of the shamelist
+            leaderboards in seconds.
+        """
+        return int(self.__content.get('leaderboard_interval') or 60 * 60)
+
+    @property
+    def wows_rate_limit(self) -> float:
+        """
+        :return: the number of World of Warships api requests allowed per
+            second in each region.
+        """
+        return float(self.__content.get('wows_rate_limit') or 10)
+
+    @property
+    def wows_timeout(self) -> int:
+        """
+        :return: max seconds an interactive World of Warships api request
+            waits for the rate limiter.
+        """
+        return int(self.__content.get('wows_timeout') or 30)
+
+    @property
+    def wows_background_timeout(self) -> int:
+        """
+        :return: max seconds a background World of Warships api request
+            waits for the rate limiter.
+        """
+        return int(self.__content.get('wows_background_timeout') or 600)
+
     @property
     def mal_user(self):
         return self.__content['mal_user']
@@ -1,3 +1,4 @@
 from data_manager.data_manager import DataManager
+from data_manager.wows_store import WowsStore
 
-__all__ = ['DataManager']
+__all__ = ['DataManager', 'WowsStore']
@@ -0,0 +1,305 @@
+from json import dumps, loads
+from sqlite3 import Connection
+from time import time
+from typing import Dict, List, Optional
+
+DAILY_FIELDS = ('battles', 'wins', 'frags', 'damage_dealt')
+
+__tables = (
+    'CREATE TABLE IF NOT EXISTS player('
+    'region VARCHAR NOT NULL,'
+    'player_id VARCHAR NOT NULL,'
+    'nick VARCHAR,'
+    'clan VARCHAR,'
+    'hidden INT NOT NULL,'
+    'battles INT,'
+    'wtr INT,'
+    'stats TEXT,'
+    'recent_stats TEXT,'
+    'recent_date VARCHAR,'
+    'ship_stats BLOB,'
+    'updated_at INT NOT NULL,'
+    'PRIMARY KEY (region, player_id)'
+    ')',
+
+    'CREATE TABLE IF NOT EXISTS name_lookup('
+    'kind VARCHAR NOT NULL,'
+    'region VARCHAR NOT NULL,'
+    'name VARCHAR NOT NULL,'
+    'id INT,'
+    'updated_at INT NOT NULL,'
+    'PRIMARY KEY (kind, region, name)'
+    ')',
+
+    'CREATE TABLE IF NOT EXISTS daily_stats('
+    'region VARCHAR NOT NULL,'
+    'player_id VARCHAR NOT NULL,'
+    'date VARCHAR NOT NULL,'
+    'battles INT NOT NULL,'
+    'wins INT NOT NULL,'
+    'frags INT NOT NULL,'
+    'damage_dealt INT NOT NULL,'
+    'PRIMARY KEY (region, player_id, date)'
+    ') WITHOUT ROWID',
+
+    'CREATE TABLE IF NOT EXISTS wtr_history('
+    'region VARCHAR NOT NULL,'
+    'player_id VARCHAR NOT NULL,'
+    'date INT NOT NULL,'
+    'battles INT NOT NULL,'
+    'wtr INT NOT NULL,'
+    'PRIMARY KEY (region, player_id, date)'
+    ') WITHOUT ROWID',
+
+    'CREATE TABLE IF NOT EXISTS leaderboard('
+    'guild_id VARCHAR NOT NULL,'
+    'region VARCHAR NOT NULL,'
+    'member_id VARCHAR NOT NULL,'
+    'player_id VARCHAR NOT NULL,'
+    'nick VARCHAR,'
+    'battles INT NOT NULL,'
+    'wtr INT NOT NULL,'
+    'updated_at INT NOT NULL,'
+    'PRIMARY KEY (guild_id, region, member_id)'
+    ') WITHOUT ROWID',
+)
+
+
+def create_tables(connection: Connection):
+    """
+    Create the tables used by `WowsStore` if they don't exist.
+    :param connection: the SQLite3 Connection object.
+    """
+    for sql in __tables:
+        connection.execute(sql)
+    connection.commit()
+
+
+class WowsStore:
+    """
+    A SQLite3 store for World of Warships player data.
+    """
+    __slots__ = ('connection',)
+
+    def __init__(self, connection: Connection):
+        """
+        Initialize the instance of WowsStore.
+        :param connection: the SQLite3 Connection object.
+        """
+        self.connection = connection
+        create_tables(connection)
+
+    def get_player(self, region: str, player_id: str) -> Optional[dict]:
+        """
+        Get the saved data of a player.
+        :param region: the player region.
+        :param player_id: the player id.
+        :return: a dict of the player data if any. The ship stats are bytes
+            packed by `ShipStats.to_bytes`
+        """
+        cur = self.connection.execute(
+            'SELECT nick, clan, hidden, wtr, stats, recent_stats, '
+            'recent_date, ship_stats, updated_at FROM player '
+            'WHERE region=? AND player_id=?', (region, player_id)
+        )
+        row = cur.fetchone()
+        if not row:
+            return
+        nick, clan, hidden, wtr, stats, recent, date, ships, updated = row
+        return {
+            'nick': nick,
+            'clan': clan,
+            'hidden': bool(hidden),
+            'wtr': wtr,
+            'stats': loads(stats) if stats else {},
+            'recent_stats': loads(recent) if recent else {},
+            'recent_date': date,
+            'ship_stats': ships or None,
+            'updated_at': updated
+        }
+
+    def set_player(self, region: str, player_id: str, *,
+                   nick: Optional[str], clan: Optional[str], hidden: bool,
+                   wtr: Optional[int], stats: dict,
+                   recent_stats: Optional[dict], recent_date: Optional[str],
+                   ship_stats: Optional[bytes]):
+        """
+        Save the data of a player.
+        :param region: the player region.
+        :param player_id: the player id.
+        :param nick: the player nickname.
+        :param clan: the player clan name.
+        :param hidden: True if the player profile is hidden.
+        :param wtr: the player WTR.
+        :param stats: the player all time stats.
+        :param recent_stats: the player recent stats.
+        :param recent_date: the date the player recent stats starts from.
+        :param ship_stats: the player stats break down by ships, packed
+            by `ShipStats.to_bytes`
+        """
+        self.connection.execute(
+            'REPLACE INTO player VALUES (?,?,?,?,?,?,?,?,?,?,?,?)',
+            (region, player_id, nick, clan, int(hidden),
+             stats.get('battles') if stats else None, wtr,
+             dumps(stats) if stats else None,
+             dumps(recent_stats) if recent_stats else None,
+             recent_date,
+             ship_stats or None,
+             int(time()))
+        )
+        self.connection.commit()
+
+    def get_lookup(self, kind: str, region: str,
+                   name: str) -> Optional[tuple]:
+        """
+        Get a cached name to id lookup result.
+        :param kind: the kind of name, `player` or `clan`
+        :param region: the region.
+        :param name: the name, case insensitive.
+        :return: a tuple of (id or None if the name had no match,
+            time of the lookup) if the lookup is cached.
+        """
+        cur = self.connection.execute(
+            'SELECT id, updated_at FROM name_lookup '
+            'WHERE kind=? AND region=? AND name=?',
+            (kind, region, name.lower())
+        )
+        return cur.fetchone()
+
+    def set_lookup(self, kind: str, region: str, name: str,
+                   id_: Optional[int]):
+        """
+        Cache a name to id lookup result.
+        :param kind: the kind of name, `player` or `clan`
+        :param region: the region.
+        :param name: the name, case insensitive.
+        :param id_: the id found, None if the name had no match.
+        """
+        self.connection.execute(
+            'REPLACE INTO name_lookup VALUES (?,?,?,?,?)',
+            (kind, region, name.lower(), id_, int(time()))
+        )
+        self.connection.commit()
+
+    def get_daily_stats(self, region: str, player_id: str,
+                        since: str) -> Dict[str, dict]:
+        """
+        Get the daily stats snapshots of a player.
+        :param region: the player region.
+        :param player_id: the player id.
+        :param since: the earliest date to include, in format YYYYMMDD
+        :return: a dict of {date: stats}, the stats only have the keys
+            in `DAILY_FIELDS`
+        """
+        cur = self.connection.execute(
+            f'SELECT date, {",".join(DAILY_FIELDS)} FROM daily_stats '
+            f'WHERE region=? AND player_id=? AND date>=?',
+            (region, player_id, since)
+        )
+        return {date: dict(zip(DAILY_FIELDS, vals)) for date, *vals in cur}
+
+    def add_daily_stats(self, region: str, player_id: str,
+                        daily: Dict[str, dict]):
+        """
+        Save daily stats snapshots of a player, the first snapshot saved
+        for a date is kept.
+        :param region: the player region.
+        :param player_id: the player id.
+        :param daily: a dict of {date: stats}, stats missing any of
+            `DAILY_FIELDS` are skipped.
+        """
+        rows = [
+            (region, player_id, date, *(stats[f] for f in DAILY_FIELDS))
+            for date, stats in daily.items()
+            if stats and all(stats.get(f) is not None for f in DAILY_FIELDS)
+        ]
+        self.connection.executemany(
+            'INSERT OR IGNORE INTO daily_stats VALUES (?,?,?,?,?,?,?)', rows
+        )
+        self.connection.commit()
+
+    def prune_daily_stats(self, before: str):
+        """
+        Delete all daily stats snapshots older than a date.
+        :param before: the date, in format YYYYMMDD
+        """
+        self.connection.execute(
+            'DELETE FROM daily_stats WHERE date<?', (before,)
+        )
+        self.connection.commit()
+
+    def get_wtr_history(self, region: str, player_id: str,
+                        since: int = 0) -> List[tuple]:
+        """
+        Get the WTR history of a player.
+        :param region: the player region.
+        :param player_id: the player id.
+        :param since: the earliest date to include, as an int YYYYMMDD
+        :return: a list of (date, battles, wtr) sorted by date.
+        """
+        cur = self.connection.execute(
+            'SELECT date, battles, wtr FROM wtr_history '
+            'WHERE region=? AND player_id=? AND date>=? ORDER BY date',
+            (region, player_id, since)
+        )
+        return cur.fetchall()
+
+    def add_wtr(self, region: str, player_id: str, date: int,
+                battles: int, wtr: int) -> bool:
+        """
+        Add an entry to the WTR history of a player. The entry replaces
+        any entry of the same date, and is skipped if the battle count is
+        the same as the entry before it.
+        :param region: the player region.
+        :param player_id: the player id.
+        :param date: the date, as an int YYYYMMDD
+        :param battles: the player battle count.
+        :param wtr: the player WTR.
+        :return: True if the entry is added.
+        """
+        last = self.connection.execute(
+            'SELECT battles FROM wtr_history '
+            'WHERE region=? AND player_id=? AND date<? '
+            'ORDER BY date DESC LIMIT 1', (region, player_id, date)
+        ).fetchone()
+        if last and last[0] == battles:
+            return False
+        self.connection.execute(
+            'REPLACE INTO wtr_history VALUES (?,?,?,?,?)',
+            (region, player_id, date, battles, wtr)
+        )
+        self.connection.commit()
+        return True
+
+    def get_leaderboard(self, guild_id: str, region: str) -> List[tuple]:
+        """
+        Get the WTR leaderboard of a guild shamelist.
+        :param guild_id: the guild id.
+        :param region: the region.
+        :return: a list of
+            (member_id, player_id, nick, battles, wtr, updated_at)
+            sorted by WTR, highest first.
+        """
+        cur = self.connection.execute(
+            'SELECT member_id, player_id, nick, battles, wtr, updated_at '
+            'FROM leaderboard WHERE guild_id=? AND region=? '
+            'ORDER BY wtr DESC', (guild_id, region)
+        )
+        return cur.fetchall()
+
+    def set_leaderboards(self, leaderboards: Dict[tuple, List[tuple]]):
+        """
+        Replace all WTR leaderboards.
+        :param leaderboards: a dict of {(guild_id, region): leaderboard},
+            each leaderboard is a list of
+            (member_id, player_id, nick, battles, wtr)
+        """
+        now = int(time())
+        with self.connection:
+            self.connection.execute('DELETE FROM leaderboard')
+            self.connection.executemany(
+                'INSERT INTO leaderboard VALUES (?,?,?,?,?,?,?,?)',
+                ((guild_id, region, *row, now)
+                 for (guild_id, region), rows in leaderboards.items()
+                 for row in rows)
+            )
@@ -1,10 +1,12 @@
 from asyncio import Queue
 from collections import deque
+from time import monotonic
 from typing import Optional
 
 from discord import Embed, VoiceChannel
 from discord.ext.commands import Context
 
+from music.lazy_ytdl_source import LazyYTDLSource
 from music.music_util import add_embed_options, playlist_embed
 from music.playlist import PlayList
 from music.ytdl_source import YTDLSource
@@ -29,14 +31,18 @@ class AbstractMusicPlayer:
     :type playing: bool
         A bool to keep track if self is playing audio. If this is True, any
         call on `self.play` will have no effect.
+    :type lookahead: int
+        The number of entries at the front of `self.entry_queue` to resolve
+        in the background while the current entry plays.
     """
     __slots__ = ('logger', 'channel', 'entry_queue',
-                 'current', 'finished', 'playing')
+                 'current', 'finished', 'playing', 'lookahead')
 
-    def __init__(self, logger, channel: VoiceChannel):
+    def __init__(self, logger, channel: VoiceChannel, lookahead: int = 2):
         """
         :param logger: a logger object to do logging with.
         :param channel: the `VoiceChannel` to play audio in.
+        :param lookahead: the number of queued entries to resolve ahead.
         """
         self.logger = logger
         self.channel = channel
@@ -44,6 +50,7 @@ class AbstractMusicPlayer:
         self.current = None
         self.finished = Queue(1)
         self.playing = False
+        self.lookahead = lookahead
 
     @property
     def empty(self) -> bool:
@@ -129,6 +136,20 @@ class AbstractMusicPlayer:
         """
         raise NotImplementedError
 
+    def prefetch(self):
+        """
+        Resolve the next `self.lookahead` entries in the background.
+        Entries that are no longer among them stop resolving and release
+        their downloads, they are resolved again when they come back.
+        Call this whenever `self.entry_queue` changes.
+        """
+        for i, entry in enumerate(self.entry_queue):
+            if i < self.lookahead:
+                entry.prefetch()
+            elif entry.resolving is not None:
+                entry.cancel_prefetch()
+                entry.source.release()
+
     async def skip(self, ctx):
         """
         Skip the currently playing `Entry`
@@ -138,6 +159,11 @@ class AbstractMusicPlayer:
             await ctx.send('Not playing anything.')
             return
         skipped, is_requester, votes = await self.current.skip(ctx)
+        if skipped and self.current:
+            self.current.cancel_prefetch()
+            ctx.bot.music_metrics.count(
+                ctx.guild.id, self.current.source_type, 'skipped'
+            )
         if skipped and ctx.voice_client:
             ctx.voice_client.stop()
         if skipped and is_requester:
@@ -163,15 +189,34 @@ class AbstractMusicPlayer:
         """
         if self.empty:
             return
+        metrics = ctx.bot.music_metrics
+        first = True
+        finished_at = None
         while True:
             self.playing = True
             self.current = self.entry_queue.popleft()
+            self.prefetch()
             with self.current as cur:
-                if isinstance(cur.source, YTDLSource):
+                if isinstance(cur.source, (YTDLSource, LazyYTDLSource)) \
+                        and not cur.prefetched:
                     await ctx.trigger_typing()
-                await cur.play(ctx, self.channel, self.__after)
-                await ctx.send(f'Now playing:{cur.detail}')
-                await self.finished.get()
+                if await cur.play(ctx, self.channel, self.__after):
+                    started = monotonic()
+                    if first:
+                        metrics.observe(
+                            ctx.guild.id, 'first_audio',
+                            started - cur.requested_at
+                        )
+                    elif finished_at is not None:
+                        metrics.observe(
+                            ctx.guild.id, 'gap', started - finished_at
+                        )
+                    await ctx.send(f'Now playing:{cur.detail}')
+                    await self.finished.get()
+                    finished_at = monotonic()
+                else:
+                    self.current = None
+            first = False
             if not await self.__play_next(ctx):
                 return
 
@@ -198,7 +243,13 @@ class AbstractMusicPlayer:
 
         :param disconnect: if True, also disconnect from the voice client.
         """
+        if self.current:
+            self.current.cancel_prefetch()
         self.current = None
+        for entry in self.entry_queue:
+            if entry.resolving is not None:
+                entry.cancel_prefetch()
+                entry.source.clean_up()
         self.entry_queue.clear()
         vc = ctx.voice_client
         if vc:
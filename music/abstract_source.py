@@ -14,6 +14,14 @@ class AbstractSource:
     def clean_up(self):
         raise NotImplementedError
 
+    def release(self):
+        """
+        Free what `true_name` holds on to, such as downloaded files, when
+        the audio won't be played soon. Unlike `clean_up` the source can
+        still be played afterwards.
+        """
+        pass
+
     @property
     def detail(self):
         if not self.__detail:
@@ -21,6 +29,14 @@ class AbstractSource:
             del self.__get_detail
         return self.__detail
 
+    @property
+    def local(self) -> bool:
+        """
+        :return: True if `true_name` is a local file that's kept after the
+            audio is finished playing.
+        """
+        return False
+
     async def true_name(self) -> str:
         """
         :return: Name used by `FFmpegPCMAudio`
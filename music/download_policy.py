@@ -0,0 +1,177 @@
+from collections import OrderedDict, deque
+from shutil import disk_usage
+from time import time
+from typing import Callable, Optional
+
+from music.music_cache import MusicCache
+from music.ytdl_pool import YTDLPool
+
+STREAM = 'stream'
+KEEP = 'keep'
+DISCARD = 'discard'
+
+DEFAULT_BANDWIDTH = 1024 * 1024
+DEFAULT_BITRATE = 160
+MAX_WAIT = 60
+SHORT = 600
+POPULAR = 2
+POPULAR_WINDOW = 7 * 24 * 60 * 60
+DISK_RESERVE = 512 * 1024 * 1024
+
+
+def estimate_size(data: dict) -> int:
+    """
+    Estimate the size of the audio file of a video.
+    :param data: the data dict provided by youtube-dl.
+    :return: the estimated size in bytes.
+    >>> estimate_size({'duration': 100, 'abr': 128})
+    1600000
+    """
+    size = data.get('filesize') or data.get('filesize_approx')
+    if isinstance(size, (int, float)):
+        return int(size)
+    bitrate = data.get('abr') or data.get('tbr') or DEFAULT_BITRATE
+    return int((data.get('duration') or 0) * bitrate * 1000 / 8)
+
+
+class DownloadPolicy:
+    """
+    Decides whether a youtube-dl audio source is streamed, downloaded and
+    kept in the `MusicCache`, or downloaded and deleted after playing.
+    The decision is based on whether the audio is cached, free disk space,
+    the cache budget, the download rate measured from past downloads, the
+    number of running downloads and how often the audio was requested
+    recently. Every decision is logged.
+
+    === Attributes ===
+    :type cache: Optional[MusicCache]
+        The music download cache.
+    :type pool: Optional[YTDLPool]
+        The youtube-dl pool.
+    :type bandwidth: float
+        The moving average of the download rate in bytes per second.
+    :type decisions: dict
+        Number of decisions made by decision and reason.
+    """
+    __slots__ = ('cache', 'pool', 'logger', 'clock', 'bandwidth',
+                 'decisions', 'max_keys', '__requests')
+
+    def __init__(self, cache: Optional[MusicCache], pool: Optional[YTDLPool],
+                 logger, max_keys: int = 4096,
+                 clock: Callable[[], float] = time):
+        """
+        :param cache: the music download cache, optional.
+        :param pool: the youtube-dl pool, optional.
+        :param logger: the logger.
+        :param max_keys: max number of videos to count requests for.
+        :param clock: a function that returns the current time in seconds.
+        """
+        self.cache = cache
+        self.pool = pool
+        self.logger = logger
+        self.max_keys = max_keys
+        self.clock = clock
+        self.bandwidth = float(DEFAULT_BANDWIDTH)
+        self.decisions = {}
+        # cache key -> deque of request times
+        self.__requests = OrderedDict()
+
+    @property
+    def stats(self) -> dict:
+        """
+        :return: a dict of the policy counters.
+        """
+        res = {'bandwidth': int(self.bandwidth)}
+        res.update(
+            (f'{decision} {reason}', count)
+            for (decision, reason), count in sorted(self.decisions.items())
+        )
+        return res
+
+    def progress_hook(self, status: dict):
+        """
+        A youtube-dl progress hook that measures the download rate.
+        :param status: the download status provided by youtube-dl.
+        """
+        if status.get('status') != 'finished':
+            return
+        size = status.get('total_bytes') or status.get('downloaded_bytes')
+        elapsed = status.get('elapsed')
+        if size and elapsed:
+            self.record_download(size, elapsed)
+
+    def record_download(self, size: int, elapsed: float):
+        """
+        Update the download rate with a finished download.
+        :param size: the download size in bytes.
+        :param elapsed: the download time in seconds.
+        """
+        rate = size / max(elapsed, 0.001)
+        self.bandwidth = 0.7 * self.bandwidth + 0.3 * rate
+
+    def popularity(self, key: str) -> int:
+        """
+        Record a request and count the recent requests of a video.
+        :param key: the cache key, see `MusicCache.key`
+        :return: the number of requests in `POPULAR_WINDOW` including
+            this one.
+        """
+        now = self.clock()
+        times = self.__requests.pop(key, None) or deque()
+        while times and times[0] <= now - POPULAR_WINDOW:
+            times.popleft()
+        times.append(now)
+        self.__requests[key] = times
+        while len(self.__requests) > self.max_keys:
+            self.__requests.popitem(last=False)
+        return len(times)
+
+    def decide(self, data: dict) -> tuple:
+        """
+        Decide how to play a video, see `STREAM`, `KEEP` and `DISCARD`
+        :param data: the data dict provided by youtube-dl.
+        :return: a tuple of (need_download, delete_after) for `YTDLSource`
+        """
+        decision, reason, size, popularity = self.__decide(data)
+        count = self.decisions.get((decision, reason), 0)
+        self.decisions[(decision, reason)] = count + 1
+        self.logger.info(
+            f'Download policy for {data.get("webpage_url")}: {decision} '
+            f'({reason}) duration={data.get("duration")} '
+            f'size~{size} bandwidth~{int(self.bandwidth)} '
+            f'popularity={popularity}'
+        )
+        return decision != STREAM, decision != KEEP
+
+    def __decide(self, data: dict) -> tuple:
+        """
+        See `DownloadPolicy.decide`
+        :return: a tuple of (decision, reason, estimated size, popularity)
+        """
+        duration = data.get('duration') or 0
+        size = estimate_size(data)
+        key = MusicCache.key(data)
+        popularity = self.popularity(key) if key else 0
+        if self.cache is None or key is None:
+            if duration > 1800:
+                return STREAM, 'uncached', size, popularity
+            return (DISCARD if duration > SHORT else KEEP,
+                    'uncached', size, popularity)
+        if key in self.cache:
+            return KEEP, 'cached', size, popularity
+        try:
+            free = disk_usage(str(self.cache.path)).free
+        except OSError:
+            free = 0
+        if size > free - DISK_RESERVE:
+            return STREAM, 'disk', size, popularity
+        if self.pool and self.pool.downloads >= self.pool.max_downloads:
+            return STREAM, 'busy', size, popularity
+        if size / self.bandwidth > MAX_WAIT:
+            return STREAM, 'slow', size, popularity
+        fits = size <= self.cache.max_bytes // 20
+        if fits and popularity >= POPULAR:
+            return KEEP, 'popular', size, popularity
+        if fits and duration <= SHORT:
+            return KEEP, 'short', size, popularity
+        return DISCARD, 'long' if fits else 'budget', size, popularity
@@ -1,36 +1,85 @@
-from typing import NewType, Union
+from asyncio import CancelledError, Task, ensure_future, shield
+from functools import partial
+from time import monotonic
+from typing import Callable, NewType, Optional, Union
 
-from discord import ClientException, FFmpegPCMAudio, Member, VoiceChannel
+from discord import AudioSource, ClientException, FFmpegPCMAudio, Member, \
+    VoiceChannel
 from discord.ext.commands import Context
-from youtube_dl import YoutubeDL
+from youtube_dl import DownloadError, YoutubeDL
 
 from music.abstract_source import AbstractSource
 from music.file_source import FileSource
-from music.music_util import fetch_ytdl_info, get_ytdl_format
+from music.lazy_ytdl_source import LazyYTDLSource
+from music.music_util import fetch_video_info, get_ytdl_format
+from music.ogg_opus import OggOpusAudio
+from music.opus_cache import OpusCache
 from music.ytdl_source import YTDLSource
 
 _SourceType = Union[
     NewType('FileSource', AbstractSource),
-    NewType('YTDLSource', AbstractSource)
+    NewType('YTDLSource', AbstractSource),
+    NewType('LazyYTDLSource', AbstractSource)
 ]
 
 
+async def resolve_yt(ctx: Context, run: Callable,
+                     query: str) -> Optional[YTDLSource]:
+    """
+    Fetch the video data of a youtube-dl search query or url.
+    :param ctx: discord `Context` object
+    :param run: the coroutine function to run blocking youtube-dl calls
+        with, see `YTDLPool.runner`
+    :param query: the search query.
+    :return: a `YTDLSource` for the video if it can be played.
+    """
+    with YoutubeDL(get_ytdl_format(None)) as ydl, \
+            ctx.bot.music_metrics.span(ctx.guild.id, 'search'):
+        data = await fetch_video_info(ydl, query, ctx.bot.ytdl_cache, run)
+    if not data:
+        return
+    webpage_url = data.get('webpage_url')
+    url = data.get('url')
+    duration = data.get('duration')
+    if not webpage_url or not url \
+            or not isinstance(duration, (int, float)):
+        return
+    policy = ctx.bot.download_policy
+    need_download, delete_after = policy.decide(data)
+    return YTDLSource(
+        data, str(ctx.author), need_download,
+        delete_after, ctx.bot.logger, ctx.bot.music_cache,
+        ctx.bot.ytdl_cache, run, policy.progress_hook
+    )
+
+
 class Entry:
     """
     An object that represents a song entry.
     """
-    __slots__ = ('requester', 'source', 'skip_members')
+    __slots__ = ('requester', 'source', 'skip_members', 'resolving',
+                 'encoding', 'opus_cache', 'requested_at')
 
-    def __init__(self, requester: Member, source: _SourceType):
+    def __init__(self, requester: Member, source: _SourceType,
+                 opus_cache: Optional[OpusCache] = None,
+                 requested_at: Optional[float] = None):
         """
         Init the instance.
         :param requester: the song requester.
         :param source: An audio source.
             This should be a subclass of `AbstractSource`
+        :param opus_cache: the `OpusCache` to play local files from,
+            optional.
+        :param requested_at: the `time.monotonic` time the entry was
+            requested, defaults to now.
         """
         self.requester = requester
         self.source = source
         self.skip_members = set()
+        self.resolving = None
+        self.encoding = None
+        self.opus_cache = opus_cache
+        self.requested_at = requested_at or monotonic()
 
     def __str__(self):
         return str(self.source)
@@ -43,14 +92,15 @@ class Entry:
         return self.source.detail
 
     @classmethod
-    def from_file(cls, ctx: Context, file: str):
+    def from_file(cls, ctx: Context, file: str, info: Optional[tuple] = None):
         """
         Get an `Entry` instace from a file path.
         :param ctx: discord `Context` object
         :param file: the file path string.
+        :param info: the file tags from `FileIndex`, optional.
         :return: `Entry` instance from a file.
         """
-        return cls(ctx.author, FileSource(file))
+        return cls(ctx.author, FileSource(file, info), ctx.bot.opus_cache)
 
     @classmethod
     async def from_yt(cls, ctx: Context, query: str):
@@ -60,28 +110,123 @@ class Entry:
         :param query: the search query.
         :return: `Entry` instance from a search query or url.
         """
-        with YoutubeDL(get_ytdl_format(None)) as ydl:
-            data = await fetch_ytdl_info(ydl, query)
-            if 'entries' in data:
-                try:
-                    data = data['entries'][0]
-                except IndexError:
-                    return
-            webpage_url = data.get('webpage_url')
-            url = data.get('url')
-            duration = data.get('duration')
-            if not webpage_url or not url \
-                    or not isinstance(duration, (int, float)):
-                return
-            need_download = duration <= 1800
-            delete_after = duration > 600
-            yt = YTDLSource(
-                data, str(ctx.author), need_download,
-                delete_after, ctx.bot.logger
+        start = monotonic()
+        run = ctx.bot.ytdl_pool.runner(ctx.guild.id)
+        yt = await resolve_yt(ctx, run, query)
+        if yt:
+            return cls(ctx.author, yt, ctx.bot.opus_cache, start)
+
+    @classmethod
+    def from_flat(cls, ctx: Context, data: dict):
+        """
+        Get an `Entry` instance from a flat youtube-dl playlist entry, the
+        full video data is fetched when the entry is prefetched.
+        :param ctx: discord `Context` object
+        :param data: the flat playlist entry.
+        :return: `Entry` instance from a playlist entry.
+        """
+        run = ctx.bot.ytdl_pool.runner(ctx.guild.id)
+        source = LazyYTDLSource(
+            data, str(ctx.author), partial(resolve_yt, ctx, run)
+        )
+        return cls(ctx.author, source, ctx.bot.opus_cache)
+
+    @property
+    def prefetched(self) -> bool:
+        """
+        :return: True if the audio source is resolved.
+        """
+        return self.resolving is not None and self.resolving.done() and \
+            not self.resolving.cancelled()
+
+    def prefetch(self) -> Task:
+        """
+        Start resolving the audio source in the background,
+        see `AbstractSource.true_name`
+
+        Once it's resolved, local files are encoded with `self.opus_cache`
+        in a separate task, see `Entry.__encode`
+
+        :return: the task resolving the audio source.
+        """
+        if self.resolving is None:
+            self.resolving = ensure_future(self.source.true_name())
+            if self.opus_cache:
+                self.resolving.add_done_callback(self.__encode)
+        return self.resolving
+
+    def __encode(self, task: Task):
+        """
+        Start encoding the resolved audio source with `self.opus_cache`
+        if it's a local file.
+        :param task: the finished task resolving the audio source.
+        """
+        if task is not self.resolving or task.cancelled() or \
+                task.exception() is not None or not self.source.local:
+            return
+        self.encoding = ensure_future(self.opus_cache.encode(task.result()))
+
+    def __encoded(self, name: str) -> Optional[str]:
+        """
+        :param name: the resolved name of the audio source.
+        :return: the path to the Ogg/Opus encoded file of the audio source
+            if encoding it is already done, this never waits for encoding.
+        """
+        task = self.encoding
+        if task is not None and task.done() and not task.cancelled() and \
+                task.exception() is None:
+            return task.result()
+        if self.opus_cache and self.source.local:
+            return self.opus_cache.get(name)
+
+    @property
+    def source_type(self) -> str:
+        """
+        :return: the type name of the audio source.
+        """
+        return type(self.source).__name__
+
+    def __audio(self, ctx: Context, name: str,
+                encoded: Optional[str]) -> AudioSource:
+        """
+        Get the `AudioSource` to play. Local files are played from their
+        Opus encoding without transcoding if it's done, otherwise they are
+        played with FFmpeg while they are encoded in the background.
+        :param ctx: discord `Context` object.
+        :param name: the name used by `FFmpegPCMAudio`
+        :param encoded: the path to the Ogg/Opus encoded file if any.
+        :return: the `AudioSource`
+        """
+        metrics = ctx.bot.music_metrics
+        if encoded:
+            try:
+                with metrics.span(ctx.guild.id, 'opus'):
+                    return OggOpusAudio(encoded)
+            except (OSError, ValueError) as e:
+                self.opus_cache.logger.warn(str(e))
+        with metrics.span(ctx.guild.id, 'ffmpeg'):
+            return FFmpegPCMAudio(
+                name, before_options='-nostdin', options='-vn'
             )
-            return cls(ctx.author, yt)
 
-    async def play(self, ctx: Context, channel: VoiceChannel, after: callable):
+    def cancel_prefetch(self):
+        """
+        Cancel resolving and encoding the audio source if it's not done
+        yet.
+        """
+        encoding, self.encoding = self.encoding, None
+        if encoding is not None and not encoding.done():
+            encoding.cancel()
+        task, self.resolving = self.resolving, None
+        if task is None:
+            return
+        if not task.done():
+            task.cancel()
+        elif not task.cancelled():
+            task.exception()
+
+    async def play(self, ctx: Context, channel: VoiceChannel,
+                   after: callable) -> bool:
         """
         Start playing music in the given `VoiceChannel`.
 
@@ -90,18 +235,40 @@ class Entry:
         :param channel: a `VoiceChannel` to play audio in.
 
         :param after:
-            a callable to be called after audio is finished plContextaying.
+            a callable to be called after audio is finished playing.
             see `VoiceClient.play`
+
+        :return: True if the audio started playing, False if it was
+            cancelled by `Entry.cancel_prefetch` or failed to play.
         """
-        name = await self.source.true_name()
-        src = FFmpegPCMAudio(name, before_options='-nostdin', options='-vn')
+        task = self.prefetch()
+        try:
+            name = await shield(task)
+        except CancelledError:
+            if task.cancelled():
+                return False
+            raise
+        except (DownloadError, ValueError) as e:
+            ctx.bot.logger.warn(str(e))
+            ctx.bot.music_metrics.count(
+                ctx.guild.id, self.source_type, 'error'
+            )
+            await ctx.send(f'Skipped {self}, it can not be played.')
+            return False
+        metrics = ctx.bot.music_metrics
         try:
+            src = self.__audio(ctx, name, self.__encoded(name))
             if not ctx.voice_client:
-                await channel.connect()
+                with metrics.span(ctx.guild.id, 'connect'):
+                    await channel.connect()
             assert ctx.voice_client is not None
             ctx.voice_client.play(src, after=after)
         except ClientException as e:
             ctx.bot.logger.warn(str(e))
+            metrics.count(ctx.guild.id, self.source_type, 'error')
+            return False
+        metrics.count(ctx.guild.id, self.source_type, 'played')
+        return True
 
     def __calc_skip(self, ctx) -> tuple:
         """
@@ -144,6 +311,7 @@ class Entry:
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
+        self.cancel_prefetch()
         self.source.clean_up()
         del self.skip_members
         try:
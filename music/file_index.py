@@ -0,0 +1,131 @@
+from asyncio import Lock, get_event_loop
+from pathlib import Path
+from sqlite3 import connect
+
+from music.music_util import get_file_info
+
+
+class FileIndex:
+    """
+    A persistent index of the tags of local audio files, kept in a SQLite3
+    database. Files are keyed by path, modification time and size, so tags
+    are only parsed again when a file changes.
+
+    === Attributes ===
+    :type db_path: Path
+        The path to the SQLite3 database.
+    :type lock: Lock
+        The lock that makes scans of the index one at a time.
+    :type parsed: int
+        Number of files parsed by scans.
+    :type reused: int
+        Number of files whose tags were read from the index by scans.
+    """
+    __slots__ = ('db_path', 'logger', 'lock', 'parsed', 'reused')
+
+    def __init__(self, db_path: Path, logger):
+        """
+        :param db_path: the path to the SQLite3 database.
+        :param logger: the logger.
+        """
+        self.db_path = db_path
+        self.logger = logger
+        self.lock = Lock()
+        self.parsed = 0
+        self.reused = 0
+
+    @property
+    def stats(self) -> dict:
+        """
+        :return: a dict of the index counters.
+        """
+        return {'parsed': self.parsed, 'reused': self.reused}
+
+    async def load(self, directory: Path) -> list:
+        """
+        Get the tags of all files in a directory, the index is updated in
+        a worker thread.
+        :param directory: the directory.
+        :return: a list of (file path, (title, genre, artist, album, length))
+        """
+        async with self.lock:
+            return await get_event_loop().run_in_executor(
+                None, self.scan, directory
+            )
+
+    def scan(self, directory: Path) -> list:
+        """
+        Update the index for the files in a directory, only new and changed
+        files are parsed. Entries of files that no longer exist in the
+        directory are removed. This blocks, see `FileIndex.load`
+        :param directory: the directory.
+        :return: a list of (file path, (title, genre, artist, album, length))
+        """
+        connection = connect(str(self.db_path))
+        try:
+            return self.__scan(connection, directory)
+        finally:
+            connection.close()
+
+    def __scan(self, connection, directory: Path) -> list:
+        """
+        See `FileIndex.scan`
+        :param connection: the SQLite3 connection.
+        :param directory: the directory.
+        :return: a list of (file path, (title, genre, artist, album, length))
+        """
+        connection.execute(
+            'CREATE TABLE IF NOT EXISTS file_info('
+            'directory VARCHAR NOT NULL,'
+            'file_path VARCHAR NOT NULL,'
+            'mtime REAL NOT NULL,'
+            'size INT NOT NULL,'
+            'title VARCHAR,'
+            'genre VARCHAR,'
+            'artist VARCHAR,'
+            'album VARCHAR,'
+            'length VARCHAR,'
+            'PRIMARY KEY (directory, file_path)'
+            ') WITHOUT ROWID'
+        )
+        directory = str(directory)
+        known = {
+            row[0]: row[1:] for row in connection.execute(
+                'SELECT file_path, mtime, size, title, genre, artist, album, '
+                'length FROM file_info WHERE directory=?', (directory,)
+            )
+        }
+        res = []
+        changed = []
+        for file in Path(directory).iterdir():
+            file_path = str(file)
+            try:
+                stat = file.stat()
+            except OSError as e:
+                self.logger.warn(str(e))
+                continue
+            row = known.pop(file_path, None)
+            if row and row[:2] == (stat.st_mtime, stat.st_size):
+                self.reused += 1
+                res.append((file_path, row[2:]))
+                continue
+            self.parsed += 1
+            info = get_file_info(file_path)
+            changed.append(
+                (directory, file_path, stat.st_mtime, stat.st_size) + info
+            )
+            res.append((file_path, info))
+        with connection:
+            connection.executemany(
+                'REPLACE INTO file_info VALUES (?,?,?,?,?,?,?,?,?)', changed
+            )
+            connection.executemany(
+                'DELETE FROM file_info WHERE directory=? AND file_path=?',
+                ((directory, file_path) for file_path in known)
+            )
+        if changed or known:
+            self.logger.info(
+                f'Music index of {directory}: {len(changed)} files parsed, '
+                f'{len(known)} removed.'
+            )
+        return res
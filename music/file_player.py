@@ -25,7 +25,7 @@ class FilePlayer(AbstractMusicPlayer):
     async def enqueue(self, ctx, query: str = None):
         """
         Bulk enqueue all files in the default play list directory into
-        `self.entry_queue`
+        `self.entry_queue`, the file tags are read from `ctx.bot.file_index`
 
         :param ctx: the `discord.Context` object.
 
@@ -33,6 +33,9 @@ class FilePlayer(AbstractMusicPlayer):
         """
         if self.entry_queue:
             return
-        files = [str(f) for f in self.default_path.iterdir()]
+        files = await ctx.bot.file_index.load(self.default_path)
         shuffle(files)
-        self.entry_queue.extend(Entry.from_file(ctx, file) for file in files)
+        self.entry_queue.extend(
+            Entry.from_file(ctx, file, info) for file, info in files
+        )
+        self.prefetch()
@@ -1,4 +1,5 @@
 from functools import partial
+from typing import Optional
 
 from music.abstract_source import AbstractSource
 from music.music_util import file_detail, get_file_info
@@ -11,11 +12,15 @@ class FileSource(AbstractSource):
 
     __slots__ = ('file_path', 'title')
 
-    def __init__(self, file_path: str):
+    def __init__(self, file_path: str, info: Optional[tuple] = None):
         """
         :param file_path: the file path.
+        :param info: the file tags from `FileIndex`, the file is parsed if
+            this is None, see `get_file_info`
         """
-        self.title, genre, artist, album, length = get_file_info(file_path)
+        if info is None:
+            info = get_file_info(file_path)
+        self.title, genre, artist, album, length = info
         self.file_path = file_path
         super().__init__(
             partial(file_detail, self.title, genre, artist, album, length)
@@ -24,6 +29,13 @@ class FileSource(AbstractSource):
     def __str__(self):
         return self.title
 
+    @property
+    def local(self) -> bool:
+        """
+        See `AbstractSource.local`
+        """
+        return True
+
     def clean_up(self):
         del self.title
         del self.file_path
@@ -0,0 +1,93 @@
+from functools import partial
+from typing import Callable
+
+from music.abstract_source import AbstractSource
+from music.music_util import flat_url, ytdl_detail
+
+
+class LazyYTDLSource(AbstractSource):
+    """
+    Audio source for an entry of a youtube-dl playlist. Only the url and
+    title of the entry are known until the audio is needed, then the full
+    video data is fetched and the audio is played by a `YTDLSource`
+
+    === Attributes ===
+    :type url: str
+        Webpage url for the audio source.
+    :type title: str
+        Title for the audio.
+    :type requester: str
+        Song requester name.
+    :type resolve: Callable
+        A coroutine function that takes `self.url` and returns a
+        `YTDLSource`, or None if the url can't be played.
+    :type source: Optional[YTDLSource]
+        The resolved audio source, None if it's not resolved yet.
+    """
+    __slots__ = ('url', 'title', 'requester', 'resolve', 'source')
+
+    def __init__(self, data: dict, requester: str, resolve: Callable):
+        """
+        :param data: the flat playlist entry provided by youtube-dl.
+        :param requester: the song requester name.
+        :param resolve: a coroutine function that takes a webpage url and
+            returns a `YTDLSource`, or None if the url can't be played.
+        """
+        self.url = flat_url(data)
+        self.title = data.get('title') or self.url
+        self.requester = requester
+        self.resolve = resolve
+        self.source = None
+        super().__init__(
+            partial(
+                ytdl_detail, self.title, data.get('duration'),
+                data.get('uploader'), requester, None
+            )
+        )
+
+    def __str__(self):
+        return f'{self.title}\tRequested by {self.requester}'
+
+    @property
+    def detail(self):
+        if self.source is not None:
+            return self.source.detail
+        return super().detail
+
+    @property
+    def local(self) -> bool:
+        """
+        See `AbstractSource.local`
+        """
+        return self.source is not None and self.source.local
+
+    async def true_name(self) -> str:
+        """
+        Overrides `AbstractSource.true_name`
+
+        Fetch the full video data if it's not fetched yet, then see
+        `YTDLSource.true_name`
+
+        :return: Name used by `FFmpegPCMAudio`
+        """
+        if self.source is None:
+            self.source = await self.resolve(self.url)
+        if self.source is None:
+            raise ValueError(f'{self.url} can not be played.')
+        return await self.source.true_name()
+
+    def release(self):
+        """
+        See `AbstractSource.release`
+        """
+        if self.source is not None:
+            self.source.release()
+
+    def clean_up(self):
+        """
+        Cleanup function for when the audio is finished playing.
+        """
+        if self.source is not None:
+            self.source.clean_up()
+        del self.source
+        del self.resolve
@@ -0,0 +1,238 @@
+from pathlib import Path
+from sqlite3 import connect
+from time import time
+from typing import Optional
+
+INDEX_NAME = 'index.db'
+
+
+class MusicCache:
+    """
+    A persistent cache of audio files downloaded by youtube-dl.
+    Files are keyed by extractor and video id, and an index of their sizes
+    and last use times is kept in a SQLite3 database next to them.
+    The least recently used files are deleted to keep the cache within
+    its disk budget.
+
+    === Attributes ===
+    :type path: Path
+        The directory the files are saved in.
+    :type max_bytes: int
+        The disk budget in bytes.
+    :type connection: Connection
+        The SQLite3 connection to the index.
+    :type hits: int
+        Number of lookups that found a cached file.
+    :type misses: int
+        Number of lookups that did not.
+    :type evictions: int
+        Number of files deleted to stay within the disk budget.
+    :type pinned: dict
+        {key: number of audio sources using the file}, pinned files are
+        never evicted.
+    """
+    __slots__ = ('path', 'max_bytes', 'connection', 'logger',
+                 'hits', 'misses', 'evictions', 'pinned')
+
+    def __init__(self, path: Path, max_bytes: int, logger):
+        """
+        :param path: the directory to save the files in.
+        :param max_bytes: the disk budget in bytes.
+        :param logger: the logger.
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self.logger = logger
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.pinned = {}
+        self.connection = connect(str(path.joinpath(INDEX_NAME)))
+        self.connection.execute(
+            'CREATE TABLE IF NOT EXISTS music_cache('
+            'key VARCHAR NOT NULL PRIMARY KEY,'
+            'file_path VARCHAR NOT NULL,'
+            'size INT NOT NULL,'
+            'last_used REAL NOT NULL'
+            ')'
+        )
+        self.connection.commit()
+        self.sync()
+
+    @staticmethod
+    def key(data: dict) -> Optional[str]:
+        """
+        :param data: the data dict provided by youtube-dl.
+        :return: the cache key of the audio if the data has an id.
+        """
+        extractor = data.get('extractor_key') or data.get('extractor')
+        id_ = data.get('id')
+        if extractor and id_:
+            return f'{extractor}-{id_}'.lower()
+
+    @property
+    def out_template(self) -> str:
+        """
+        :return: the youtube-dl output template for files in the cache.
+        """
+        return f'{self.path}/%(extractor)s-%(id)s.%(ext)s'
+
+    @property
+    def total_bytes(self) -> int:
+        """
+        :return: the total size of the cached files in bytes.
+        """
+        cur = self.connection.execute('SELECT SUM(size) FROM music_cache')
+        return cur.fetchone()[0] or 0
+
+    @property
+    def stats(self) -> dict:
+        """
+        :return: a dict of the cache counters.
+        """
+        cur = self.connection.execute('SELECT COUNT(*) FROM music_cache')
+        return {
+            'files': cur.fetchone()[0],
+            'bytes': self.total_bytes,
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'pinned': len(self.pinned)
+        }
+
+    def __contains__(self, key: str) -> bool:
+        """
+        :param key: the cache key, see `MusicCache.key`
+        :return: True if the file is cached, the file isn't marked as used.
+        """
+        row = self.connection.execute(
+            'SELECT file_path FROM music_cache WHERE key=?', (key,)
+        ).fetchone()
+        return bool(row) and Path(row[0]).is_file()
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Get a cached file and mark it as used.
+        :param key: the cache key, see `MusicCache.key`
+        :return: the file path if it's cached.
+        """
+        row = self.connection.execute(
+            'SELECT file_path FROM music_cache WHERE key=?', (key,)
+        ).fetchone()
+        if row and Path(row[0]).is_file():
+            self.connection.execute(
+                'UPDATE music_cache SET last_used=? WHERE key=?',
+                (time(), key)
+            )
+            self.connection.commit()
+            self.hits += 1
+            return row[0]
+        if row:
+            self.__delete(key, None)
+        self.misses += 1
+
+    def add(self, key: str, file_path: str):
+        """
+        Add a downloaded file to the cache, then evict the least recently
+        used files if the cache is over its disk budget.
+        :param key: the cache key, see `MusicCache.key`
+        :param file_path: the file path.
+        """
+        try:
+            size = Path(file_path).stat().st_size
+        except OSError as e:
+            self.logger.warn(str(e))
+            return
+        self.connection.execute(
+            'REPLACE INTO music_cache VALUES (?,?,?,?)',
+            (key, file_path, size, time())
+        )
+        self.connection.commit()
+        self.evict()
+
+    def pin(self, key: str):
+        """
+        Keep a file from being evicted while it's in use, every call must be
+        matched by a call to `MusicCache.release`
+        :param key: the cache key, see `MusicCache.key`
+        """
+        self.pinned[key] = self.pinned.get(key, 0) + 1
+
+    def release(self, key: str):
+        """
+        Release a file pinned by `MusicCache.pin`, then evict files if the
+        cache is over its disk budget.
+        :param key: the cache key, see `MusicCache.key`
+        """
+        count = self.pinned.pop(key, 0) - 1
+        if count > 0:
+            self.pinned[key] = count
+        else:
+            self.evict()
+
+    def evict(self):
+        """
+        Delete the least recently used files that aren't pinned until the
+        cache is within its disk budget.
+        """
+        total = self.total_bytes
+        if total <= self.max_bytes:
+            return
+        rows = self.connection.execute(
+            'SELECT key, file_path, size FROM music_cache '
+            'ORDER BY last_used'
+        ).fetchall()
+        for key, file_path, size in rows:
+            if total <= self.max_bytes:
+                break
+            if key in self.pinned:
+                continue
+            self.__delete(key, file_path)
+            self.evictions += 1
+            total -= size
+
+    def sync(self):
+        """
+        Make the index match the files on disk. Entries of missing files
+        are removed, and files not in the index are deleted.
+        """
+        rows = self.connection.execute(
+            'SELECT key, file_path FROM music_cache'
+        ).fetchall()
+        known = set()
+        for key, file_path in rows:
+            if Path(file_path).is_file():
+                known.add(Path(file_path).name)
+            else:
+                self.__delete(key, None)
+        for file in self.path.iterdir():
+            name = file.name
+            if name.startswith('.') or name.startswith(INDEX_NAME) or \
+                    name in known:
+                continue
+            self.__unlink(file)
+        self.evict()
+
+    def __delete(self, key: str, file_path: Optional[str]):
+        """
+        Remove an entry from the index and delete its file.
+        :param key: the cache key.
+        :param file_path: the file path, None to keep the file.
+        """
+        self.connection.execute('DELETE FROM music_cache WHERE key=?', (key,))
+        self.connection.commit()
+        if file_path:
+            self.__unlink(Path(file_path))
+
+    def __unlink(self, file: Path):
+        """
+        Delete a file, errors are logged.
+        :param file: the file.
+        """
+        try:
+            file.unlink()
+        except OSError as e:
+            self.logger.warn(str(e))
+        else:
+            self.logger.info(f'Deleted {file} from music cache.')
@@ -0,0 +1,190 @@
+from asyncio import CancelledError
+from bisect import bisect_left
+from contextlib import contextmanager
+from time import monotonic
+from typing import Hashable, Optional
+
+BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, float('inf'))
+
+
+class Histogram:
+    """
+    A latency histogram with fixed buckets.
+
+    === Attributes ===
+    :type counts: list
+        Number of observations in each of `BUCKETS`
+    :type count: int
+        Total number of observations.
+    :type total: float
+        Sum of the observations in seconds.
+    :type max: float
+        The largest observation in seconds.
+    """
+    __slots__ = ('counts', 'count', 'total', 'max')
+
+    def __init__(self):
+        self.counts = [0] * len(BUCKETS)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float):
+        """
+        Record an observation.
+        :param seconds: the latency in seconds.
+        """
+        self.counts[bisect_left(BUCKETS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def percentile(self, q: float) -> float:
+        """
+        :param q: the percentile between 0 and 1.
+        :return: the upper bound of the bucket the percentile falls in,
+            `self.max` if it falls in the last bucket.
+        """
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(BUCKETS, self.counts):
+            seen += count
+            if seen >= rank and count:
+                return min(bound, self.max)
+        return self.max
+
+    def summary(self) -> dict:
+        """
+        :return: the count, mean, p50, p95 and max of the observations.
+        """
+        return {
+            'count': self.count,
+            'mean': round(self.total / self.count, 3) if self.count else 0,
+            'p50': round(self.percentile(0.5), 3),
+            'p95': round(self.percentile(0.95), 3),
+            'max': round(self.max, 3)
+        }
+
+    def to_dict(self) -> dict:
+        """
+        :return: the histogram as a JSON serializable dict.
+        """
+        res = self.summary()
+        res['sum'] = round(self.total, 6)
+        res['buckets'] = {
+            str(bound): count for bound, count in zip(BUCKETS, self.counts)
+        }
+        return res
+
+
+class MusicMetrics:
+    """
+    Latency histograms of the music subsystem steps, and counts of music
+    events by audio source type. Everything is recorded for the guild it
+    happened in and for all guilds, which uses the guild id None.
+
+    Spans recorded:
+        search: a query or url resolved into an audio source.
+        extract: a youtube-dl info extraction.
+        download: a youtube-dl download.
+        ytdl_wait: the time a youtube-dl job waited in `YTDLPool`
+        connect: connecting to a voice channel.
+        ffmpeg: creating the audio source, spawning FFmpeg for PCM.
+        opus: opening a pre-encoded Ogg/Opus file.
+        first_audio: from a request to audio playing, when nothing was
+            playing before.
+        gap: from the end of a song to the start of the next one.
+
+    === Attributes ===
+    :type histograms: dict
+        {(guild id, span name): Histogram}
+    :type counters: dict
+        {(guild id, source type, event): count}
+    """
+    __slots__ = ('histograms', 'counters')
+
+    def __init__(self):
+        self.histograms = {}
+        self.counters = {}
+
+    def observe(self, guild_id: Optional[Hashable], name: str,
+                seconds: float):
+        """
+        Record the latency of a span.
+        :param guild_id: the guild id.
+        :param name: the span name.
+        :param seconds: the latency in seconds.
+        """
+        for key in {(guild_id, name), (None, name)}:
+            hist = self.histograms.get(key)
+            if hist is None:
+                hist = self.histograms[key] = Histogram()
+            hist.observe(seconds)
+
+    @contextmanager
+    def span(self, guild_id: Optional[Hashable], name: str):
+        """
+        A context manager that records the latency of its body, the
+        latency isn't recorded if the body raises an error.
+        :param guild_id: the guild id.
+        :param name: the span name.
+        """
+        start = monotonic()
+        try:
+            yield
+        except CancelledError:
+            raise
+        except Exception:
+            self.count(guild_id, name, 'error')
+            raise
+        self.observe(guild_id, name, monotonic() - start)
+
+    def count(self, guild_id: Optional[Hashable], source: str, event: str):
+        """
+        Count an event.
+        :param guild_id: the guild id.
+        :param source: the audio source type or span name.
+        :param event: the event, such as played, skipped or error.
+        """
+        for key in {(guild_id, source, event), (None, source, event)}:
+            self.counters[key] = self.counters.get(key, 0) + 1
+
+    def summary(self, guild_id: Optional[Hashable] = None) -> tuple:
+        """
+        :param guild_id: the guild id, None for all guilds.
+        :return: a tuple of ({span name: `Histogram.summary`},
+            {(source, event): count})
+        """
+        spans = {
+            name: hist.summary()
+            for (gid, name), hist in sorted(
+                self.histograms.items(), key=lambda i: i[0][1]
+            ) if gid == guild_id
+        }
+        counts = {
+            (source, event): count
+            for (gid, source, event), count in sorted(
+                self.counters.items(), key=lambda i: i[0][1:]
+            ) if gid == guild_id
+        }
+        return spans, counts
+
+    def export(self) -> dict:
+        """
+        :return: all histograms and counters as a JSON serializable dict,
+            grouped by guild id with 'all' for all guilds.
+        """
+        res = {}
+        for (guild_id, name), hist in self.histograms.items():
+            guild = res.setdefault(
+                'all' if guild_id is None else str(guild_id),
+                {'spans': {}, 'counters': {}}
+            )
+            guild['spans'][name] = hist.to_dict()
+        for (guild_id, source, event), count in self.counters.items():
+            guild = res.setdefault(
+                'all' if guild_id is None else str(guild_id),
+                {'spans': {}, 'counters': {}}
+            )
+            guild['counters'][f'{source}.{event}'] = count
+        return res
@@ -1,9 +1,9 @@
 from asyncio import get_event_loop
-from collections import Iterable
+from collections.abc import Iterable
 from functools import partial
 from os.path import isfile
 from pathlib import Path
-from typing import Optional, Union
+from typing import Callable, Optional, Union
 
 from discord import Embed
 from discord.ext.commands import Context
@@ -11,7 +11,9 @@ from mutagen import MutagenError
 from mutagen.easymp4 import EasyMP4
 from mutagen.flac import FLAC
 from mutagen.mp3 import EasyMP3
-from youtube_dl import YoutubeDL
+from youtube_dl import DownloadError, YoutubeDL
+
+from music.ytdl_info_cache import YTDLInfoCache
 
 
 def add_embed_options(embed: Embed) -> Embed:
@@ -103,19 +105,99 @@ def get_ytdl_format(out_format):
     }
 
 
-async def fetch_ytdl_info(ytdl: YoutubeDL, query: str) -> dict:
+async def run_in_default(func: Callable, *args, download: bool = False):
+    """
+    Run a blocking function in the default executor.
+    :param func: the function.
+    :param args: the function arguments.
+    :param download: not used, see `YTDLPool.run`
+    :return: the function result.
+    """
+    return await get_event_loop().run_in_executor(None, func, *args)
+
+
+async def fetch_ytdl_info(ytdl: YoutubeDL, query: str,
+                          run: Callable = run_in_default) -> dict:
     """
     Fetch video data using YoutubeDL.
     :param ytdl: the YoutubeDL instance.
     :param query: the search query.
+    :param run: the coroutine function to run blocking calls with,
+        see `YTDLPool.runner`
     :return: the video data.
     """
-    loop = get_event_loop()
     func = partial(ytdl.extract_info, query, download=False)
-    data = await loop.run_in_executor(None, func)
+    data = await run(func)
+    return data
+
+
+async def fetch_video_info(ytdl: YoutubeDL, query: str,
+                           cache: Optional[YTDLInfoCache],
+                           run: Callable = run_in_default) -> Optional[dict]:
+    """
+    Fetch the data of a single video using YoutubeDL, the first result is
+    used if the query is a search or a playlist.
+    :param ytdl: the YoutubeDL instance.
+    :param query: the search query or webpage url.
+    :param cache: the `YTDLInfoCache` to look up and save the data in,
+        optional.
+    :param run: the coroutine function to run blocking calls with,
+        see `YTDLPool.runner`
+    :return: the video data if any.
+    """
+    data = cache.get(query) if cache else None
+    if data:
+        return data
+    data = await fetch_ytdl_info(ytdl, query, run)
+    if data and 'entries' in data:
+        try:
+            data = data['entries'][0]
+        except IndexError:
+            return
+    if data and cache:
+        cache.put(query, data)
     return data
 
 
+async def fetch_playlist(query: str, start: int, end: int,
+                         run: Callable = run_in_default) -> Optional[dict]:
+    """
+    Fetch a slice of a playlist using youtube-dl's flat extraction, only
+    the urls and titles of the entries are fetched. `noplaylist` is kept,
+    so a video url that also names a playlist, such as
+    `watch?v=X&list=Y`, is fetched as the video.
+    :param query: the webpage url.
+    :param start: the 1 based index of the first entry.
+    :param end: the 1 based index of the last entry.
+    :param run: the coroutine function to run blocking calls with,
+        see `YTDLPool.runner`
+    :return: the playlist data with a list of flat entries, or the video
+        data if the url is not a playlist.
+    """
+    params = get_ytdl_format(None)
+    params.update(
+        extract_flat='in_playlist', playliststart=start, playlistend=end
+    )
+    with YoutubeDL(params) as ydl:
+        return await fetch_ytdl_info(ydl, query, run)
+
+
+def flat_url(data: dict) -> Optional[str]:
+    """
+    Get the webpage url of a flat playlist entry.
+    :param data: the flat entry provided by youtube-dl.
+    :return: the webpage url if any.
+    >>> flat_url({'ie_key': 'Youtube', 'id': 'aB', 'url': 'aB'})
+    'https://www.youtube.com/watch?v=aB'
+    >>> flat_url({'url': 'https://a.b/c'})
+    'https://a.b/c'
+    """
+    url = data.get('webpage_url') or data.get('url')
+    if url and '://' not in url and data.get('ie_key') == 'Youtube':
+        return f'https://www.youtube.com/watch?v={data.get("id") or url}'
+    return url
+
+
 def ytdl_detail(title, duration, uploader, requester, date) -> str:
     """
     :return: a detailed string repersentation of a youtube-dl audio source.
@@ -135,17 +217,18 @@ def ytdl_detail(title, duration, uploader, requester, date) -> str:
             f'{uploader}{date}')
 
 
-async def yt_download(ydl: YoutubeDL, data: dict,
-                      logger, webpage_url: str) -> str:
+async def yt_download(ydl: YoutubeDL, data: dict, logger, webpage_url: str,
+                      run: Callable = run_in_default) -> str:
     """
     Download a file from youtube dl.
     :param ydl: the `YoutubeDL` instance.
     :param data: the file data.
     :param logger: the logger to do logging with.
     :param webpage_url: the webpage url.
+    :param run: the coroutine function to run blocking calls with,
+        see `YTDLPool.runner`
     :return: the file path to the download.
     """
-    loop = get_event_loop()
     file_path = ydl.prepare_filename(data)
     if isfile(file_path):
         logger.info(
@@ -153,9 +236,12 @@ async def yt_download(ydl: YoutubeDL, data: dict,
         )
         return file_path
     logger.info(f'Downloading {webpage_url}')
-    await loop.run_in_executor(
-        None, ydl.download, [webpage_url]
-    )
+    try:
+        await run(ydl.process_info, dict(data), download=True)
+    except DownloadError as e:
+        logger.warn(f'Downloading from extracted data failed, '
+                    f'extracting {webpage_url} again.\n{e}')
+        await run(ydl.download, [webpage_url], download=True)
     logger.info(
         f'{webpage_url} downloaded to {file_path}'
     )
@@ -0,0 +1,80 @@
+from struct import Struct
+from typing import BinaryIO, Iterator
+
+from discord import AudioSource
+
+# capture pattern, version, header type, granule position, serial number,
+# page sequence number, checksum, number of segments
+_PAGE = Struct('<4sBBqIIIB')
+
+
+def ogg_packets(file: BinaryIO) -> Iterator[bytes]:
+    """
+    Read the packets of an Ogg stream, page checksums are not verified.
+    :param file: the Ogg file opened in binary mode.
+    :return: an iterator of the packets.
+    """
+    packet = []
+    while True:
+        header = file.read(_PAGE.size)
+        if len(header) < _PAGE.size:
+            return
+        capture, *_, count = _PAGE.unpack(header)
+        if capture != b'OggS':
+            raise ValueError('Invalid Ogg page.')
+        lacing = file.read(count)
+        body = file.read(sum(lacing))
+        start = 0
+        for size in lacing:
+            packet.append(body[start:start + size])
+            start += size
+            if size < 255:
+                yield b''.join(packet)
+                packet = []
+
+
+class OggOpusAudio(AudioSource):
+    """
+    An audio source that plays the Opus packets of an Ogg/Opus file as they
+    are, without decoding and encoding them again.
+    The file must be encoded in 48kHz stereo with 20ms frames,
+    see `OpusCache.encode`
+
+    === Attributes ===
+    :type file: BinaryIO
+        The Ogg/Opus file.
+    :type packets: Iterator[bytes]
+        The Opus packets of the file.
+    """
+    __slots__ = ('file', 'packets')
+
+    def __init__(self, file_path: str):
+        """
+        :param file_path: the path to the Ogg/Opus file.
+        """
+        self.file = open(file_path, 'rb')
+        self.packets = ogg_packets(self.file)
+        try:
+            head = next(self.packets, b'')
+            next(self.packets, None)
+        except ValueError:
+            head = b''
+        if not head.startswith(b'OpusHead'):
+            self.cleanup()
+            raise ValueError(f'{file_path} is not an Ogg/Opus file.')
+
+    def read(self) -> bytes:
+        """
+        See `AudioSource.read`
+        :return: the next Opus packet, empty bytes if the file ended.
+        """
+        try:
+            return next(self.packets, b'')
+        except (OSError, ValueError):
+            return b''
+
+    def is_opus(self) -> bool:
+        return True
+
+    def cleanup(self):
+        self.file.close()
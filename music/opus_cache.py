@@ -0,0 +1,181 @@
+from asyncio import ensure_future, get_event_loop, shield
+from hashlib import sha1
+from os import replace, utime
+from pathlib import Path
+from subprocess import DEVNULL, PIPE, run
+from typing import Optional
+
+BITRATE = '128k'
+
+
+class OpusCache:
+    """
+    A cache of local audio files transcoded to Ogg/Opus at the Discord
+    bitrate, so they can be played with `OggOpusAudio` without transcoding
+    them on every play. Files are keyed by the source path, size and
+    modification time, the least recently used files are deleted to keep
+    the cache within its disk budget.
+
+    === Attributes ===
+    :type path: Path
+        The directory the encoded files are saved in.
+    :type max_bytes: int
+        The disk budget in bytes.
+    :type hits: int
+        Number of lookups that found an encoded file.
+    :type misses: int
+        Number of lookups that did not.
+    :type encoded: int
+        Number of files encoded.
+    :type failed: set
+        Keys of files that failed to encode, they are not tried again.
+    """
+    __slots__ = ('path', 'max_bytes', 'logger', 'hits', 'misses', 'encoded',
+                 'failed', '__encoding')
+
+    def __init__(self, path: Path, max_bytes: int, logger):
+        """
+        :param path: the directory to save the encoded files in.
+        :param max_bytes: the disk budget in bytes.
+        :param logger: the logger.
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self.logger = logger
+        self.hits = 0
+        self.misses = 0
+        self.encoded = 0
+        self.failed = set()
+        # key -> encoding task
+        self.__encoding = {}
+        for file in path.glob('*.part'):
+            self.__unlink(file)
+
+    @property
+    def stats(self) -> dict:
+        """
+        :return: a dict of the cache counters.
+        """
+        return {
+            'files': sum(1 for _ in self.path.glob('*.ogg')),
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'encoded': self.encoded,
+            'failed': len(self.failed),
+            'encoding': len(self.__encoding)
+        }
+
+    @staticmethod
+    def key(file_path: str) -> Optional[str]:
+        """
+        :param file_path: the path to the source file.
+        :return: the cache key of the file, None if it's not a local file.
+        """
+        try:
+            stat = Path(file_path).stat()
+        except (OSError, ValueError):
+            return
+        name = sha1(str(Path(file_path).resolve()).encode()).hexdigest()
+        return f'{name}-{stat.st_size}-{int(stat.st_mtime)}'
+
+    def get(self, file_path: str) -> Optional[str]:
+        """
+        Get the encoded file of a source file and mark it as used.
+        :param file_path: the path to the source file.
+        :return: the path to the encoded file if it's cached.
+        """
+        key = self.key(file_path)
+        encoded = self.path.joinpath(f'{key}.ogg') if key else None
+        if encoded and encoded.is_file():
+            try:
+                utime(str(encoded))
+            except OSError as e:
+                self.logger.warn(str(e))
+            self.hits += 1
+            return str(encoded)
+        self.misses += 1
+
+    async def encode(self, file_path: str) -> Optional[str]:
+        """
+        Encode a source file if it's not encoded yet, concurrent calls for
+        the same file share one encoding.
+        :param file_path: the path to the source file.
+        :return: the path to the encoded file, None if encoding failed.
+        """
+        key = self.key(file_path)
+        if not key or key in self.failed:
+            return
+        encoded = self.path.joinpath(f'{key}.ogg')
+        if encoded.is_file():
+            return str(encoded)
+        task = self.__encoding.get(key)
+        if task is None:
+            task = ensure_future(self.__encode(key, file_path, encoded))
+            self.__encoding[key] = task
+            task.add_done_callback(lambda _: self.__encoding.pop(key, None))
+        return await shield(task)
+
+    async def __encode(self, key: str, file_path: str,
+                       encoded: Path) -> Optional[str]:
+        """
+        Encode a source file with FFmpeg in a worker thread.
+        :param key: the cache key.
+        :param file_path: the path to the source file.
+        :param encoded: the path to the encoded file.
+        :return: the path to the encoded file, None if encoding failed.
+        """
+        part = encoded.with_suffix('.part')
+        args = [
+            'ffmpeg', '-nostdin', '-y', '-loglevel', 'error',
+            '-i', file_path, '-vn', '-map_metadata', '-1',
+            '-c:a', 'libopus', '-b:a', BITRATE, '-ar', '48000', '-ac', '2',
+            '-frame_duration', '20', '-application', 'audio',
+            '-f', 'ogg', str(part)
+        ]
+        self.logger.info(f'Encoding {file_path} to Opus.')
+        try:
+            res = await get_event_loop().run_in_executor(
+                None, lambda: run(args, stdin=DEVNULL, stdout=DEVNULL,
+                                  stderr=PIPE)
+            )
+            if res.returncode != 0:
+                raise OSError(res.stderr.decode(errors='replace').strip())
+            replace(str(part), str(encoded))
+        except OSError as e:
+            self.logger.warn(f'Encoding {file_path} failed.\n{e}')
+            self.failed.add(key)
+            self.__unlink(part)
+            return
+        self.encoded += 1
+        self.evict()
+        return str(encoded)
+
+    def evict(self):
+        """
+        Delete the least recently used encoded files until the cache is
+        within its disk budget.
+        """
+        files = []
+        for file in self.path.glob('*.ogg'):
+            try:
+                stat = file.stat()
+            except OSError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, file))
+        total = sum(size for _, size, _ in files)
+        for _, size, file in sorted(files):
+            if total <= self.max_bytes:
+                break
+            self.__unlink(file)
+            total -= size
+
+    def __unlink(self, file: Path):
+        """
+        Delete a file, errors are logged.
+        :param file: the file.
+        """
+        try:
+            file.unlink()
+        except OSError as e:
+            self.logger.warn(str(e))
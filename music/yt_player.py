@@ -1,34 +1,57 @@
+from asyncio import CancelledError, ensure_future
+from collections import deque
+
 from discord import VoiceChannel
 from discord.ext.commands import Context
 from youtube_dl import DownloadError
 
 from music.abstract_music_player import AbstractMusicPlayer
 from music.entry import Entry
+from music.music_util import fetch_playlist
+
+FIRST_PAGE = 10
+PLAYLIST_MAX = 500
 
 
 class YTPlayer(AbstractMusicPlayer):
     """
     Player to play audio from youtube-dl.
+
+    === Attributes ===
+    :type loading: Optional[Task]
+        The task enqueueing the rest of the playlists in `self.pending`
+    :type pending: deque
+        (ctx, url, title) of playlists waiting for the rest of their
+        entries to be enqueued, in request order.
     """
-    __slots__ = ()
+    __slots__ = ('loading', 'pending')
 
     def __init__(self, logger, channel: VoiceChannel):
         """
         See `AbstractMusicPlayer.__init__`
         """
         super().__init__(logger, channel)
+        self.loading = None
+        self.pending = deque()
 
     async def enqueue(self, ctx: Context, query: str = None):
         """
         Search and enqueue one `Entry` from youtube-dl.
         Does not enqueue if the search result is empty.
 
+        If the query is a playlist url, the first `FIRST_PAGE` entries are
+        enqueued right away and the rest are enqueued in the background,
+        up to `PLAYLIST_MAX` entries.
+
         :param ctx: the `discord.Context` object.
 
         :param query: the search query.
         """
         async with ctx.typing():
             try:
+                if '://' in query and await self.__enqueue_playlist(
+                        ctx, query):
+                    return
                 entry = await Entry.from_yt(ctx, query)
             except DownloadError as e:
                 self.logger.warn(str(e))
@@ -38,4 +61,88 @@ class YTPlayer(AbstractMusicPlayer):
             await ctx.send(f'Search query {query} not found.')
             return
         self.entry_queue.append(entry)
+        self.prefetch()
         await ctx.send(f'Enqueued:{entry.detail}')
+
+    async def __enqueue_playlist(self, ctx: Context, url: str) -> bool:
+        """
+        Enqueue the first page of a playlist, and start enqueueing the rest
+        of it in the background.
+        :param ctx: the `discord.Context` object.
+        :param url: the url.
+        :return: True if the url is a playlist.
+        """
+        run = ctx.bot.ytdl_pool.runner(ctx.guild.id)
+        data = await fetch_playlist(url, 1, FIRST_PAGE, run)
+        if not data or 'entries' not in data:
+            if data:
+                ctx.bot.ytdl_cache.put(url, data)
+            return False
+        title = data.get('title') or url
+        count = self.__extend(ctx, data['entries'])
+        if not count:
+            await ctx.send(f'Playlist `{title}` is empty.')
+            return True
+        await ctx.send(f'Enqueued {count} songs from playlist `{title}`')
+        if count >= FIRST_PAGE:
+            self.pending.append((ctx, url, title))
+            if self.loading is None:
+                self.loading = ensure_future(self.__load_pending())
+        return True
+
+    async def __load_pending(self):
+        """
+        Enqueue the rest of the playlists in `self.pending` one by one.
+        """
+        pending = self.pending
+        try:
+            while pending:
+                await self.__load_rest(*pending.popleft())
+        finally:
+            if pending is self.pending:
+                self.loading = None
+
+    async def __load_rest(self, ctx: Context, url: str, title: str):
+        """
+        Enqueue the rest of a playlist after its first page.
+        :param ctx: the `discord.Context` object.
+        :param url: the playlist url.
+        :param title: the playlist title.
+        """
+        run = ctx.bot.ytdl_pool.runner(ctx.guild.id)
+        try:
+            data = await fetch_playlist(url, FIRST_PAGE + 1, PLAYLIST_MAX, run)
+            count = self.__extend(ctx, data.get('entries') or ())
+            if count:
+                await ctx.send(
+                    f'Enqueued {count} more songs from playlist `{title}`'
+                )
+        except CancelledError:
+            raise
+        except Exception as e:
+            self.logger.warn(str(e))
+            await ctx.send(
+                f'Sorry, the rest of playlist `{title}` could not be loaded.'
+            )
+
+    def __extend(self, ctx: Context, entries) -> int:
+        """
+        Enqueue flat playlist entries.
+        :param ctx: the `discord.Context` object.
+        :param entries: the flat entries provided by youtube-dl.
+        :return: the number of entries enqueued.
+        """
+        new = [Entry.from_flat(ctx, data) for data in entries if data]
+        self.entry_queue.extend(new)
+        self.prefetch()
+        return len(new)
+
+    async def stop(self, ctx: Context, disconnect: bool):
+        """
+        See `AbstractMusicPlayer.stop`
+        """
+        self.pending = deque()
+        loading, self.loading = self.loading, None
+        if loading is not None:
+            loading.cancel()
+        await super().stop(ctx, disconnect)
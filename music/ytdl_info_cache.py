@@ -0,0 +1,127 @@
+from collections import OrderedDict
+from time import time
+from typing import Callable, Optional
+from urllib.parse import parse_qs, urlparse
+
+EXPIRY_MARGIN = 300
+
+
+def normalize(query: str) -> str:
+    """
+    Normalize a youtube-dl query. Search terms are case insensitive, urls
+    are kept as they are.
+    :param query: the query.
+    :return: the normalized query.
+    >>> normalize('  Some   Song ')
+    'some song'
+    >>> normalize(' https://youtu.be/dQw4w9WgXcQ ')
+    'https://youtu.be/dQw4w9WgXcQ'
+    """
+    query = query.strip()
+    if '://' in query:
+        return query
+    return ' '.join(query.lower().split())
+
+
+def url_expiry(data: dict) -> Optional[float]:
+    """
+    Get the time a stream url stops being usable for playing the audio.
+    :param data: the data dict provided by youtube-dl.
+    :return: the `expire` time of the stream url minus the audio duration
+        and `EXPIRY_MARGIN`, None if the url has no `expire` parameter.
+    >>> url_expiry({'url': 'https://a.b/c?expire=1000', 'duration': 100})
+    600.0
+    """
+    try:
+        params = parse_qs(urlparse(data.get('url') or '').query)
+        expire = float(params['expire'][0])
+    except (KeyError, IndexError, ValueError):
+        return None
+    duration = data.get('duration')
+    duration = duration if isinstance(duration, (int, float)) else 0
+    return expire - duration - EXPIRY_MARGIN
+
+
+class YTDLInfoCache:
+    """
+    A bounded LRU cache of youtube-dl info dicts, keyed by normalized query
+    and by webpage url. Entries expire after a TTL, or earlier if their
+    stream url expires.
+
+    === Attributes ===
+    :type max_size: int
+        Max number of cached info dicts.
+    :type ttl: float
+        Max seconds an info dict is kept.
+    :type hits: int
+        Number of lookups that found a live entry.
+    :type misses: int
+        Number of lookups that did not.
+    """
+    __slots__ = ('max_size', 'ttl', 'clock', 'hits', 'misses', '__entries')
+
+    def __init__(self, max_size: int = 512, ttl: float = 6 * 60 * 60,
+                 clock: Callable[[], float] = time):
+        """
+        :param max_size: max number of cached info dicts.
+        :param ttl: max seconds an info dict is kept.
+        :param clock: a function that returns the current time in seconds.
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        # key -> (info dict, expiry time)
+        self.__entries = OrderedDict()
+
+    def __len__(self):
+        return len(self.__entries)
+
+    @property
+    def stats(self) -> dict:
+        """
+        :return: a dict of the cache counters.
+        """
+        return {
+            'size': len(self),
+            'max_size': self.max_size,
+            'hits': self.hits,
+            'misses': self.misses
+        }
+
+    def get(self, query: str) -> Optional[dict]:
+        """
+        Get a cached info dict.
+        :param query: the search query or webpage url.
+        :return: the info dict if it's cached and not expired.
+        """
+        key = normalize(query)
+        entry = self.__entries.get(key)
+        if entry is None or entry[1] <= self.clock():
+            self.__entries.pop(key, None)
+            self.misses += 1
+            return None
+        self.__entries.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    def put(self, query: Optional[str], data: dict):
+        """
+        Cache an info dict under a query and its webpage url.
+        :param query: the search query, optional.
+        :param data: the info dict of a single video.
+        """
+        expiry = self.clock() + self.ttl
+        url_expires = url_expiry(data)
+        if url_expires is not None:
+            expiry = min(expiry, url_expires)
+        if expiry <= self.clock():
+            return
+        for key in {query, data.get('webpage_url')}:
+            if key:
+                key = normalize(key)
+                self.__entries[key] = (data, expiry)
+                self.__entries.move_to_end(key)
+        while len(self.__entries) > self.max_size:
+            self.__entries.popitem(last=False)
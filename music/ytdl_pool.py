@@ -0,0 +1,182 @@
+from asyncio import Future, get_event_loop
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from time import monotonic
+from typing import Callable, Hashable, Optional
+
+from music.music_metrics import MusicMetrics
+
+
+class YTDLPool:
+    """
+    A dedicated thread pool for blocking youtube-dl calls.
+    Jobs wait in one queue per guild and the guilds are served round robin,
+    so a guild with many jobs can't starve the others. Downloads are
+    bounded separately from the number of workers so extracting info
+    never waits behind long downloads.
+
+    Threads are used instead of processes since `YoutubeDL` instances
+    and their results can't be pickled.
+
+    === Attributes ===
+    :type workers: int
+        Max number of jobs running at once.
+    :type max_downloads: int
+        Max number of downloads running at once.
+    :type running: int
+        Number of jobs running.
+    :type downloads: int
+        Number of downloads running.
+    :type completed: int
+        Number of jobs finished.
+    :type failed: int
+        Number of jobs that raised an error.
+    :type max_wait: float
+        The longest time a job waited in queue in seconds.
+    :type metrics: Optional[MusicMetrics]
+        The metrics to record the extract, download and ytdl_wait spans in.
+    """
+    __slots__ = ('executor', 'workers', 'max_downloads', 'queues',
+                 'running', 'downloads', 'completed', 'failed', 'max_wait',
+                 'metrics')
+
+    def __init__(self, workers: int = 4, max_downloads: int = 2,
+                 metrics: Optional[MusicMetrics] = None):
+        """
+        :param workers: max number of jobs running at once.
+        :param max_downloads: max number of downloads running at once.
+        :param metrics: the metrics to record job latencies in, optional.
+        """
+        self.metrics = metrics
+        self.workers = workers
+        self.max_downloads = min(max_downloads, workers)
+        self.executor = ThreadPoolExecutor(
+            workers, thread_name_prefix='youtube-dl'
+        )
+        # guild id -> deque of (future, download, func, args, queued time)
+        # in round robin order.
+        self.queues = {}
+        self.running = 0
+        self.downloads = 0
+        self.completed = 0
+        self.failed = 0
+        self.max_wait = 0.0
+
+    @property
+    def queued(self) -> int:
+        """
+        :return: the number of jobs waiting in queue.
+        """
+        return sum(len(q) for q in self.queues.values())
+
+    @property
+    def stats(self) -> dict:
+        """
+        :return: a dict of the pool metrics.
+        """
+        return {
+            'workers': self.workers,
+            'max_downloads': self.max_downloads,
+            'queued': self.queued,
+            'queued_guilds': len(self.queues),
+            'running': self.running,
+            'downloads': self.downloads,
+            'completed': self.completed,
+            'failed': self.failed,
+            'max_wait': round(self.max_wait, 3)
+        }
+
+    async def run(self, guild_id: Hashable, func: Callable, *args,
+                  download: bool = False):
+        """
+        Run a blocking function in the pool.
+        :param guild_id: the id of the guild the job is for.
+        :param func: the function.
+        :param args: the function arguments.
+        :param download: True if the job is a download.
+        :return: the function result.
+        """
+        future = get_event_loop().create_future()
+        job = (future, download, func, args, monotonic())
+        self.queues.setdefault(guild_id, deque()).append(job)
+        self.__dispatch()
+        return await future
+
+    def runner(self, guild_id: Hashable) -> Callable:
+        """
+        :param guild_id: the guild id.
+        :return: a coroutine function that runs jobs for the guild in the
+            pool, with the same signature as `music_util.run_in_default`
+        """
+        return partial(self.run, guild_id)
+
+    def __dispatch(self):
+        """
+        Start queued jobs until the pool is full, taking one job from each
+        guild in turn.
+        """
+        skipped = 0
+        while self.running < self.workers and skipped < len(self.queues):
+            guild_id = next(iter(self.queues))
+            queue = self.queues.pop(guild_id)
+            job = self.__next_job(queue)
+            if queue:
+                self.queues[guild_id] = queue
+            if job is None:
+                skipped += 1
+                continue
+            skipped = 0
+            self.__start(guild_id, *job)
+
+    def __next_job(self, queue: deque):
+        """
+        Take the first job in a guild queue that can start now, jobs that
+        are no longer awaited are dropped.
+        :param queue: the guild queue.
+        :return: the job if any.
+        """
+        for job in [job for job in queue if job[0].done()]:
+            queue.remove(job)
+        can_download = self.downloads < self.max_downloads
+        for i, (_, download, *_) in enumerate(queue):
+            if can_download or not download:
+                job = queue[i]
+                del queue[i]
+                return job
+        return None
+
+    def __start(self, guild_id: Hashable, future: Future, download: bool,
+                func: Callable, args: tuple, queued: float):
+        """
+        Run a job in the executor.
+        """
+        start = monotonic()
+        self.max_wait = max(self.max_wait, start - queued)
+        self.running += 1
+        self.downloads += download
+        task = get_event_loop().run_in_executor(self.executor, func, *args)
+        span = 'download' if download else 'extract'
+        if self.metrics:
+            self.metrics.observe(guild_id, 'ytdl_wait', start - queued)
+
+        def done(fut):
+            self.running -= 1
+            self.downloads -= download
+            self.completed += 1
+            if fut.cancelled():
+                future.cancel()
+            elif fut.exception() is not None:
+                self.failed += 1
+                if self.metrics:
+                    self.metrics.count(guild_id, span, 'error')
+                if not future.done():
+                    future.set_exception(fut.exception())
+            else:
+                if self.metrics:
+                    self.metrics.observe(guild_id, span, monotonic() - start)
+                if not future.done():
+                    future.set_result(fut.result())
+            self.__dispatch()
+
+        task.add_done_callback(done)
@@ -2,13 +2,16 @@ from datetime import datetime
 from functools import partial
 from os import remove
 from time import time
+from typing import Callable, Optional
 
-from youtube_dl import YoutubeDL
+from youtube_dl import DownloadError, YoutubeDL
 
 from data import data_path
 from music.abstract_source import AbstractSource
-from music.music_util import fetch_ytdl_info, get_ytdl_format, yt_download, \
-    ytdl_detail
+from music.music_cache import MusicCache
+from music.music_util import fetch_video_info, get_ytdl_format, \
+    run_in_default, yt_download, ytdl_detail
+from music.ytdl_info_cache import YTDLInfoCache
 
 
 class YTDLSource(AbstractSource):
@@ -34,12 +37,27 @@ class YTDLSource(AbstractSource):
         File path to the downloaded audio, None if the audio is not downloaded.
     :type logger: Logger
         Logger to do logging.
+    :type cache: Optional[MusicCache]
+        The cache for downloads that are kept after playing.
+    :type cache_key: Optional[str]
+        The key of the file this source pinned in `self.cache`, if any.
+    :type info_cache: Optional[YTDLInfoCache]
+        The cache of youtube-dl info dicts.
+    :type run: Callable
+        The coroutine function to run blocking youtube-dl calls with.
+    :type progress_hook: Optional[Callable]
+        The youtube-dl progress hook for downloads.
     """
     __slots__ = ('data', 'requester', 'need_download', 'delete_after',
-                 'webpage_url', 'file_path', 'title', 'logger')
+                 'webpage_url', 'file_path', 'title', 'logger', 'cache',
+                 'cache_key', 'info_cache', 'run', 'progress_hook')
 
     def __init__(self, data: dict, requester: str, need_download: bool,
-                 delete_after: bool, logger):
+                 delete_after: bool, logger,
+                 cache: Optional[MusicCache] = None,
+                 info_cache: Optional[YTDLInfoCache] = None,
+                 run: Callable = run_in_default,
+                 progress_hook: Optional[Callable] = None):
         """
         :param data: The data dict provided by youtube-dl.
         :param requester: the song requester name.
@@ -49,6 +67,14 @@ class YTDLSource(AbstractSource):
         :param delete_after:
             Ture will delete the file downloaded by this instance after it's
             been deleted.
+        :param logger: the logger.
+        :param cache: the `MusicCache` for downloads that are kept after
+            playing, optional.
+        :param info_cache: the `YTDLInfoCache`, optional.
+        :param run: the coroutine function to run blocking youtube-dl calls
+            with, see `YTDLPool.runner`
+        :param progress_hook: the youtube-dl progress hook for downloads,
+            see `DownloadPolicy.progress_hook`
         """
         self.data = data
         self.requester = requester
@@ -58,6 +84,11 @@ class YTDLSource(AbstractSource):
         self.webpage_url = data.get('webpage_url')
         self.file_path = None
         self.logger = logger
+        self.cache = cache
+        self.cache_key = None
+        self.info_cache = info_cache
+        self.run = run
+        self.progress_hook = progress_hook
 
         duration = data.get('duration')
         uploader = data.get('uploader')
@@ -92,15 +123,17 @@ class YTDLSource(AbstractSource):
 
         :return: Name used by `FFmpegPCMAudio`
         """
+        if self.need_download and not self.delete_after and self.cache:
+            return await self.__cached_download()
         if self.need_download:
             out_dir = 'dumps' if self.delete_after else 'music_cache'
             epoch = f'{int(time())}-' if self.delete_after else ''
             out = (f'{str(data_path.joinpath(out_dir))}'
                    f'/{epoch}%(extractor)s-%(id)s-%(title)s.%(ext)s')
-            with YoutubeDL(get_ytdl_format(out)) as ydl:
+            with YoutubeDL(self.__download_format(out)) as ydl:
                 fp = await yt_download(
                     ydl, self.data,
-                    self.logger, self.webpage_url
+                    self.logger, self.webpage_url, self.run
                 )
                 self.file_path = fp
                 return fp
@@ -108,25 +141,69 @@ class YTDLSource(AbstractSource):
             with YoutubeDL(get_ytdl_format(None)) as ydl:
                 return await self.__fetch_url(ydl)
 
+    async def __cached_download(self) -> str:
+        """
+        Get the audio file from `self.cache`, or download it into the cache.
+        The file is pinned in the cache until `YTDLSource.clean_up`
+        :return: the file path.
+        """
+        key = MusicCache.key(self.data)
+        file_path = self.cache.get(key) if key else None
+        if key and self.cache_key is None:
+            self.cache.pin(key)
+            self.cache_key = key
+        if file_path:
+            self.logger.info(f'Playing {self.webpage_url} from music cache.')
+            self.file_path = file_path
+            return file_path
+        out = self.cache.out_template
+        with YoutubeDL(self.__download_format(out)) as ydl:
+            file_path = await yt_download(
+                ydl, self.data, self.logger, self.webpage_url, self.run
+            )
+        if key:
+            self.cache.add(key, file_path)
+        self.file_path = file_path
+        return file_path
+
+    def __download_format(self, out: str) -> dict:
+        """
+        :param out: the youtube-dl output template.
+        :return: the youtube-dl options for downloading.
+        """
+        res = get_ytdl_format(out)
+        if self.progress_hook:
+            res['progress_hooks'] = [self.progress_hook]
+        return res
+
     async def __fetch_url(self, ydl: YoutubeDL) -> str:
         """
         Helper method to fetch a stream url.
         :param ydl: the `YoutubeDL` instance.
         :return: the stream url.
+        :raises DownloadError: if youtube-dl didn't find a stream url.
         """
-        data = await fetch_ytdl_info(ydl, self.webpage_url)
-        if 'entries' in data:
-            data = data['entries'][0]
-        url = data['url']
-        del data
+        data = await fetch_video_info(
+            ydl, self.webpage_url, self.info_cache, self.run
+        )
+        url = data.get('url') if data else None
+        if not url:
+            raise DownloadError(f'No stream found for {self.webpage_url}')
         return url
 
+    @property
+    def local(self) -> bool:
+        """
+        See `AbstractSource.local`
+        """
+        return self.file_path is not None and not self.delete_after
+
     def __str__(self):
         return f'{self.title}\tRequested by {self.requester}'
 
-    def clean_up(self):
+    def release(self):
         """
-        Cleanup function for when the audio is finished playing.
+        See `AbstractSource.release`
         """
         if self.delete_after and self.file_path is not None:
             try:
@@ -136,8 +213,23 @@ class YTDLSource(AbstractSource):
                 self.logger.warn(f'File {self.file_path} not deleted.\n{e}')
             else:
                 self.logger.info(f'File {self.file_path} deleted.')
+        if self.cache_key is not None:
+            self.cache.release(self.cache_key)
+        self.file_path = None
+        self.cache_key = None
+
+    def clean_up(self):
+        """
+        Cleanup function for when the audio is finished playing.
+        """
+        self.release()
         del self.file_path
+        del self.cache_key
         del self.requester
         del self.webpage_url
         del self.need_download
         del self.data
+        del self.cache
+        del self.info_cache
+        del self.run
+        del self.progress_hook
@@ -4,7 +4,7 @@ from data import data_path
 
 
 def clean(include=None):
-    names = ('logs', 'dumps', 'music_cache')
+    names = ('logs', 'dumps', 'music_cache', 'opus_cache')
     if include:
         for name in include:
             assert name in names
@@ -1,7 +1,8 @@
 import re
-from collections import Iterable
+from collections.abc import Iterable
 from datetime import date, timedelta
 from itertools import chain, zip_longest
+from sys import getsizeof
 from textwrap import wrap
 from typing import List, Type, Union
 
@@ -149,3 +150,28 @@ def combine_objects(*args):
             combine_objects(*args[:mid]),
             combine_objects(*args[mid:])
         )
+
+
+def deep_sizeof(obj) -> int:
+    """
+    Estimate the memory usage of an object and everything it contains.
+    Only containers, strings and numbers are followed.
+    :param obj: the object.
+    :return: the estimated memory usage in bytes.
+    >>> deep_sizeof({'a': [1, 2]}) > deep_sizeof({})
+    True
+    """
+    seen = set()
+
+    def size(o):
+        if id(o) in seen:
+            return 0
+        seen.add(id(o))
+        res = getsizeof(o)
+        if isinstance(o, dict):
+            res += sum(size(k) + size(v) for k, v in o.items())
+        elif isinstance(o, (list, tuple, set, frozenset)):
+            res += sum(size(i) for i in o)
+        return res
+
+    return size(obj)
@@ -0,0 +1,14 @@
+from asyncio import new_event_loop, set_event_loop
+
+from pytest import fixture
+
+
+@fixture
+def loop():
+    """
+    A new event loop for each test, closed after the test.
+    """
+    loop = new_event_loop()
+    set_event_loop(loop)
+    yield loop
+    loop.close()
@@ -0,0 +1,72 @@
+from asyncio import Event, sleep
+from logging import getLogger
+
+from music.abstract_music_player import AbstractMusicPlayer
+from music.abstract_source import AbstractSource
+from music.entry import Entry
+
+
+class FakeSource(AbstractSource):
+    """
+    A fake audio source that resolves once it's released.
+    """
+    __slots__ = ('name', 'ready', 'resolves', 'releases')
+
+    def __init__(self, name):
+        super().__init__(lambda: name)
+        self.name = name
+        self.ready = Event()
+        self.resolves = 0
+        self.releases = 0
+
+    def __str__(self):
+        return self.name
+
+    async def true_name(self):
+        self.resolves += 1
+        await self.ready.wait()
+        return self.name
+
+    def release(self):
+        self.releases += 1
+
+    def clean_up(self):
+        pass
+
+
+def test_prefetch_window(loop):
+    """
+    Test AbstractMusicPlayer.prefetch resolves the entries in the window,
+    and cancels and releases the entries leaving it
+    """
+    player = AbstractMusicPlayer(getLogger(), None, lookahead=2)
+    sources = [FakeSource(str(i)) for i in range(4)]
+    player.entry_queue.extend(Entry('someone', s) for s in sources)
+    entries = player.lst
+
+    async def run():
+        player.prefetch()
+        await sleep(0)
+        assert [s.resolves for s in sources] == [1, 1, 0, 0]
+        sources[0].ready.set()
+        await sleep(0)
+        assert [e.prefetched for e in entries] == [True, False, False, False]
+        resolving = entries[1].resolving
+        player.lookahead = 1
+        player.prefetch()
+        await sleep(0)
+        assert resolving.cancelled()
+        assert entries[1].resolving is None
+        assert [s.releases for s in sources] == [0, 1, 0, 0]
+        assert entries[0].prefetched
+        player.lookahead = 2
+        player.entry_queue.popleft()
+        player.prefetch()
+        sources[1].ready.set()
+        await sleep(0)
+        assert [s.resolves for s in sources] == [1, 2, 1, 0]
+        assert entries[1].prefetched and not entries[2].prefetched
+        for entry in entries:
+            entry.cancel_prefetch()
+
+    loop.run_until_complete(run())
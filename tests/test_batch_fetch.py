@@ -0,0 +1,136 @@
+from asyncio import sleep
+from logging import getLogger
+from types import SimpleNamespace
+
+from wowspy import Region
+
+from world_of_warships.batch_fetch import MAX_IDS_PER_CALL, chunks, \
+    fetch_summaries, gather_limited
+from world_of_warships.wows_manager import WowsManager
+
+
+class FakeApi:
+    """
+    A fake WowsAsync that records the size of each player request.
+    """
+    def __init__(self, battles, hidden=(), fail=()):
+        """
+        :param battles: a dict of {player_id: battle count}
+        :param hidden: ids of players with hidden profiles.
+        :param fail: ids of players whose requests fail.
+        """
+        self.battles = battles
+        self.hidden = set(hidden)
+        self.fail = set(fail)
+        self.requests = []
+
+    async def player_personal_data(self, region, ids, language, fields):
+        self.requests.append(len(ids))
+        await sleep(0)
+        if self.fail.intersection(ids):
+            raise ValueError('request failed')
+        data = {}
+        for id_ in ids:
+            if id_ in self.hidden:
+                data[str(id_)] = {'hidden_profile': True, 'nickname': None}
+                continue
+            data[str(id_)] = {
+                'hidden_profile': False,
+                'nickname': f'player{id_}',
+                'statistics': {'pvp': {'battles': self.battles[id_]}}
+            }
+        return {'data': data}
+
+
+class ClanPlayer:
+    """
+    A fake Player that records ship stats fetches.
+    """
+    region = Region.NA
+    recent_stats = {}
+    nick = clan = None
+
+    def __init__(self, player_id, ship_stats):
+        self.player_id = player_id
+        self.ship_stats = ship_stats
+        self.stats = {'battles': 10}
+        self.hidden = False
+        self.fetched = False
+
+    async def fetch_ship_stats(self, wows_api):
+        self.fetched = True
+        return SimpleNamespace(nbytes=8)
+
+
+def test_chunks():
+    """
+    Test chunks keeps the order and size of the chunks
+    """
+    assert chunks([], 3) == []
+    assert chunks(list(range(7)), 3) == [[0, 1, 2], [3, 4, 5], [6]]
+    assert chunks(list(range(6)), 6) == [list(range(6))]
+
+
+def test_gather_limited(loop):
+    """
+    Test gather_limited never runs more than `limit` coroutines at once,
+    and at least one
+    """
+    running = []
+    peak = []
+
+    async def job(i):
+        running.append(i)
+        peak.append(len(running))
+        await sleep(0)
+        running.remove(i)
+        return i
+
+    jobs = (job(i) for i in range(20))
+    res = loop.run_until_complete(gather_limited(jobs, 3))
+    assert res == list(range(20))
+    assert max(peak) == 3
+    peak.clear()
+    jobs = (job(i) for i in range(5))
+    res = loop.run_until_complete(gather_limited(jobs, 0))
+    assert res == list(range(5))
+    assert max(peak) == 1
+
+
+def test_fetch_summaries(loop):
+    """
+    Test fetch_summaries requests at most `MAX_IDS_PER_CALL` players at
+    once and leaves out players in failed requests
+    """
+    api = FakeApi({i: 10 for i in range(250)}, hidden={3}, fail={240})
+    res = loop.run_until_complete(fetch_summaries(
+        api, Region.NA, list(range(250)), getLogger(), 500, 2
+    ))
+    assert api.requests == [MAX_IDS_PER_CALL, MAX_IDS_PER_CALL, 50]
+    assert len(res) == 200
+    assert res['3'].hidden and res['3'].battles is None
+    assert res['0'] == (False, 'player0', 10)
+    assert '240' not in res
+
+
+def test_get_clan_players(loop):
+    """
+    Test WowsManager.get_clan_players only fetches ship stats of members
+    without them or whose battle count changed
+    """
+    api = FakeApi({i: 10 if i < 200 else 11 for i in range(250)}, hidden={5})
+    manager = WowsManager(api, getLogger())
+    players = [
+        ClanPlayer(str(i), SimpleNamespace(nbytes=8) if i % 2 else None)
+        for i in range(250)
+    ]
+    for player in players:
+        manager.players.put((Region.NA, player.player_id), player)
+    res = loop.run_until_complete(
+        manager.get_clan_players(Region.NA, list(range(250)))
+    )
+    assert api.requests == [MAX_IDS_PER_CALL, MAX_IDS_PER_CALL, 50]
+    fetched = {int(p.player_id) for p in players if p.fetched}
+    assert fetched == {i for i in range(250) if i % 2 == 0 or i >= 200}
+    assert players[5].hidden and players[5] not in res
+    assert len(res) == 249
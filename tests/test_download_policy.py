@@ -0,0 +1,71 @@
+from logging import getLogger
+from pathlib import Path
+
+from music.download_policy import DownloadPolicy, estimate_size
+from music.music_cache import MusicCache
+from music.ytdl_pool import YTDLPool
+
+
+def video(id_, duration, abr=128):
+    """
+    Generate a youtube-dl info dict.
+    """
+    return {
+        'id': id_, 'extractor_key': 'Youtube', 'duration': duration,
+        'abr': abr, 'webpage_url': f'https://www.youtube.com/watch?v={id_}'
+    }
+
+
+def policy(tmpdir, pool=None):
+    cache = MusicCache(Path(str(tmpdir)), 2 ** 30, getLogger())
+    return DownloadPolicy(cache, pool, getLogger()), cache
+
+
+def test_estimate_size():
+    """
+    Test estimate_size prefers the reported file size
+    """
+    assert estimate_size({'duration': 100, 'abr': 128}) == 1600000
+    assert estimate_size({'duration': 100, 'filesize': 5}) == 5
+
+
+def test_decisions(tmpdir):
+    """
+    Test DownloadPolicy keeps short and popular videos, and discards
+    long ones
+    """
+    p, _ = policy(tmpdir)
+    assert p.decide(video('short', 300)) == (True, False)
+    assert p.decide(video('long', 1200)) == (True, True)
+    assert p.decide(video('long', 1200)) == (True, False)
+    assert p.stats['keep popular'] == 1
+    assert p.stats['discard long'] == 1
+
+
+def test_cached(tmpdir):
+    """
+    Test DownloadPolicy keeps cached videos
+    """
+    p, cache = policy(tmpdir)
+    file = Path(str(tmpdir)).joinpath('youtube-a.m4a')
+    file.write_bytes(b'\0')
+    cache.add('youtube-a', str(file))
+    assert p.decide(video('a', 3 * 60 * 60)) == (True, False)
+    assert p.stats['keep cached'] == 1
+
+
+def test_stream(tmpdir):
+    """
+    Test DownloadPolicy streams when downloads would be slow or are busy
+    """
+    pool = YTDLPool(max_downloads=1)
+    p, _ = policy(tmpdir, pool)
+    p.bandwidth = 1000
+    assert p.decide(video('a', 300)) == (False, True)
+    assert p.stats['stream slow'] == 1
+    p.progress_hook(
+        {'status': 'finished', 'total_bytes': 10 ** 9, 'elapsed': 1}
+    )
+    pool.downloads = 1
+    assert p.decide(video('b', 300)) == (False, True)
+    assert p.stats['stream busy'] == 1
@@ -0,0 +1,37 @@
+from discord import Embed
+
+from world_of_warships.embed_cache import EmbedCache
+
+
+def test_version():
+    """
+    Test EmbedCache only returns embeds of the same version
+    """
+    cache = EmbedCache(2)
+    embed = Embed(title='foo')
+    assert cache.get('a', 1) is None
+    cache.put('a', 1, embed)
+    assert cache.get('a', 1) is embed
+    assert cache.get('a', 2) is None
+    cache.put('a', 2, Embed())
+    assert cache.get('a', 1) is None
+    assert cache.stats['hits'] == 1
+    assert cache.stats['misses'] == 3
+
+
+def test_eviction_and_invalidation():
+    """
+    Test EmbedCache LRU eviction and invalidation hooks
+    """
+    cache = EmbedCache(2)
+    for key in 'abc':
+        cache.put(key, 0, Embed(title=key))
+    assert cache.get('a', 0) is None
+    assert cache.get('b', 0).title == 'b'
+    cache.invalidate('b')
+    cache.invalidate('missing')
+    assert cache.get('b', 0) is None
+    assert len(cache) == 1
+    cache.clear()
+    assert len(cache) == 0
+    assert cache.stats['invalidations'] == 2
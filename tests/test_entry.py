@@ -0,0 +1,61 @@
+from asyncio import Event, sleep, wait_for
+from logging import getLogger
+from types import SimpleNamespace
+
+import music.entry
+from music.entry import Entry
+from music.file_source import FileSource
+from music.music_metrics import MusicMetrics
+
+
+class SlowOpusCache:
+    """
+    A fake OpusCache that never finishes encoding.
+    """
+    logger = getLogger()
+
+    def __init__(self):
+        self.started = []
+        self.release = Event()
+
+    def get(self, file_path):
+        return None
+
+    async def encode(self, file_path):
+        self.started.append(file_path)
+        await self.release.wait()
+        return file_path + '.ogg'
+
+
+class FakeVoiceClient:
+    def __init__(self):
+        self.played = []
+
+    def play(self, src, after=None):
+        self.played.append(src)
+
+
+def test_play_does_not_wait_for_encoding(loop, monkeypatch):
+    """
+    Test Entry.play falls back to FFmpeg while the Opus encoding runs
+    """
+    monkeypatch.setattr(music.entry, 'FFmpegPCMAudio', lambda n, **_: n)
+    cache = SlowOpusCache()
+    voice_client = FakeVoiceClient()
+    ctx = SimpleNamespace(
+        bot=SimpleNamespace(music_metrics=MusicMetrics(), logger=getLogger()),
+        guild=SimpleNamespace(id=1),
+        voice_client=voice_client
+    )
+    entry = Entry('someone', FileSource('song.mp3', ('song',) * 5), cache)
+
+    async def run():
+        entry.prefetch()
+        await sleep(0)
+        assert await wait_for(entry.play(ctx, None, None), 1)
+        assert cache.started == ['song.mp3']
+        assert not entry.encoding.done()
+        entry.cancel_prefetch()
+
+    loop.run_until_complete(run())
+    assert voice_client.played == ['song.mp3']
@@ -0,0 +1,33 @@
+from logging import getLogger
+from os import utime
+from pathlib import Path
+
+from music.file_index import FileIndex
+
+
+def test_incremental_scan(tmpdir):
+    """
+    Test FileIndex only parses new and changed files
+    """
+    root = Path(str(tmpdir))
+    music = root.joinpath('music')
+    music.mkdir()
+    for name in ('a.ogg', 'b.ogg'):
+        music.joinpath(name).write_bytes(b'\0')
+    index = FileIndex(root.joinpath('index.db'), getLogger())
+
+    first = dict(index.scan(music))
+    assert first[str(music / 'a.ogg')] == ('a.ogg', None, None, None, None)
+    assert index.stats == {'parsed': 2, 'reused': 0}
+
+    music.joinpath('b.ogg').write_bytes(b'\0\0')
+    music.joinpath('c.ogg').write_bytes(b'\0')
+    music.joinpath('a.ogg').unlink()
+    second = dict(index.scan(music))
+    assert sorted(Path(f).name for f in second) == ['b.ogg', 'c.ogg']
+    assert index.stats == {'parsed': 4, 'reused': 0}
+
+    utime(str(music / 'c.ogg'), (0, 0))
+    index.scan(music)
+    assert index.stats['reused'] == 1
+    assert index.stats['parsed'] == 5
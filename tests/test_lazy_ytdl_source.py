@@ -0,0 +1,83 @@
+from pytest import raises
+
+from music.lazy_ytdl_source import LazyYTDLSource
+from music.music_util import fetch_playlist, flat_url
+
+
+class FakeSource:
+    """
+    A fake YTDLSource.
+    """
+    detail = 'full detail'
+
+    def __init__(self):
+        self.cleaned = False
+
+    async def true_name(self):
+        return 'stream url'
+
+    def clean_up(self):
+        self.cleaned = True
+
+
+def test_flat_url():
+    """
+    Test flat_url builds youtube urls from bare ids
+    """
+    data = {'_type': 'url', 'ie_key': 'Youtube', 'id': 'aB', 'url': 'aB'}
+    assert flat_url(data) == 'https://www.youtube.com/watch?v=aB'
+    assert flat_url({'url': 'https://a.b/c'}) == 'https://a.b/c'
+
+
+def test_fetch_playlist_params(loop):
+    """
+    Test fetch_playlist keeps noplaylist so video urls in a playlist are
+    fetched as the video
+    """
+    params = []
+
+    async def run(func):
+        params.append(func.func.__self__.params)
+        return {}
+
+    loop.run_until_complete(fetch_playlist('https://a.b/c', 11, 500, run))
+    assert params[0]['noplaylist'] is True
+    assert params[0]['extract_flat'] == 'in_playlist'
+    assert (params[0]['playliststart'], params[0]['playlistend']) == (11, 500)
+
+
+def test_resolve(loop):
+    """
+    Test LazyYTDLSource only fetches the video data once it's played
+    """
+    resolved = []
+    fake = FakeSource()
+
+    async def resolve(url):
+        resolved.append(url)
+        return fake
+
+    source = LazyYTDLSource(
+        {'ie_key': 'Youtube', 'id': 'aB', 'url': 'aB', 'title': 'Song'},
+        'someone', resolve
+    )
+    assert 'Song' in source.detail
+    assert not resolved
+    assert loop.run_until_complete(source.true_name()) == 'stream url'
+    assert loop.run_until_complete(source.true_name()) == 'stream url'
+    assert resolved == ['https://www.youtube.com/watch?v=aB']
+    assert source.detail == 'full detail'
+    source.clean_up()
+    assert fake.cleaned
+
+
+def test_unplayable(loop):
+    """
+    Test LazyYTDLSource raises ValueError if the entry can't be played
+    """
+    async def resolve(url):
+        return None
+
+    source = LazyYTDLSource({'url': 'https://a.b/c'}, 'someone', resolve)
+    with raises(ValueError):
+        loop.run_until_complete(source.true_name())
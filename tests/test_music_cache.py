@@ -0,0 +1,84 @@
+from logging import getLogger
+from pathlib import Path
+
+from pytest import fixture
+
+from music.music_cache import MusicCache
+
+
+@fixture(scope='function')
+def path(tmpdir):
+    return Path(str(tmpdir))
+
+
+def write(path: Path, name: str, size: int) -> str:
+    """
+    Write a file of a given size.
+    :return: the file path.
+    """
+    file = path.joinpath(name)
+    file.write_bytes(b'\0' * size)
+    return str(file)
+
+
+def test_lru_eviction(path):
+    """
+    Test MusicCache evicts the least recently used files over the budget
+    """
+    cache = MusicCache(path, 250, getLogger())
+    assert MusicCache.key({'extractor_key': 'Youtube', 'id': 'a'}) == \
+        'youtube-a'
+    assert MusicCache.key({'id': 'a'}) is None
+    for key in 'abc':
+        cache.add(key, write(path, f'{key}.m4a', 100))
+    assert cache.get('a') is None
+    assert not path.joinpath('a.m4a').exists()
+    assert cache.get('b')
+    cache.add('d', write(path, 'd.m4a', 100))
+    assert cache.get('c') is None
+    assert cache.get('b') and cache.get('d')
+    assert cache.stats['bytes'] == 200
+    assert cache.stats['evictions'] == 2
+
+
+def test_persistence(path):
+    """
+    Test MusicCache keeps files across restarts and syncs with the disk
+    """
+    cache = MusicCache(path, 1000, getLogger())
+    cache.add('a', write(path, 'a.m4a', 100))
+    cache.add('b', write(path, 'b.m4a', 100))
+    cache.connection.close()
+    path.joinpath('b.m4a').unlink()
+    write(path, 'untracked.m4a', 10)
+    write(path, '.gitkeep', 0)
+    cache = MusicCache(path, 1000, getLogger())
+    assert cache.get('a') == str(path.joinpath('a.m4a'))
+    assert cache.get('b') is None
+    assert not path.joinpath('untracked.m4a').exists()
+    assert path.joinpath('.gitkeep').exists()
+    assert cache.stats['files'] == 1
+
+
+def test_pinned(path):
+    """
+    Test MusicCache doesn't evict pinned files until they're released
+    """
+    cache = MusicCache(path, 250, getLogger())
+    cache.add('a', write(path, 'a.m4a', 100))
+    cache.add('b', write(path, 'b.m4a', 100))
+    cache.pin('a')
+    cache.pin('a')
+    cache.pin('b')
+    cache.add('c', write(path, 'c.m4a', 100))
+    assert cache.get('a') and cache.get('b')
+    assert cache.get('c') is None
+    cache.max_bytes = 100
+    cache.evict()
+    assert cache.stats['bytes'] == 200
+    cache.release('b')
+    assert cache.get('b') is None
+    cache.release('a')
+    assert cache.get('a')
+    cache.release('a')
+    assert cache.stats['pinned'] == 0
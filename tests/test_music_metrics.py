@@ -0,0 +1,48 @@
+from json import dumps
+
+from pytest import raises
+
+from music.music_metrics import Histogram, MusicMetrics
+
+
+def test_histogram():
+    """
+    Test Histogram percentiles are bucket upper bounds capped by the max
+    """
+    hist = Histogram()
+    for seconds in (0.01, 0.2, 0.2, 0.3, 3):
+        hist.observe(seconds)
+    summary = hist.summary()
+    assert summary['count'] == 5
+    assert summary['p50'] == 0.25
+    assert summary['p95'] == 3
+    assert summary['max'] == 3
+    assert hist.to_dict()['buckets']['0.25'] == 2
+
+
+def test_guild_and_global():
+    """
+    Test MusicMetrics records spans and events per guild and globally
+    """
+    metrics = MusicMetrics()
+    metrics.observe(1, 'search', 0.5)
+    metrics.observe(2, 'search', 1.5)
+    with metrics.span(1, 'connect'):
+        pass
+    with raises(ValueError):
+        with metrics.span(1, 'connect'):
+            raise ValueError
+    metrics.count(2, 'YTDLSource', 'skipped')
+
+    spans, counts = metrics.summary(1)
+    assert spans['search']['count'] == 1
+    assert spans['connect']['count'] == 1
+    assert counts == {('connect', 'error'): 1}
+    spans, counts = metrics.summary()
+    assert spans['search']['count'] == 2
+    assert counts[('YTDLSource', 'skipped')] == 1
+
+    export = metrics.export()
+    assert export['all']['spans']['search']['count'] == 2
+    assert export['2']['counters'] == {'YTDLSource.skipped': 1}
+    dumps(export)
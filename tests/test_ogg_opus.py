@@ -0,0 +1,72 @@
+from logging import getLogger
+from os import utime
+from pathlib import Path
+from struct import pack
+
+from pytest import raises
+
+from music.ogg_opus import OggOpusAudio
+from music.opus_cache import OpusCache
+
+
+def page(segments: list, seq: int) -> bytes:
+    """
+    Build an Ogg page, the checksum is left as 0.
+    :param segments: the segment bodies, each at most 255 bytes.
+    :param seq: the page sequence number.
+    """
+    header = pack('<4sBBqIIIB', b'OggS', 0, 0, 0, 1, seq, 0, len(segments))
+    return header + bytes(len(s) for s in segments) + b''.join(segments)
+
+
+def test_packets(tmpdir):
+    """
+    Test OggOpusAudio reads packets split across segments and pages
+    """
+    big = bytes(range(256)) * 2
+    file = Path(str(tmpdir)).joinpath('a.ogg')
+    file.write_bytes(
+        page([b'OpusHead\x01\x02'], 0) + page([b'OpusTags'], 1) +
+        page([b'\xfc\x01', big[:255]], 2) +
+        page([big[255:510], big[510:]], 3)
+    )
+    audio = OggOpusAudio(str(file))
+    assert audio.is_opus()
+    assert audio.read() == b'\xfc\x01'
+    assert audio.read() == big
+    assert audio.read() == b''
+    audio.cleanup()
+
+
+def test_not_opus(tmpdir):
+    """
+    Test OggOpusAudio rejects files that are not Ogg/Opus
+    """
+    file = Path(str(tmpdir)).joinpath('a.mp3')
+    file.write_bytes(b'ID3' + b'\0' * 100)
+    with raises(ValueError):
+        OggOpusAudio(str(file))
+
+
+def test_cache(tmpdir):
+    """
+    Test OpusCache lookups and eviction of the least recently used files
+    """
+    root = Path(str(tmpdir))
+    cache_dir = root.joinpath('opus')
+    cache_dir.mkdir()
+    sources = []
+    for i, name in enumerate('abc'):
+        src = root.joinpath(f'{name}.mp3')
+        src.write_bytes(b'\0')
+        sources.append(str(src))
+        encoded = cache_dir.joinpath(f'{OpusCache.key(str(src))}.ogg')
+        encoded.write_bytes(b'\0' * 100)
+        utime(str(encoded), (i, i))
+    cache = OpusCache(cache_dir, 250, getLogger())
+    assert OpusCache.key(str(root / 'missing.mp3')) is None
+    assert cache.get(sources[0]) is not None
+    cache.evict()
+    assert cache.get(sources[0]) is not None
+    assert cache.get(sources[1]) is None
+    assert cache.stats['files'] == 2
@@ -0,0 +1,72 @@
+from pytest import fixture
+
+from world_of_warships.player_cache import PlayerCache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self):
+        return self.now
+
+
+@fixture(scope='function')
+def clock():
+    return Clock()
+
+
+def test_lru_eviction(clock):
+    """
+    Test PlayerCache evicts the least recently used entry
+    """
+    cache = PlayerCache(3, 100, clock=clock)
+    for i in range(3):
+        cache.put(i, str(i))
+    assert cache.get(0) == '0'
+    cache.put(3, '3')
+    assert 1 not in cache
+    assert [cache.get(i) for i in (0, 2, 3)] == ['0', '2', '3']
+    assert cache.get(1) is None
+    assert cache.stats['evictions'] == 1
+    assert cache.stats['hits'] == 4
+    assert cache.stats['misses'] == 1
+    assert len(cache) == 3
+
+
+def test_ttl(clock):
+    """
+    Test PlayerCache expires entries after their TTL
+    """
+    cache = PlayerCache(10, 10, clock=clock)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    clock.now = 5
+    cache.mark_fresh('b')
+    clock.now = 11
+    assert cache.get('a') is None
+    assert cache.get('b') == 2
+    clock.now = 16
+    cache.purge_expired()
+    assert len(cache) == 0
+    assert cache.expirations == 2
+
+
+def test_memory_budget(clock):
+    """
+    Test PlayerCache stays within the memory budget
+    """
+    cache = PlayerCache(100, 100, 10, len, clock=clock)
+    cache.put('a', 'xxxx')
+    cache.put('b', 'xxxx')
+    assert cache.total_bytes == 8
+    cache.put('c', 'xxxx')
+    assert 'a' not in cache
+    assert cache.total_bytes == 8
+    assert cache.pop('b') == 'xxxx'
+    assert cache.total_bytes == 4
+    cache.put('d', 'x' * 20)
+    stats = cache.stats
+    assert stats['size'] == 1
+    assert stats['max_size'] == 100
+    assert stats['bytes'] == 20
@@ -0,0 +1,98 @@
+from asyncio import TimeoutError, gather
+
+from pytest import approx, raises
+from wowspy import Region
+
+from world_of_warships.rate_limiter import BACKGROUND, INTERACTIVE, \
+    RateLimitedWows, RateLimiter, TokenBucket
+
+
+class FakeApi:
+    """
+    A fake WowsAsync that records calls and rejects the first few.
+    """
+
+    def __init__(self, rejects=0):
+        self.calls = []
+        self.rejects = rejects
+
+    async def players(self, region, search):
+        self.calls.append((region, search))
+        if self.rejects:
+            self.rejects -= 1
+            return {'status': 'error',
+                    'error': {'message': 'REQUEST_LIMIT_EXCEEDED'}}
+        return {'status': 'ok', 'data': search}
+
+
+def test_token_bucket():
+    """
+    Test TokenBucket refill and delay
+    """
+    now = [0]
+    bucket = TokenBucket(2, 2, lambda: now[0])
+    for _ in range(2):
+        assert bucket.delay() == 0
+        bucket.take()
+    assert bucket.delay() == approx(0.5)
+    now[0] = 0.25
+    assert bucket.delay() == approx(0.25)
+    now[0] = 10
+    assert bucket.delay() == 0
+    assert bucket.tokens == 2
+
+
+def test_priority(loop):
+    """
+    Test RateLimiter serves interactive requests before background ones
+    """
+    limiter = RateLimiter(50, 1)
+    order = []
+
+    async def request(priority, name):
+        await limiter.acquire(Region.NA, priority)
+        order.append(name)
+
+    async def run():
+        await limiter.acquire(Region.NA)
+        await gather(
+            request(BACKGROUND, 'b0'), request(BACKGROUND, 'b1'),
+            request(INTERACTIVE, 'i0'), request(INTERACTIVE, 'i1')
+        )
+
+    loop.run_until_complete(run())
+    assert order == ['i0', 'i1', 'b0', 'b1']
+    assert limiter.queued(Region.NA) == 0
+    assert not limiter.workers
+
+
+def test_timeout(loop):
+    """
+    Test RateLimiter raises TimeoutError after the deadline and keeps
+    serving other requests
+    """
+    limiter = RateLimiter(5, 1)
+
+    async def run():
+        await limiter.acquire(Region.EU)
+        with raises(TimeoutError):
+            await limiter.acquire(Region.EU, timeout=0.01)
+        await limiter.acquire(Region.NA, timeout=0.01)
+        await limiter.acquire(Region.EU, timeout=1)
+
+    loop.run_until_complete(run())
+
+
+def test_retry(loop):
+    """
+    Test RateLimitedWows retries calls over the request limit
+    """
+    api = FakeApi(rejects=1)
+    wows = RateLimitedWows(api, RateLimiter(100), retries=1)
+    res = loop.run_until_complete(wows.players(Region.NA, 'foo'))
+    assert res == {'status': 'ok', 'data': 'foo'}
+    assert len(api.calls) == 2
+    background = wows.view(BACKGROUND, 5)
+    assert background.limiter is wows.limiter
+    loop.run_until_complete(background.players(region=Region.AS, search='a'))
+    assert api.calls[-1] == (Region.AS, 'a')
@@ -0,0 +1,83 @@
+from logging import getLogger
+from sqlite3 import connect
+from time import time
+from types import SimpleNamespace
+
+from wowspy import Region
+
+import world_of_warships.shell_handler as shell_handler
+from data_manager import WowsStore
+from world_of_warships.shell_handler import LOOKUP_TTL, \
+    NEGATIVE_LOOKUP_TTL, cached_clan_id, cached_player_id
+
+
+def fake_bot():
+    store = WowsStore(connect(':memory:'))
+    return SimpleNamespace(
+        wows_manager=SimpleNamespace(store=store), wows_api=None,
+        logger=getLogger()
+    )
+
+
+def fake_fetch(ids: dict, calls: list):
+    """
+    Generate a fake `war_gaming.get_player_id` that records its calls.
+    :param ids: a dict of {name: id}
+    :param calls: the list to record the names looked up in.
+    """
+    async def fetch(region, wows_api, logger, name):
+        calls.append(name)
+        return ids.get(name)
+
+    return fetch
+
+
+def test_cached_id(loop, monkeypatch):
+    """
+    Test cached_player_id caches ids until LOOKUP_TTL
+    """
+    calls = []
+    monkeypatch.setattr(shell_handler, 'gpid', fake_fetch({'Foo': 1}, calls))
+    bot = fake_bot()
+    now = time()
+    monkeypatch.setattr(shell_handler, 'time', lambda: now)
+    assert loop.run_until_complete(cached_player_id(bot, Region.NA, 'Foo'))\
+        == 1
+    assert loop.run_until_complete(cached_player_id(bot, Region.NA, 'foo'))\
+        == 1
+    assert calls == ['Foo']
+    monkeypatch.setattr(shell_handler, 'time', lambda: now + LOOKUP_TTL)
+    assert loop.run_until_complete(cached_player_id(bot, Region.NA, 'Foo'))\
+        == 1
+    assert calls == ['Foo', 'Foo']
+
+
+def test_negative_cached_id(loop, monkeypatch):
+    """
+    Test cached_clan_id caches names without a match until
+    NEGATIVE_LOOKUP_TTL, and keeps players and clans apart
+    """
+    calls = []
+    ids = {}
+    monkeypatch.setattr(shell_handler, 'gcid', fake_fetch(ids, calls))
+    monkeypatch.setattr(shell_handler, 'gpid', fake_fetch({'bar': 3}, []))
+    bot = fake_bot()
+    now = time()
+    monkeypatch.setattr(shell_handler, 'time', lambda: now)
+    for _ in range(2):
+        assert loop.run_until_complete(
+            cached_clan_id(bot, Region.NA, 'bar')
+        ) is None
+    assert calls == ['bar']
+    assert loop.run_until_complete(cached_player_id(bot, Region.NA, 'bar'))\
+        == 3
+    ids['bar'] = 2
+    monkeypatch.setattr(
+        shell_handler, 'time', lambda: now + NEGATIVE_LOOKUP_TTL
+    )
+    assert loop.run_until_complete(cached_clan_id(bot, Region.NA, 'bar'))\
+        == 2
+    assert calls == ['bar', 'bar']
+    assert loop.run_until_complete(cached_clan_id(bot, Region.EU, 'bar'))\
+        == 2
+    assert calls == ['bar', 'bar', 'bar']
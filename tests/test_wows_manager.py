@@ -0,0 +1,154 @@
+from asyncio import Event, sleep
+from logging import getLogger
+from sqlite3 import connect
+from types import SimpleNamespace
+
+from wowspy import Region
+
+from data_manager import WowsStore
+from scripts.helpers import get_date
+from world_of_warships.player_cache import PlayerCache
+from world_of_warships.wows_manager import WowsManager
+
+
+class FakePlayer:
+    """
+    A fake Player that records its updates.
+    """
+    region = Region.NA
+    player_id = '1'
+    hidden = False
+    ship_stats = None
+    recent_stats = {}
+    nick = clan = None
+
+    def __init__(self):
+        self.updates = []
+        self.release = Event()
+        self.daily_stats = None
+        self.stats = {}
+
+    @property
+    def version(self):
+        return self.stats.get('battles'),
+
+    def get_embed(self):
+        return self
+
+    async def update(self, wows_api, wtr_table, update_ships, history=None):
+        self.updates.append(update_ships)
+        await self.release.wait()
+        self.stats = {'battles': len(self.updates)}
+        return False
+
+
+def test_refresh_ships_follow_up(loop):
+    """
+    Test WowsManager.refresh updates ship stats after joining an in-flight
+    update that doesn't
+    """
+    manager = WowsManager(SimpleNamespace(), getLogger())
+    manager.wtr_tables = {Region.NA: None}
+    player = FakePlayer()
+
+    async def run():
+        background = loop.create_task(manager.refresh(player, False, True))
+        await sleep(0)
+        same = loop.create_task(manager.refresh(player, False))
+        ships = loop.create_task(manager.refresh(player, True))
+        await sleep(0)
+        assert player.updates == [False]
+        player.release.set()
+        await background
+        await same
+        await ships
+
+    loop.run_until_complete(run())
+    assert player.updates == [False, True]
+    assert not manager.inflight
+
+
+def test_join_after_eviction(loop):
+    """
+    Test WowsManager.player_embed uses the updated player when it joins an
+    update whose player was evicted from the cache
+    """
+    manager = WowsManager(SimpleNamespace(), getLogger())
+    manager.wtr_tables = {Region.NA: None}
+    player = FakePlayer()
+    key = (Region.NA, '1')
+    manager.players.put(key, player)
+
+    async def run():
+        first = loop.create_task(manager.player_embed(Region.NA, 1))
+        await sleep(0)
+        manager.players.pop(key)
+        joined = loop.create_task(manager.player_embed(Region.NA, 1))
+        await sleep(0)
+        assert manager.players.get(key) is not player
+        player.release.set()
+        return await first, await joined
+
+    assert loop.run_until_complete(run()) == (player, player)
+    assert player.updates == [True]
+    assert manager.players.get(key) is player
+    assert manager.embeds.get(('player', Region.NA, '1'), (1,)) is player
+
+
+def test_save_invalidates_embed():
+    """
+    Test WowsManager.save_player drops the cached embed of the player
+    """
+    manager = WowsManager(SimpleNamespace(), getLogger())
+    player = FakePlayer()
+    key = ('player', Region.NA, '1')
+    manager.embeds.put(key, player.version, player)
+    manager.save_player(player)
+    assert manager.embeds.get(key, player.version) is None
+    assert manager.embeds.stats['invalidations'] == 1
+
+
+def test_prune_daily_stats(loop):
+    """
+    Test WowsManager prunes old daily stats on the first save of each day
+    """
+    store = WowsStore(connect(':memory:'))
+    manager = WowsManager(SimpleNamespace(), getLogger(), store=store)
+    manager.wtr_tables = {Region.NA: None}
+    player = FakePlayer()
+    player.release.set()
+    stats = {'battles': 10, 'wins': 5, 'frags': 7, 'damage_dealt': 9000}
+    for _ in range(2):
+        store.add_daily_stats('NA', '2', {'20000101': stats})
+        player.daily_stats = {get_date(0): stats}
+        loop.run_until_complete(manager.refresh(player, False))
+    assert list(store.get_daily_stats('NA', '1', '0')) == [get_date(0)]
+    assert list(store.get_daily_stats('NA', '2', '0')) == ['20000101']
+
+
+def test_refresh_purges_players(loop, monkeypatch):
+    """
+    Test the WowsManager refresh loop purges expired players
+    """
+    now = [0]
+    manager = WowsManager(SimpleNamespace(), getLogger())
+    manager.players = PlayerCache(10, 100, clock=lambda: now[0])
+    refreshed = Event()
+
+    async def update_data(self, session_manager):
+        refreshed.set()
+
+    monkeypatch.setattr(WowsManager, 'update_data', update_data)
+    manager.players.put('old', FakePlayer())
+    now[0] = 50
+    manager.players.put('new', FakePlayer())
+    now[0] = 101
+
+    async def run():
+        manager.schedule_refresh(None, 0)
+        await refreshed.wait()
+        manager.refresh_task.cancel()
+
+    loop.run_until_complete(run())
+    assert 'old' not in manager.players and 'new' in manager.players
+    assert manager.players.stats['expirations'] == 1
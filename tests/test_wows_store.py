@@ -0,0 +1,149 @@
+from random import randint
+from sqlite3 import connect
+
+from pytest import fixture
+
+from data_manager import WowsStore
+from world_of_warships.ship_stats import ShipStats
+from tests import *
+
+
+@fixture(scope='function')
+def store():
+    return WowsStore(connect(':memory:'))
+
+
+def random_player():
+    """
+    Generate random player data.
+    :return: a dict of random player data.
+    """
+    battles = randint(1, 10000)
+    return {
+        'nick': random_strs(1)[0],
+        'clan': random_strs(1)[0],
+        'hidden': False,
+        'wtr': randint(0, 3000),
+        'stats': {'battles': battles, 'main_battery': {'hits': 1}},
+        'recent_stats': {'battles': randint(0, battles)},
+        'recent_date': '20171201',
+        'ship_stats': ShipStats.from_dict({
+            randint(1, 2 ** 40): {'battles': randint(0, battles)}
+            for _ in range(5)
+        }).to_bytes()
+    }
+
+
+def test_player(store: WowsStore):
+    """
+    Test player methods in WowsStore
+    """
+    assert store.get_player('NA', '1') is None
+    expected = {}
+    for region in ('NA', 'EU', 'AS', 'RU'):
+        for id_ in random_strs(10):
+            player = random_player()
+            store.set_player(region, id_, **player)
+            expected[(region, id_)] = player
+    for (region, id_), player in expected.items():
+        res = store.get_player(region, id_)
+        assert res.pop('updated_at') > 0
+        assert res == player
+
+
+def test_empty_player(store: WowsStore):
+    """
+    Test saving a player without stats in WowsStore
+    """
+    store.set_player(
+        'NA', '1', nick=None, clan=None, hidden=True, wtr=None, stats={},
+        recent_stats=None, recent_date=None, ship_stats=None
+    )
+    res = store.get_player('NA', '1')
+    assert res['hidden'] is True
+    assert res['stats'] == {}
+    assert res['ship_stats'] is None
+
+
+def test_ship_stats_bytes():
+    """
+    Test ShipStats packed into bytes load back the same
+    """
+    stats = {4000: {'battles': 3, 'main_battery': {'hits': 2, 'shots': 9}}}
+    ship_stats = ShipStats.from_dict(stats)
+    assert ShipStats.load(ship_stats.to_bytes()) == ship_stats
+    assert ShipStats.load(None) is None
+    assert ship_stats.to_dict()[4000]['main_battery'] == \
+        {'hits': 2, 'shots': 9}
+    assert ShipStats.from_bytes(ship_stats.to_bytes()[:-1]) is None
+
+
+def test_lookup(store: WowsStore):
+    """
+    Test name lookup methods in WowsStore
+    """
+    assert store.get_lookup('player', 'NA', 'foo') is None
+    store.set_lookup('player', 'NA', 'Foo', 42)
+    store.set_lookup('clan', 'NA', 'foo', None)
+    id_, updated_at = store.get_lookup('player', 'NA', 'fOO')
+    assert id_ == 42 and updated_at > 0
+    assert store.get_lookup('player', 'EU', 'foo') is None
+    assert store.get_lookup('clan', 'NA', 'FOO')[0] is None
+    store.set_lookup('clan', 'NA', 'FOO', 7)
+    assert store.get_lookup('clan', 'NA', 'foo')[0] == 7
+
+
+def test_daily_stats(store: WowsStore):
+    """
+    Test daily stats methods in WowsStore
+    """
+    assert store.get_daily_stats('NA', '1', '20171201') == {}
+    first = {'battles': 10, 'wins': 5, 'frags': 7, 'damage_dealt': 9000}
+    second = {**first, 'battles': 12, 'xp': 100}
+    store.add_daily_stats('NA', '1', {
+        '20171130': first, '20171201': first, '20171202': {'battles': 1}
+    })
+    store.add_daily_stats('NA', '1', {'20171201': second, '20171203': second})
+    res = store.get_daily_stats('NA', '1', '20171201')
+    assert res == {'20171201': first, '20171203': {**first, 'battles': 12}}
+    assert store.get_daily_stats('EU', '1', '20171101') == {}
+    store.prune_daily_stats('20171202')
+    assert list(store.get_daily_stats('NA', '1', '20171101')) == ['20171203']
+
+
+def test_wtr_history(store: WowsStore):
+    """
+    Test WTR history methods in WowsStore
+    """
+    assert store.get_wtr_history('NA', '1') == []
+    assert store.add_wtr('NA', '1', 20171201, 100, 900)
+    assert not store.add_wtr('NA', '1', 20171202, 100, 950)
+    assert store.add_wtr('NA', '1', 20171203, 110, 950)
+    assert store.add_wtr('NA', '1', 20171203, 120, 1000)
+    assert store.add_wtr('EU', '1', 20171203, 5, 300)
+    assert store.get_wtr_history('NA', '1') == [
+        (20171201, 100, 900), (20171203, 120, 1000)
+    ]
+    assert store.get_wtr_history('NA', '1', 20171202) == [
+        (20171203, 120, 1000)
+    ]
+
+
+def test_leaderboard(store: WowsStore):
+    """
+    Test leaderboard methods in WowsStore
+    """
+    assert store.get_leaderboard('1', 'NA') == []
+    store.set_leaderboards({
+        ('1', 'NA'): [('10', '100', 'foo', 50, 900),
+                      ('11', '101', 'bar', 70, 1200)],
+        ('1', 'EU'): [('10', '200', 'baz', 10, 300)]
+    })
+    res = store.get_leaderboard('1', 'NA')
+    assert [row[:5] for row in res] == [
+        ('11', '101', 'bar', 70, 1200), ('10', '100', 'foo', 50, 900)
+    ]
+    assert all(row[5] > 0 for row in res)
+    store.set_leaderboards({('2', 'NA'): [('10', '100', 'foo', 50, 900)]})
+    assert store.get_leaderboard('1', 'NA') == []
+    assert len(store.get_leaderboard('2', 'NA')) == 1
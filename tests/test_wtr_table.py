@@ -0,0 +1,212 @@
+from json import dumps
+from logging import getLogger
+from pathlib import Path
+from random import choice, randint, random
+
+from pytest import approx, fixture
+from wowspy import Region
+
+from scripts.helpers import combine_objects, try_divide
+from world_of_warships.ship_stats import ShipStats
+from world_of_warships.stats_accumulator import StatsAccumulator
+from world_of_warships.wows_manager import WowsManager
+from world_of_warships.wtr import CONVERT_REGION, calc_wtr
+from world_of_warships.wtr_snapshot import load_snapshot, save_snapshot
+from world_of_warships.wtr_table import WTRTable
+
+COEFFICIENTS = {
+    'ship_frags_importance_weight': 10,
+    'wins_weight': 0.2,
+    'damage_weight': 0.5,
+    'frags_weight': 0.3,
+    'capture_weight': 0.0,
+    'dropped_capture_weight': 0.0,
+    'nominal_rating': 1000
+}
+
+
+def random_expected(amt):
+    """
+    Generate random expected values.
+    :param amt: the amount of ships.
+    :return: a dict of {ship_id: expected values}
+    """
+    res = {}
+    for i in range(amt):
+        ship_id = 4000000000 + i * 32
+        res[str(ship_id)] = {
+            'ship_id': ship_id,
+            'wins': 0.4 + random() / 5,
+            'damage_dealt': randint(10000, 80000),
+            'frags': random(),
+            'planes_killed': choice((0, random() * 5)),
+            'capture_points': random(),
+            'dropped_capture_points': random()
+        }
+    return res
+
+
+def random_stats(ship_ids):
+    """
+    Generate random player ship stats.
+    :param ship_ids: the ship ids to pick from.
+    :return: a dict of {ship_id: stats}
+    """
+    res = {}
+    for ship_id in ship_ids:
+        if random() < 0.5:
+            continue
+        battles = randint(0, 300)
+        res[int(ship_id)] = {
+            'battles': battles,
+            'wins': randint(0, battles),
+            'damage_dealt': randint(0, 100000 * battles),
+            'frags': randint(0, 3 * battles),
+            'planes_killed': randint(0, 10 * battles),
+            'capture_points': randint(0, battles),
+            'dropped_capture_points': randint(0, battles)
+        }
+    return res
+
+
+def reference_wtr(expected, stats, ship_dict):
+    """
+    Calculate WTR one ship at a time with `calc_wtr`
+    """
+    total, total_battles = 0, 0
+    for ship_id, stat in stats.items():
+        exp = expected.get(str(ship_id))
+        battles = stat['battles']
+        if not exp or not battles:
+            continue
+        actual = {key: val / battles for key, val in stat.items()}
+        tier = ship_dict.get(str(ship_id), 7.5)
+        total += calc_wtr(exp, actual, COEFFICIENTS, tier) * battles
+        total_battles += battles
+    return try_divide(total, total_battles)
+
+
+@fixture(scope='module')
+def data():
+    expected = random_expected(100)
+    ids = list(expected) + [str(5000000000 + i) for i in range(10)]
+    ship_dict = {i: randint(1, 10) for i in ids if random() < 0.9}
+    return expected, ship_dict, ids
+
+
+def test_player_wtr(data):
+    """
+    Test WTRTable.player_wtr against calc_wtr
+    """
+    expected, ship_dict, ids = data
+    table = WTRTable(expected, COEFFICIENTS, ship_dict)
+    for _ in range(20):
+        stats = random_stats(ids)
+        res = table.player_wtr(ShipStats.from_dict(stats))
+        assert res == approx(reference_wtr(expected, stats, ship_dict), abs=1)
+    assert table.player_wtr(ShipStats.from_dict({})) == 0
+    assert table.player_wtr(None) == 0
+
+
+def test_clan_wtr(data):
+    """
+    Test WTRTable.wtr on StatsAccumulator rows against calc_wtr on
+    combined stats
+    """
+    expected, ship_dict, ids = data
+    table = WTRTable(expected, COEFFICIENTS, ship_dict)
+    members = [random_stats(ids) for _ in range(30)]
+    combined = combine_objects(*members)
+    acc = StatsAccumulator()
+    for member in members:
+        acc.add(ShipStats.from_dict(member))
+    res = table.wtr(acc.ship_ids, acc.rows)
+    assert res == approx(reference_wtr(expected, combined, ship_dict), abs=1)
+
+
+def test_snapshot(data, tmpdir):
+    """
+    Test WTRTable snapshots give the same results after loading
+    """
+    expected, ship_dict, ids = data
+    tables = {r: WTRTable(expected, COEFFICIENTS, ship_dict) for r in Region}
+    path = Path(str(tmpdir.join('wtr_tables.bin')))
+    save_snapshot(path, tables)
+    loaded = load_snapshot(path)
+    assert set(loaded) == set(Region)
+    stats = ShipStats.from_dict(random_stats(ids))
+    for region in Region:
+        assert loaded[region].coefficients == approx(COEFFICIENTS)
+        assert loaded[region].player_wtr(stats) == \
+            tables[region].player_wtr(stats)
+    with path.open('r+b') as f:
+        f.truncate(path.stat().st_size - 1)
+    assert load_snapshot(path) is None
+    assert load_snapshot(path.with_name('missing')) is None
+
+
+def test_snapshot_invalid(data, tmpdir):
+    """
+    Test load_snapshot rejects snapshots missing a region or with a
+    corrupt header
+    """
+    expected, ship_dict, _ = data
+    table = WTRTable(expected, COEFFICIENTS, ship_dict)
+    path = Path(str(tmpdir.join('wtr_tables.bin')))
+    save_snapshot(path, {Region.NA: table, Region.EU: table})
+    assert load_snapshot(path) is None
+    save_snapshot(path, {r: table for r in Region})
+    content = path.read_bytes()
+    path.write_bytes(b'XWTR' + content[4:])
+    assert load_snapshot(path) is None
+    path.write_bytes(content[:-len(content) // 2])
+    assert load_snapshot(path) is None
+    path.write_bytes(b'')
+    assert load_snapshot(path) is None
+    path.write_bytes(content)
+    assert set(load_snapshot(path)) == set(Region)
+
+
+def test_snapshot_fallback(data, tmpdir):
+    """
+    Test WowsManager.load_tables compiles the json files when the snapshot
+    is missing a region, and replaces the snapshot
+    """
+    expected, ship_dict, _ = data
+    path = Path(str(tmpdir))
+    manager = WowsManager(None, getLogger())
+    manager.snapshot_path = path.joinpath('wtr_tables.bin')
+    manager.e_and_c_path = path.joinpath('expected_and_coeff.json')
+    manager.ship_path = path.joinpath('ship_dict.json')
+    table = WTRTable(expected, COEFFICIENTS, ship_dict)
+    save_snapshot(manager.snapshot_path, {Region.NA: table})
+    manager.e_and_c_path.write_text(dumps({
+        CONVERT_REGION[r]: {
+            'expected': expected, 'coefficients': COEFFICIENTS
+        } for r in Region
+    }))
+    manager.ship_path.write_text(dumps({r.name: ship_dict for r in Region}))
+    assert manager.load_tables()
+    assert set(manager.wtr_tables) == set(Region)
+    assert manager.expected_and_coeff is not None
+    assert set(load_snapshot(manager.snapshot_path)) == set(Region)
+
+
+def test_accumulator_totals(data):
+    """
+    Test StatsAccumulator totals against combine_objects
+    """
+    _, _, ids = data
+    members = [random_stats(ids) for _ in range(10)]
+    for member in members:
+        for stat in member.values():
+            stat['main_battery'] = {'hits': randint(0, 9), 'shots': 10}
+    acc = StatsAccumulator(1)
+    for member in members:
+        acc.add(ShipStats.from_dict(member))
+    combined = combine_objects(*members)
+    assert len(acc) == len(combined)
+    totals = acc.totals()
+    expected = combine_objects(*combined.values())
+    for key, val in expected.items():
+        assert totals[key] == val
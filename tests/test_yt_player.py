@@ -0,0 +1,66 @@
+from asyncio import Event, sleep
+from logging import getLogger
+from types import SimpleNamespace
+
+import music.yt_player
+from music.yt_player import FIRST_PAGE, YTPlayer
+
+
+class Typing:
+    async def __aenter__(self):
+        pass
+
+    async def __aexit__(self, *args):
+        pass
+
+
+def fake_ctx(sent: list):
+    async def send(msg):
+        sent.append(msg)
+
+    bot = SimpleNamespace(
+        ytdl_pool=SimpleNamespace(runner=lambda guild_id: None),
+        opus_cache=None
+    )
+    return SimpleNamespace(
+        bot=bot, guild=SimpleNamespace(id=1), author='someone',
+        send=send, typing=Typing
+    )
+
+
+def test_queued_playlists(loop, monkeypatch):
+    """
+    Test YTPlayer enqueues the rest of every playlist requested while
+    another playlist is still loading
+    """
+    release = Event()
+
+    async def fetch_playlist(url, start, end, run):
+        if start > 1:
+            await release.wait()
+        entries = [{'url': f'https://{url}/{i}', 'title': str(i)}
+                   for i in range(start, start + FIRST_PAGE)]
+        return {'title': url, 'entries': entries}
+
+    monkeypatch.setattr(music.yt_player, 'fetch_playlist', fetch_playlist)
+    sent = []
+    ctx = fake_ctx(sent)
+    player = YTPlayer(getLogger(), None)
+    player.lookahead = 0
+
+    async def run():
+        await player.enqueue(ctx, 'https://a')
+        await player.enqueue(ctx, 'https://b')
+        assert len(player.entry_queue) == 2 * FIRST_PAGE
+        release.set()
+        for _ in range(100):
+            if player.loading is None:
+                break
+            await sleep(0)
+
+    loop.run_until_complete(run())
+    assert player.loading is None
+    assert len(player.entry_queue) == 4 * FIRST_PAGE
+    assert sum('more songs' in msg for msg in sent) == 2
+    for entry in player.entry_queue:
+        entry.source.clean_up()
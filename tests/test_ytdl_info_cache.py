@@ -0,0 +1,68 @@
+from music.ytdl_info_cache import EXPIRY_MARGIN, YTDLInfoCache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self):
+        return self.now
+
+
+def video(id_, expire=None, duration=100):
+    """
+    Generate a youtube-dl info dict.
+    """
+    url = f'https://v.example/{id_}' + (f'?expire={expire}' if expire else '')
+    return {
+        'id': id_,
+        'webpage_url': f'https://www.youtube.com/watch?v={id_}',
+        'url': url,
+        'duration': duration
+    }
+
+
+def test_keys():
+    """
+    Test YTDLInfoCache lookups by normalized query and webpage url
+    """
+    cache = YTDLInfoCache(clock=Clock())
+    data = video('aB')
+    cache.put('Some  Song', data)
+    assert cache.get(' some song') is data
+    assert cache.get('https://www.youtube.com/watch?v=aB') is data
+    assert cache.get('https://www.youtube.com/watch?v=ab') is None
+    assert cache.stats['hits'] == 2
+
+
+def test_expiry():
+    """
+    Test YTDLInfoCache entries expire after the TTL or before the stream
+    url expires
+    """
+    clock = Clock()
+    cache = YTDLInfoCache(ttl=1000, clock=clock)
+    cache.put('a', video('a'))
+    cache.put('b', video('b', expire=500 + EXPIRY_MARGIN, duration=100))
+    cache.put('c', video('c', expire=10))
+    clock.now = 399
+    assert cache.get('a') and cache.get('b')
+    assert cache.get('c') is None
+    clock.now = 400
+    assert cache.get('b') is None
+    clock.now = 1000
+    assert cache.get('a') is None
+
+
+def test_lru():
+    """
+    Test YTDLInfoCache evicts the least recently used entries
+    """
+    cache = YTDLInfoCache(max_size=2, clock=Clock())
+    cache.put(None, video('a'))
+    cache.put(None, video('b'))
+    cache.get('https://www.youtube.com/watch?v=a')
+    cache.put(None, video('c'))
+    assert cache.get('https://www.youtube.com/watch?v=b') is None
+    assert cache.get('https://www.youtube.com/watch?v=a')
+    assert len(cache) == 2
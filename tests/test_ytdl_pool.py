@@ -0,0 +1,66 @@
+from asyncio import gather, sleep
+from threading import Event
+
+from pytest import raises
+
+from music.ytdl_pool import YTDLPool
+
+
+def test_fairness(loop):
+    """
+    Test YTDLPool serves guilds round robin
+    """
+    pool = YTDLPool(workers=1)
+    release = Event()
+    order = []
+
+    async def run():
+        first = loop.create_task(pool.run('a', release.wait))
+        await sleep(0)
+        jobs = [pool.run('a', order.append, f'a{i}') for i in range(3)]
+        jobs.append(pool.run('b', order.append, 'b0'))
+        jobs = [loop.create_task(job) for job in jobs]
+        await sleep(0)
+        assert pool.queued == 4
+        release.set()
+        await gather(first, *jobs)
+
+    loop.run_until_complete(run())
+    assert order == ['a0', 'b0', 'a1', 'a2']
+    assert pool.stats['completed'] == 5
+    assert pool.stats['running'] == pool.stats['queued'] == 0
+
+
+def test_download_bound(loop):
+    """
+    Test YTDLPool runs info jobs while downloads are at their limit
+    """
+    pool = YTDLPool(workers=3, max_downloads=1)
+    release = Event()
+
+    async def run():
+        first = loop.create_task(
+            pool.run('a', release.wait, download=True)
+        )
+        second = loop.create_task(
+            pool.run('b', release.wait, download=True)
+        )
+        info = await pool.run('c', sum, [1, 2])
+        assert pool.downloads == 1
+        assert pool.queued == 1
+        release.set()
+        await gather(first, second)
+        return info
+
+    assert loop.run_until_complete(run()) == 3
+    assert pool.downloads == 0
+
+
+def test_failed(loop):
+    """
+    Test YTDLPool passes job errors to the caller
+    """
+    pool = YTDLPool()
+    with raises(ValueError):
+        loop.run_until_complete(pool.run('a', int, 'x'))
+    assert pool.stats['failed'] == 1
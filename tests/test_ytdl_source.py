@@ -0,0 +1,62 @@
+from logging import getLogger
+from pathlib import Path
+
+from pytest import raises
+from youtube_dl import DownloadError
+
+from music.music_cache import MusicCache
+from music.ytdl_source import YTDLSource
+
+
+def source(info):
+    """
+    Generate a streamed YTDLSource whose youtube-dl calls return `info`
+    """
+    async def run(func, *args, download=False):
+        return info
+
+    data = {'title': 'a', 'webpage_url': 'https://www.youtube.com/watch?v=a'}
+    return YTDLSource(data, 'requester', False, True, getLogger(), run=run)
+
+
+def test_stream_url(loop):
+    """
+    Test YTDLSource.true_name returns the stream url of the first entry
+    """
+    info = {'entries': [{'url': 'https://v.example/a'}]}
+    name = loop.run_until_complete(source(info).true_name())
+    assert name == 'https://v.example/a'
+
+
+def test_no_stream_url(loop):
+    """
+    Test YTDLSource.true_name raises DownloadError if youtube-dl finds
+    nothing to stream
+    """
+    for info in (None, {'entries': []}, {'title': 'a'}):
+        with raises(DownloadError):
+            loop.run_until_complete(source(info).true_name())
+
+
+def test_cache_pin(loop, tmpdir):
+    """
+    Test YTDLSource pins its file in the music cache until it's released
+    or cleaned up
+    """
+    path = Path(str(tmpdir))
+    cache = MusicCache(path, 1000, getLogger())
+    file = path.joinpath('youtube-a.m4a')
+    file.write_bytes(b'\0' * 100)
+    cache.add('youtube-a', str(file))
+    data = {'extractor_key': 'Youtube', 'id': 'a', 'title': 'a'}
+    ytdl_source = YTDLSource(data, 'requester', True, False, getLogger(),
+                             cache=cache)
+    assert loop.run_until_complete(ytdl_source.true_name()) == str(file)
+    assert cache.pinned == {'youtube-a': 1}
+    ytdl_source.release()
+    assert not cache.pinned
+    assert loop.run_until_complete(ytdl_source.true_name()) == str(file)
+    assert cache.pinned == {'youtube-a': 1}
+    ytdl_source.clean_up()
+    assert not cache.pinned
+    assert file.exists()
@@ -0,0 +1,87 @@
+from asyncio import Semaphore, gather
+from collections import namedtuple
+from typing import Awaitable, Iterable, List
+
+from wowspy import Region, WowsAsync
+
+PlayerSummary = namedtuple('PlayerSummary', ('hidden', 'nick', 'battles'))
+
+MAX_IDS_PER_CALL = 100
+
+
+def chunks(lst: list, size: int) -> List[list]:
+    """
+    Split a list into chunks.
+    :param lst: the list.
+    :param size: the max size of each chunk.
+    :return: a list of chunks.
+    >>> chunks([1, 2, 3, 4, 5], 2)
+    [[1, 2], [3, 4], [5]]
+    """
+    return [lst[i:i + size] for i in range(0, len(lst), size)]
+
+
+async def gather_limited(coros: Iterable[Awaitable], limit: int) -> list:
+    """
+    Run coroutines concurrently with at most `limit` running at once.
+    :param coros: the coroutines.
+    :param limit: the max number of coroutines running at once.
+    :return: the results in the same order as `coros`
+    """
+    sem = Semaphore(max(limit, 1))
+
+    async def run(coro):
+        async with sem:
+            return await coro
+
+    return await gather(*(run(coro) for coro in coros))
+
+
+async def fetch_summaries(wows_api: WowsAsync, region: Region, ids: list,
+                          logger, chunk_size: int, limit: int) -> dict:
+    """
+    Fetch hidden status, nickname and battle count for many players,
+    `chunk_size` players per request.
+    :param wows_api: the WowsAsync instance.
+    :param region: the region.
+    :param ids: the list of player ids.
+    :param logger: the logger.
+    :param chunk_size: the amount of players in each request.
+    :param limit: the max number of requests running at once.
+    :return: a dict of {player_id: PlayerSummary}, players in a failed
+        request are left out.
+    """
+    async def fetch_chunk(chunk):
+        try:
+            resp = await wows_api.player_personal_data(
+                region, chunk, language='en',
+                fields='hidden_profile,nickname,statistics.pvp.battles'
+            )
+        except Exception as e:
+            logger.warn(str(e))
+            return {}
+        try:
+            data = resp['data'] or {}
+        except (KeyError, TypeError):
+            return {}
+        res = {}
+        for id_, entry in data.items():
+            if not entry:
+                continue
+            try:
+                battles = entry['statistics']['pvp']['battles']
+            except (KeyError, TypeError):
+                battles = None
+            res[str(id_)] = PlayerSummary(
+                entry.get('hidden_profile', False),
+                entry.get('nickname', None),
+                battles
+            )
+        return res
+
+    size = min(max(chunk_size, 1), MAX_IDS_PER_CALL)
+    requests = (fetch_chunk(c) for c in chunks([int(i) for i in ids], size))
+    res = {}
+    for part in await gather_limited(requests, limit):
+        res.update(part)
+    return res
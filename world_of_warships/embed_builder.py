@@ -1,8 +1,10 @@
-from typing import Optional
+from typing import List, Optional
 
 from discord import Embed
 
-from scripts.helpers import try_divide
+from scripts.helpers import code_block, try_divide
+
+SPARKS = '\u2581\u2582\u2583\u2584\u2585\u2586\u2587\u2588'
 
 
 def get_shame_embed(embed: Embed, all_time_stats: dict, wtr: int,
@@ -173,3 +175,76 @@ def build_clan_embed(embed: Embed, total_stats: dict, clan_name: str,
     a(name='Kills/Deaths', value=f'{kills/(battles-survived_battles):.2f}')
     del a
     return embed
+
+
+def sample(lst: list, size: int) -> list:
+    """
+    Pick evenly spaced items from a list, the first and last items are
+    always picked.
+    :param lst: the list.
+    :param size: the max number of items to pick.
+    :return: the picked items.
+    >>> sample(list(range(10)), 4)
+    [0, 3, 6, 9]
+    """
+    if len(lst) <= size:
+        return lst
+    step = (len(lst) - 1) / (size - 1)
+    return [lst[round(i * step)] for i in range(size)]
+
+
+def sparkline(values: List[int]) -> str:
+    """
+    Render a list of values as a line of bar characters.
+    :param values: the values.
+    :return: the sparkline.
+    >>> sparkline([0, 50, 100])
+    '\u2581\u2584\u2588'
+    """
+    low, high = min(values), max(values)
+    span = (high - low) or 1
+    return ''.join(
+        SPARKS[(val - low) * (len(SPARKS) - 1) // span] for val in values
+    )
+
+
+def build_history_embed(embed: Embed, nick_name: str, history: List[tuple],
+                        profile_url: str) -> Embed:
+    """
+    Build an embed for a player's WTR history.
+    :param embed: the initial embed object.
+    :param nick_name: player nickname.
+    :param history: a list of (date, battles, wtr) sorted by date.
+    :param profile_url: player's profile url.
+    :return: the WTR history embed.
+    """
+    a = embed.add_field
+    embed.set_author(
+        name=f'{nick_name} | WTR History <- Link to profile',
+        url=profile_url
+    )
+    if not history:
+        a(name='Error', value='No WTR history recorded for this player yet.')
+        return embed
+
+    def fmt(d):
+        d = str(d)
+        return f'{d[:4]}-{d[4:6]}-{d[6:]}'
+
+    first_date, first_battles, first_wtr = history[0]
+    last_date, last_battles, last_wtr = history[-1]
+    a(name='Since', value=fmt(first_date))
+    a(name='WTR', value=f'{first_wtr:,} \u2192 {last_wtr:,} '
+                        f'({last_wtr - first_wtr:+,})')
+    a(name='Battles', value=f'{last_battles - first_battles:+,}')
+    a(
+        name='Trend',
+        value=code_block(sparkline([w for *_, w in sample(history, 40)]))[0],
+        inline=False
+    )
+    rows = [f'{"Date":<10} {"Battles":>7} {"WTR":>6}'] + [
+        f'{fmt(d)} {b:>7,} {w:>6,}' for d, b, w in sample(history, 10)
+    ]
+    a(name='Entries', value=code_block('\n'.join(rows))[0], inline=False)
+    del a
+    return embed
@@ -0,0 +1,93 @@
+from collections import OrderedDict
+from typing import Hashable, Optional
+
+from discord import Embed
+
+
+class EmbedCache:
+    """
+    A bounded LRU cache of rendered embeds. Each embed is stored with the
+    version of the stats it was rendered from, a lookup with a different
+    version is a miss.
+
+    === Attributes ===
+    :type max_size: int
+        Max number of cached embeds.
+    :type hits: int
+        Number of lookups that found an embed of the same version.
+    :type misses: int
+        Number of lookups that did not.
+    :type invalidations: int
+        Number of embeds removed by `invalidate` or `clear`
+    """
+    __slots__ = ('max_size', 'hits', 'misses', 'invalidations', '__entries')
+
+    def __init__(self, max_size: int = 1000):
+        """
+        :param max_size: max number of cached embeds.
+        """
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        # key -> (version, embed)
+        self.__entries = OrderedDict()
+
+    def __len__(self):
+        return len(self.__entries)
+
+    @property
+    def stats(self) -> dict:
+        """
+        :return: a dict of the cache counters.
+        """
+        return {
+            'size': len(self),
+            'max_size': self.max_size,
+            'hits': self.hits,
+            'misses': self.misses,
+            'invalidations': self.invalidations
+        }
+
+    def get(self, key: Hashable, version: Hashable) -> Optional[Embed]:
+        """
+        Get a cached embed.
+        :param key: the entity key.
+        :param version: the current version of the entity stats.
+        :return: the embed if it was rendered from the same version.
+        """
+        entry = self.__entries.get(key)
+        if entry is None or entry[0] != version:
+            self.misses += 1
+            return None
+        self.__entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, key: Hashable, version: Hashable, embed: Embed):
+        """
+        Cache an embed, the least recently used embed is evicted if the
+        cache is full.
+        :param key: the entity key.
+        :param version: the version of the stats the embed is rendered from.
+        :param embed: the embed.
+        """
+        self.__entries[key] = (version, embed)
+        self.__entries.move_to_end(key)
+        while len(self.__entries) > self.max_size:
+            self.__entries.popitem(last=False)
+
+    def invalidate(self, key: Hashable):
+        """
+        Remove the cached embed of an entity.
+        :param key: the entity key.
+        """
+        if self.__entries.pop(key, None) is not None:
+            self.invalidations += 1
+
+    def clear(self):
+        """
+        Remove all cached embeds.
+        """
+        self.invalidations += len(self.__entries)
+        self.__entries.clear()
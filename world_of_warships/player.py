@@ -1,24 +1,31 @@
+from asyncio import gather
 from typing import Optional
 
 from discord import Embed
 from wowspy import Region, WowsAsync
 
-from scripts.helpers import get_date
+from scripts.helpers import deep_sizeof, get_date
 from world_of_warships.embed_builder import get_shame_embed
-from world_of_warships.wtr import CONVERT_REGION, choose_colour, wtr_absolute
+from world_of_warships.ship_stats import API_FIELDS, ShipStats
+from world_of_warships.wtr import CONVERT_REGION, choose_colour
+from world_of_warships.wtr_table import WTRTable
+
+API_RECENT_DAYS = 8
+RECENT_DAYS = 30
 
 
 class Player:
     __slots__ = ('region', 'player_id', 'stats', 'recent_stats',
                  'recent_date', 'ship_stats', 'logger', 'nick', 'hidden',
-                 'wtr', 'clan', 'updating', '__embed')
+                 'wtr', 'clan', 'daily_stats')
 
-    def __init__(self, region: Region, id_: str, logger, ship_stats=None):
+    def __init__(self, region: Region, id_: str, logger,
+                 ship_stats: Optional[ShipStats] = None):
         """
         :param id_: the player id.
         :param region: the player region.
         :param logger: the logger.
-        :param ship_stats: player ship stats, optional.
+        :param ship_stats: player ShipStats, optional.
         """
         self.region = region
         self.player_id = id_
@@ -31,8 +38,7 @@ class Player:
         self.hidden = False
         self.wtr = None
         self.clan = None
-        self.updating = False
-        self.__embed = None
+        self.daily_stats = None
 
     @property
     def region_today(self) -> str:
@@ -57,32 +63,67 @@ class Player:
         return (f'https://{self.region_today}.warships.today/'
                 f'player/{self.player_id}/{self.nick}')
 
-    async def get_embed(self, wows_api: WowsAsync,
-                        expected, coeff, ship_dict) -> Optional[Embed]:
+    def load(self, record: dict):
         """
-        Get player stats embed.
-        :param wows_api: the WowsAsync instance.
-        :param expected: the expected server average.
-        :param coeff: the coefficents used in WTR calculation.
-        :param ship_dict: a dict of {ship_id: tier}
+        Load saved player data.
+        :param record: the saved player data, see `WowsStore.get_player`
+        """
+        self.nick = record['nick']
+        self.clan = record['clan']
+        self.hidden = record['hidden']
+        self.wtr = record['wtr']
+        self.stats = record['stats']
+        self.recent_stats = record['recent_stats']
+        self.recent_date = record['recent_date']
+        self.ship_stats = ShipStats.load(record['ship_stats'])
+
+    def record(self) -> dict:
+        """
+        :return: the player data to be saved, see `WowsStore.set_player`
+        """
+        return {
+            'nick': self.nick,
+            'clan': self.clan,
+            'hidden': self.hidden,
+            'wtr': self.wtr,
+            'stats': self.stats,
+            'recent_stats': self.recent_stats,
+            'recent_date': self.recent_date,
+            'ship_stats': self.ship_stats.to_bytes()
+            if self.ship_stats else None
+        }
+
+    def memory_usage(self) -> int:
+        """
+        :return: Estimated memory usage of the player stats in bytes.
+        """
+        ships = self.ship_stats.nbytes if self.ship_stats else 0
+        return ships + deep_sizeof((
+            self.stats, self.recent_stats, self.nick, self.clan
+        ))
+
+    @property
+    def version(self) -> tuple:
+        """
+        :return: the version of the player stats, it changes whenever the
+            player stats embed would change.
+        """
+        return (self.stats.get('battles'), self.wtr, self.nick, self.clan,
+                self.hidden, self.recent_date)
+
+    def get_embed(self) -> Optional[Embed]:
+        """
+        Build player stats embed.
         :return: player stats embed if any.
         """
-        if self.hidden:
-            return
-        updated = await self.update(wows_api, expected, coeff, ship_dict, True)
-        self.updating = False
-        if not updated and self.__embed is not None:
-            return self.__embed
         if self.hidden:
             return
         colour = choose_colour(self.wtr)
         tmp_embed = Embed(colour=colour)
-        embed = get_shame_embed(
+        return get_shame_embed(
             tmp_embed, self.stats, self.wtr, self.nick, self.clan,
             self.recent_stats, self.recent_date, self.warships_today_url
         )
-        self.__embed = embed
-        return embed
 
     async def fetch(self, wows_api: WowsAsync) -> Optional[tuple]:
         """
@@ -113,33 +154,41 @@ class Player:
         except (KeyError, TypeError):
             return None, None
 
-    async def fetch_recent(self, wows_api: WowsAsync) -> tuple:
+    async def fetch_daily_stats(self, wows_api: WowsAsync) -> Optional[dict]:
         """
-        Fetch the recent player stats.
+        Fetch the player stats snapshots of the last `API_RECENT_DAYS` days.
         :param wows_api: the WowsAsync instance.
-        :return: a tuple of (recent player stats, stats date)
+        :return: a dict of {date: stats} if any.
         """
-        dates = [get_date(diff) for diff in range(8)]
+        dates = [get_date(diff) for diff in range(API_RECENT_DAYS)]
         try:
             resp = await wows_api.player_statistics_by_date(
                 self.region, int(self.player_id), dates=','.join(dates),
                 language='en', fields='pvp'
             )
             if not resp:
-                return None, None
+                return
         except Exception as e:
             self.logger.warn(str(e))
-            return None, None
+            return
         try:
-            date_stats = resp['data'][self.player_id]['pvp']
-            if not date_stats:
-                return None, None
+            return resp['data'][self.player_id]['pvp'] or None
         except (KeyError, TypeError):
-            return None, None
+            return
+
+    def recent_from(self, daily: dict, days: int) -> tuple:
+        """
+        Get the recent player stats from daily stats snapshots.
+        The recent stats start from the latest snapshot with a different
+        battle count than the current stats.
+        :param daily: a dict of {date: stats}
+        :param days: the number of days to look back.
+        :return: a tuple of (recent player stats, stats date)
+        """
         recent = {}
         final_date = None
-        for date in dates:
-            stats = date_stats.get(date, None)
+        for date in (get_date(diff) for diff in range(days)):
+            stats = daily.get(date, None)
             if not stats:
                 continue
             battle_diff = (
@@ -156,7 +205,8 @@ class Player:
                 res[key] = diff
         return res, final_date
 
-    async def fetch_ship_stats(self, wows_api: WowsAsync) -> Optional[dict]:
+    async def fetch_ship_stats(
+            self, wows_api: WowsAsync) -> Optional[ShipStats]:
         """
         Fetch the player stats break down by ships.
         :param wows_api: the WowsAsync instance.
@@ -165,11 +215,7 @@ class Player:
         try:
             resp = await wows_api.statistics_of_players_ships(
                 self.region, account_id=int(self.player_id), language='en',
-                fields='pvp.battles,pvp.damage_dealt,pvp.wins,'
-                       'pvp.survived_battles,pvp.torpedoes,pvp.frags,'
-                       'pvp.main_battery,pvp.second_battery,pvp.ships_spotted,'
-                       'pvp.planes_killed,pvp.xp,pvp.capture_points,'
-                       'pvp.dropped_capture_points,ship_id'
+                fields=API_FIELDS
             )
             if not resp:
                 return
@@ -182,7 +228,9 @@ class Player:
                 return
         except (KeyError, TypeError):
             return
-        return {entry['ship_id']: entry['pvp'] for entry in data}
+        return ShipStats.from_dict(
+            {entry['ship_id']: entry['pvp'] for entry in data}
+        )
 
     async def fetch_clan(self, wows_api: WowsAsync) -> Optional[str]:
         """
@@ -203,43 +251,70 @@ class Player:
         except (KeyError, TypeError):
             return
 
-    async def update(self, wows_api: WowsAsync,
-                     expected, coeff, ship_dict, update_ships: bool) -> bool:
+    async def update(self, wows_api: WowsAsync, wtr_table: WTRTable,
+                     update_ships: bool,
+                     history: Optional[dict] = None) -> bool:
         """
         Update the player stats.
+        If there are daily stats snapshots from before today in `history`,
+        the recent stats are calculated from them instead of being fetched.
+        Snapshots that should be saved are put in `self.daily_stats`
         :param wows_api: the WowsAsync instance.
-        :param expected: the expected server average.
-        :param coeff: the coefficents used in WTR calculation.
-        :param ship_dict: a dict of {ship_id: tier}
+        :param wtr_table: the `WTRTable` for the player region.
         :param update_ships: True to update player ship stats.
+        :param history: saved daily stats snapshots of {date: stats}
         :return: True if updated.
         """
-        self.updating = True
-        all_time, nick = await self.fetch(wows_api)
-        clan = await self.fetch_clan(wows_api)
+        (all_time, nick), clan = await gather(
+            self.fetch(wows_api), self.fetch_clan(wows_api)
+        )
         name_change = self.nick != nick or self.clan != clan
         self.nick = nick
         self.clan = clan
-        if self.stats and \
-                (all_time.get('battles') == self.stats.get('battles')):
-            return name_change
         if not all_time:
             return False
+        today = get_date(0)
+        history = history or {}
+        if today not in history:
+            self.daily_stats = {today: all_time}
+        if self.stats and \
+                (all_time.get('battles') == self.stats.get('battles')) and \
+                (self.ship_stats or not update_ships):
+            return name_change
         self.stats = all_time
-        try:
-            recent_stats, recent_date = await self.fetch_recent(wows_api)
-        except Exception as e:
-            self.logger.warn(str(e))
-            recent_stats, recent_date = None, None
+        local = any(date < today for date in history)
+        daily, ship_stats = await gather(
+            no_op(history) if local else self.__try_fetch_daily(wows_api),
+            self.fetch_ship_stats(wows_api) if update_ships else no_op()
+        )
+        if not local and daily:
+            self.daily_stats = {**(self.daily_stats or {}), **daily}
+        recent_stats, recent_date = self.recent_from(
+            daily or {}, RECENT_DAYS if local else API_RECENT_DAYS
+        )
         if recent_stats:
             self.recent_stats = recent_stats
         if recent_date:
             self.recent_date = recent_date
-        if update_ships:
-            ship_stats = await self.fetch_ship_stats(wows_api)
-            if ship_stats:
-                self.ship_stats = ship_stats
-        self.wtr = await wtr_absolute(
-            expected, coeff, self.ship_stats, ship_dict
-        )
+        if ship_stats:
+            self.ship_stats = ship_stats
+        self.wtr = wtr_table.player_wtr(self.ship_stats)
         return True
+
+    async def __try_fetch_daily(self, wows_api: WowsAsync) -> Optional[dict]:
+        """
+        `Player.fetch_daily_stats` that logs errors instead of raising them.
+        """
+        try:
+            return await self.fetch_daily_stats(wows_api)
+        except Exception as e:
+            self.logger.warn(str(e))
+
+
+async def no_op(res=None):
+    """
+    A coroutine that does nothing.
+    :param res: the value to return.
+    :return: `res`
+    """
+    return res
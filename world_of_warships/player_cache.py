@@ -0,0 +1,175 @@
+from collections import OrderedDict
+from time import time
+from typing import Callable, Hashable, Optional
+
+
+class PlayerCache:
+    """
+    A bounded LRU cache with per entry TTL and an optional memory budget.
+
+    === Attributes ===
+    :type max_size: int
+        Max number of entries in the cache.
+    :type ttl: float
+        Seconds after the last refresh of an entry before it expires.
+    :type max_bytes: Optional[int]
+        Max estimated memory usage of all entries, None for no limit.
+    :type size_of: callable
+        A function that estimates the memory usage of a value in bytes.
+    :type hits: int
+        Number of lookups that found a live entry.
+    :type misses: int
+        Number of lookups that did not find a live entry.
+    :type evictions: int
+        Number of entries removed to stay within the size or memory budget.
+    :type expirations: int
+        Number of entries removed because they were past their TTL.
+    """
+    __slots__ = ('max_size', 'ttl', 'max_bytes', 'size_of', 'clock',
+                 'hits', 'misses', 'evictions', 'expirations',
+                 '__entries', '__total_bytes')
+
+    def __init__(self, max_size: int, ttl: float,
+                 max_bytes: Optional[int] = None,
+                 size_of: Callable[[object], int] = lambda _: 0,
+                 clock: Callable[[], float] = time):
+        """
+        :param max_size: max number of entries in the cache.
+        :param ttl: seconds after the last refresh of an entry before
+            it expires.
+        :param max_bytes: max estimated memory usage of all entries,
+            None for no limit.
+        :param size_of: a function that estimates the memory usage of a
+            value in bytes.
+        :param clock: a function that returns the current time in seconds.
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.size_of = size_of
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        # key -> [value, last refresh time, estimated size]
+        self.__entries = OrderedDict()
+        self.__total_bytes = 0
+
+    def __len__(self):
+        return len(self.__entries)
+
+    def __contains__(self, key: Hashable):
+        return key in self.__entries
+
+    @property
+    def total_bytes(self) -> int:
+        """
+        :return: the estimated memory usage of all entries.
+        """
+        return self.__total_bytes
+
+    @property
+    def stats(self) -> dict:
+        """
+        :return: a dict of cache counters.
+        """
+        return {
+            'size': len(self),
+            'max_size': self.max_size,
+            'bytes': self.__total_bytes,
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'expirations': self.expirations
+        }
+
+    def __expired(self, entry: list) -> bool:
+        return self.clock() - entry[1] > self.ttl
+
+    def __remove(self, key: Hashable):
+        entry = self.__entries.pop(key)
+        self.__total_bytes -= entry[2]
+
+    def get(self, key: Hashable):
+        """
+        Get a value from the cache and mark it as recently used.
+        :param key: the key.
+        :return: the value if there's a live entry for the key, else None.
+        """
+        entry = self.__entries.get(key)
+        if entry is not None and self.__expired(entry):
+            self.__remove(key)
+            self.expirations += 1
+            entry = None
+        if entry is None:
+            self.misses += 1
+            return
+        self.hits += 1
+        self.__entries.move_to_end(key)
+        return entry[0]
+
+    def put(self, key: Hashable, value):
+        """
+        Put a value into the cache, evicting entries if needed.
+        :param key: the key.
+        :param value: the value.
+        """
+        if key in self.__entries:
+            self.__remove(key)
+        size = self.size_of(value)
+        self.__entries[key] = [value, self.clock(), size]
+        self.__total_bytes += size
+        self.__shrink()
+
+    def mark_fresh(self, key: Hashable):
+        """
+        Reset the TTL of an entry and estimate its memory usage again.
+        Call this after the value was refreshed in place.
+        :param key: the key.
+        """
+        entry = self.__entries.get(key)
+        if entry is None:
+            return
+        size = self.size_of(entry[0])
+        self.__total_bytes += size - entry[2]
+        entry[1], entry[2] = self.clock(), size
+        self.__shrink()
+
+    def pop(self, key: Hashable):
+        """
+        Remove an entry from the cache.
+        :param key: the key.
+        :return: the value removed if any.
+        """
+        entry = self.__entries.get(key)
+        if entry is None:
+            return
+        self.__remove(key)
+        return entry[0]
+
+    def purge_expired(self):
+        """
+        Remove every expired entry.
+        """
+        for key in [k for k, e in self.__entries.items() if self.__expired(e)]:
+            self.__remove(key)
+            self.expirations += 1
+
+    def __shrink(self):
+        """
+        Evict least recently used entries until the cache is within
+        the size and memory budget. The most recent entry is always kept.
+        """
+        while len(self.__entries) > 1 and (
+                len(self.__entries) > self.max_size or
+                (self.max_bytes is not None and
+                 self.__total_bytes > self.max_bytes)):
+            key = next(iter(self.__entries))
+            expired = self.__expired(self.__entries[key])
+            self.__remove(key)
+            if expired:
+                self.expirations += 1
+            else:
+                self.evictions += 1
@@ -0,0 +1,216 @@
+from asyncio import ensure_future, get_event_loop, sleep, wait_for
+from functools import wraps
+from heapq import heappop, heappush
+from inspect import iscoroutinefunction
+from itertools import count
+from time import monotonic
+from typing import Optional
+
+from wowspy import Region, WowsAsync
+
+INTERACTIVE = 0
+BACKGROUND = 1
+
+LIMIT_EXCEEDED = 'REQUEST_LIMIT_EXCEEDED'
+
+
+class TokenBucket:
+    """
+    A token bucket that refills continuously.
+
+    === Attributes ===
+    rate: the number of tokens added per second.
+    capacity: the max number of tokens, which is the max burst size.
+    tokens: the number of tokens left as of `updated`
+    updated: the clock time the tokens were last refilled.
+    """
+    __slots__ = ('rate', 'capacity', 'tokens', 'updated', 'clock')
+
+    def __init__(self, rate: float, capacity: float, clock=monotonic):
+        """
+        :param rate: the number of tokens added per second.
+        :param capacity: the max number of tokens.
+        :param clock: a function that returns the current time in seconds.
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.clock = clock
+        self.updated = clock()
+
+    def __refill(self):
+        now = self.clock()
+        self.tokens = min(
+            self.capacity, self.tokens + (now - self.updated) * self.rate
+        )
+        self.updated = now
+
+    def delay(self) -> float:
+        """
+        :return: seconds until a token is available, 0 if there is one now.
+        """
+        self.__refill()
+        return max(0.0, (1 - self.tokens) / self.rate)
+
+    def take(self):
+        """
+        Take a token, check `TokenBucket.delay` first.
+        """
+        self.__refill()
+        self.tokens -= 1
+
+
+class RateLimiter:
+    """
+    Paces requests with one `TokenBucket` per region.
+    Waiting requests are served by priority, then in arrival order.
+
+    === Attributes ===
+    rate: the number of requests allowed per second in each region.
+    capacity: the max burst size in each region.
+    buckets: a dict of {Region: TokenBucket}
+    queues: a dict of {Region: heap of (priority, sequence, future)}
+    workers: a dict of {Region: task serving the queue}
+    """
+    __slots__ = ('rate', 'capacity', 'buckets', 'queues', 'workers',
+                 'counter')
+
+    def __init__(self, rate: float = 10, capacity: Optional[float] = None):
+        """
+        :param rate: the number of requests allowed per second in each
+            region.
+        :param capacity: the max burst size in each region, defaults to
+            `rate`
+        """
+        self.rate = rate
+        self.capacity = capacity or rate
+        self.buckets = {}
+        self.queues = {}
+        self.workers = {}
+        self.counter = count()
+
+    def queued(self, region: Region) -> int:
+        """
+        :param region: the region.
+        :return: the number of requests waiting in the region.
+        """
+        return sum(not f.done() for *_, f in self.queues.get(region, ()))
+
+    async def acquire(self, region: Region, priority: int = INTERACTIVE,
+                      timeout: Optional[float] = None):
+        """
+        Wait until a request can be made in a region.
+        :param region: the region.
+        :param priority: the request priority, lower is served first.
+        :param timeout: max seconds to wait, None to wait forever.
+        :raises asyncio.TimeoutError: if the request can't be made in time.
+        """
+        future = get_event_loop().create_future()
+        queue = self.queues.setdefault(region, [])
+        heappush(queue, (priority, next(self.counter), future))
+        if region not in self.workers:
+            self.workers[region] = ensure_future(self.__serve(region))
+        await wait_for(future, timeout)
+
+    async def __serve(self, region: Region):
+        """
+        Grant the waiting requests in a region as tokens become available.
+        :param region: the region.
+        """
+        bucket = self.buckets.get(region)
+        if bucket is None:
+            bucket = TokenBucket(self.rate, self.capacity)
+            self.buckets[region] = bucket
+        queue = self.queues[region]
+        try:
+            while queue:
+                if queue[0][-1].done():
+                    heappop(queue)
+                    continue
+                delay = bucket.delay()
+                if delay:
+                    await sleep(delay)
+                    continue
+                *_, future = heappop(queue)
+                if not future.done():
+                    bucket.take()
+                    future.set_result(None)
+        finally:
+            del self.workers[region]
+
+
+class RateLimitedWows:
+    """
+    A proxy of `WowsAsync` that paces every api call with a `RateLimiter`
+    Calls rejected by the api for exceeding the request limit are retried.
+
+    === Attributes ===
+    wows_api: the WowsAsync instance.
+    limiter: the RateLimiter shared by all views of the api.
+    priority: the priority of calls made with this view.
+    timeout: max seconds a call waits in the queue, None to wait forever.
+    retries: max number of retries of a call over the request limit.
+    """
+    __slots__ = ('wows_api', 'limiter', 'priority', 'timeout', 'retries')
+
+    def __init__(self, wows_api: WowsAsync, limiter: RateLimiter,
+                 priority: int = INTERACTIVE,
+                 timeout: Optional[float] = None, retries: int = 2):
+        """
+        :param wows_api: the WowsAsync instance.
+        :param limiter: the RateLimiter.
+        :param priority: the priority of calls made with this view.
+        :param timeout: max seconds a call waits in the queue.
+        :param retries: max number of retries of a call over the
+            request limit.
+        """
+        self.wows_api = wows_api
+        self.limiter = limiter
+        self.priority = priority
+        self.timeout = timeout
+        self.retries = retries
+
+    def view(self, priority: int,
+             timeout: Optional[float] = None) -> 'RateLimitedWows':
+        """
+        Get a view of the api with a different priority, sharing the same
+        `RateLimiter`
+        :param priority: the priority of calls made with the view.
+        :param timeout: max seconds a call waits in the queue.
+        :return: the new view.
+        """
+        return RateLimitedWows(
+            self.wows_api, self.limiter, priority, timeout, self.retries
+        )
+
+    def __getattr__(self, name):
+        attr = getattr(self.wows_api, name)
+        if not iscoroutinefunction(attr):
+            return attr
+
+        @wraps(attr)
+        async def call(*args, **kwargs):
+            region = kwargs['region'] if 'region' in kwargs else args[0]
+            for _ in range(self.retries + 1):
+                await self.limiter.acquire(
+                    region, self.priority, self.timeout
+                )
+                res = await attr(*args, **kwargs)
+                if not limit_exceeded(res):
+                    break
+            return res
+
+        return call
+
+
+def limit_exceeded(resp) -> bool:
+    """
+    Check if an api response is an error for exceeding the request limit.
+    :param resp: the api response.
+    :return: True if the request limit is exceeded.
+    """
+    try:
+        return resp['status'] == 'error' and \
+            resp['error']['message'] == LIMIT_EXCEEDED
+    except (KeyError, TypeError):
+        return False
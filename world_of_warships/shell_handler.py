@@ -1,3 +1,6 @@
+from time import time
+from typing import Optional
+
 from discord.ext.commands import BadArgument, Context, Converter
 from wowspy import Region
 
@@ -6,6 +9,9 @@ from scripts.discord_utils import leading_members
 from world_of_warships.war_gaming import get_clan_id as gcid, \
     get_player_id as gpid
 
+LOOKUP_TTL = 7 * 24 * 60 * 60
+NEGATIVE_LOOKUP_TTL = 15 * 60
+
 
 class ConvertRegion(Converter):
     __slots__ = ()
@@ -17,16 +23,63 @@ class ConvertRegion(Converter):
             raise BadArgument('Please enter a region in `NA, EU, RU, AS`')
 
 
+async def __cached_id(bot, kind: str, region: Region, name: str, fetch):
+    """
+    Look up an id by name, consulting the name lookup cache in the
+    `WowsStore` before calling the API.
+    Names without a match are cached for a shorter time since
+    the API call might have failed instead.
+    :param bot: the bot.
+    :param kind: the kind of name, `player` or `clan`
+    :param region: the region.
+    :param name: the name.
+    :param fetch: `war_gaming.get_player_id` or `war_gaming.get_clan_id`
+    :return: the id found if any.
+    """
+    store = bot.wows_manager.store
+    if not store:
+        return await fetch(region, bot.wows_api, bot.logger, name)
+    cached = store.get_lookup(kind, region.name, name)
+    if cached:
+        id_, updated_at = cached
+        ttl = LOOKUP_TTL if id_ is not None else NEGATIVE_LOOKUP_TTL
+        if time() - updated_at < ttl:
+            return id_
+    id_ = await fetch(region, bot.wows_api, bot.logger, name)
+    store.set_lookup(kind, region.name, name, id_)
+    return id_
+
+
+async def cached_player_id(bot, region: Region, name: str) -> Optional[int]:
+    """
+    Get a player id by name, see `__cached_id`
+    :param bot: the bot.
+    :param region: the region.
+    :param name: the player name.
+    :return: the player id if found.
+    """
+    return await __cached_id(bot, 'player', region, name, gpid)
+
+
+async def cached_clan_id(bot, region: Region, name: str) -> Optional[int]:
+    """
+    Get a clan id by name, see `__cached_id`
+    :param bot: the bot.
+    :param region: the region.
+    :param name: the clan name.
+    :return: the clan id if found.
+    """
+    return await __cached_id(bot, 'clan', region, name, gcid)
+
+
 async def get_player_id(ctx: Context, name, region: Region):
     if not name:
         raise BadArgument('Please enter a player name.')
     bot = ctx.bot
-    wows_api = bot.wows_api
-    logger = bot.logger
     data_manager = bot.data_manager
     members, _ = leading_members(ctx, name)
     if not members:
-        id_ = await gpid(region, wows_api, logger, name)
+        id_ = await cached_player_id(bot, region, name)
         if id_ is not None:
             return id_
         raise BadArgument(f'Player **{name}** not found!')
@@ -47,10 +100,7 @@ async def get_player_id(ctx: Context, name, region: Region):
 async def get_clan_id(ctx: Context, name, region: Region):
     if not name:
         raise BadArgument('Please enter a clan name.')
-    bot = ctx.bot
-    wows_api = bot.wows_api
-    logger = bot.logger
-    id_ = await gcid(region, wows_api, logger, name)
+    id_ = await cached_clan_id(ctx.bot, region, name)
     if id_ is not None:
         return id_
     raise BadArgument(f'Clan **{name}** not found!')
@@ -0,0 +1,164 @@
+from struct import Struct, error as StructError
+from typing import Optional
+
+import numpy as np
+
+from world_of_warships.wtr_table import WTR_FIELDS
+
+SHIP_FIELDS = WTR_FIELDS + (
+    'survived_battles', 'xp', 'ships_spotted',
+    'main_battery.hits', 'main_battery.shots',
+    'second_battery.hits', 'second_battery.shots',
+    'torpedoes.hits', 'torpedoes.shots'
+)
+
+API_FIELDS = ','.join(f'pvp.{f}' for f in SHIP_FIELDS) + ',ship_id'
+
+_PATHS = tuple(tuple(f.split('.')) for f in SHIP_FIELDS)
+
+_HEADER = Struct('<HI')
+
+
+def flatten(stats: dict) -> list:
+    """
+    Flatten a stats dict into a list in the order of `SHIP_FIELDS`
+    :param stats: the stats dict.
+    :return: the stats values, missing values are 0.
+    >>> flatten({'battles': 2, 'main_battery': {'hits': 5}})[:2]
+    [2, 0]
+    >>> flatten({'battles': 2, 'main_battery': {'hits': 5}})[-6]
+    5
+    """
+    res = []
+    for path in _PATHS:
+        val = stats
+        for key in path:
+            val = val.get(key) if isinstance(val, dict) else None
+        res.append(val or 0)
+    return res
+
+
+def unflatten(row) -> dict:
+    """
+    Turn a row in the order of `SHIP_FIELDS` back into a stats dict.
+    :param row: the row.
+    :return: the stats dict.
+    >>> unflatten(flatten({'main_battery': {'hits': 5}}))['main_battery']
+    {'hits': 5, 'shots': 0}
+    """
+    res = {}
+    for path, val in zip(_PATHS, row):
+        d = res
+        for key in path[:-1]:
+            d = d.setdefault(key, {})
+        d[path[-1]] = int(val)
+    return res
+
+
+class ShipStats:
+    """
+    A player's stats break down by ships, stored as one int64 row per ship
+    with columns in the order of `SHIP_FIELDS`
+
+    === Attributes ===
+    :type ship_ids: np.ndarray
+        The ship ids, one for each row.
+    :type rows: np.ndarray
+        The stats, one row per ship.
+    """
+    __slots__ = ('ship_ids', 'rows')
+
+    def __init__(self, ship_ids: np.ndarray, rows: np.ndarray):
+        """
+        :param ship_ids: the ship ids.
+        :param rows: the stats, one row per ship in `ship_ids`
+        """
+        self.ship_ids = ship_ids
+        self.rows = rows
+
+    def __len__(self):
+        return len(self.ship_ids)
+
+    def __eq__(self, other):
+        return isinstance(other, ShipStats) and \
+            np.array_equal(self.ship_ids, other.ship_ids) and \
+            np.array_equal(self.rows, other.rows)
+
+    @classmethod
+    def from_dict(cls, ship_stats: dict) -> 'ShipStats':
+        """
+        :param ship_stats: a dict of {ship_id: stats} as returned by the api.
+        :return: the ShipStats.
+        """
+        ids = np.fromiter(
+            (int(key) for key in ship_stats), dtype=np.int64,
+            count=len(ship_stats)
+        )
+        rows = np.array(
+            [flatten(stats) for stats in ship_stats.values()], dtype=np.int64
+        ).reshape(-1, len(SHIP_FIELDS))
+        return cls(ids, rows)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> Optional['ShipStats']:
+        """
+        :param data: the bytes from `ShipStats.to_bytes`
+        :return: the ShipStats, None if the data is invalid or was saved
+            with a different `SHIP_FIELDS`
+        """
+        try:
+            fields, count = _HEADER.unpack_from(data, 0)
+            if fields != len(SHIP_FIELDS) or \
+                    len(data) != _HEADER.size + 8 * count * (fields + 1):
+                return
+            ids = np.frombuffer(
+                data, dtype='<i8', count=count, offset=_HEADER.size
+            )
+            rows = np.frombuffer(
+                data, dtype='<i8', count=count * fields,
+                offset=_HEADER.size + ids.nbytes
+            ).reshape(count, fields)
+        except (ValueError, StructError):
+            return
+        return cls(ids, rows)
+
+    @classmethod
+    def load(cls, data: Optional[bytes]) -> Optional['ShipStats']:
+        """
+        Load saved ship stats.
+        :param data: the bytes from `ShipStats.to_bytes`
+        :return: the ShipStats if any.
+        """
+        if isinstance(data, bytes):
+            return cls.from_bytes(data)
+
+    def to_bytes(self) -> bytes:
+        """
+        :return: the ship stats packed into bytes.
+        """
+        return (_HEADER.pack(len(SHIP_FIELDS), len(self)) +
+                self.ship_ids.astype('<i8').tobytes() +
+                self.rows.astype('<i8').tobytes())
+
+    def to_dict(self) -> dict:
+        """
+        :return: a dict of {ship_id: stats}
+        """
+        return {
+            int(ship_id): unflatten(row)
+            for ship_id, row in zip(self.ship_ids, self.rows)
+        }
+
+    @property
+    def battles(self) -> int:
+        """
+        :return: the total number of battles of all ships.
+        """
+        return int(self.rows[:, 0].sum())
+
+    @property
+    def nbytes(self) -> int:
+        """
+        :return: the memory usage of the arrays in bytes.
+        """
+        return self.ship_ids.nbytes + self.rows.nbytes
@@ -0,0 +1,77 @@
+from typing import Optional
+
+import numpy as np
+
+from world_of_warships.ship_stats import SHIP_FIELDS, ShipStats, unflatten
+
+
+class StatsAccumulator:
+    """
+    Sums per ship stats of many players in place.
+    Each ship gets one row in a 2d array, columns in the order of
+    `SHIP_FIELDS`
+    """
+    __slots__ = ('__index', '__ids', '__rows', '__count')
+
+    def __init__(self, capacity: int = 256):
+        """
+        :param capacity: the initial number of ship rows.
+        """
+        self.__index = {}
+        self.__ids = np.zeros(capacity, dtype=np.int64)
+        self.__rows = np.zeros((capacity, len(SHIP_FIELDS)), dtype=np.int64)
+        self.__count = 0
+
+    def __len__(self):
+        return self.__count
+
+    @property
+    def ship_ids(self) -> np.ndarray:
+        """
+        :return: the ship ids, one for each row.
+        """
+        return self.__ids[:self.__count]
+
+    @property
+    def rows(self) -> np.ndarray:
+        """
+        :return: the summed stats, one row per ship.
+        """
+        return self.__rows[:self.__count]
+
+    def __row(self, ship_id: int) -> int:
+        """
+        Get the row index of a ship, a new row is added if needed.
+        :param ship_id: the ship id.
+        :return: the row index.
+        """
+        row = self.__index.get(ship_id)
+        if row is not None:
+            return row
+        row = self.__count
+        if row == len(self.__ids):
+            size = max(2 * row, 1)
+            self.__ids = np.resize(self.__ids, size)
+            rows = np.zeros((size, len(SHIP_FIELDS)), dtype=np.int64)
+            rows[:row] = self.__rows
+            self.__rows = rows
+        self.__ids[row] = ship_id
+        self.__index[ship_id] = row
+        self.__count += 1
+        return row
+
+    def add(self, ship_stats: Optional[ShipStats]):
+        """
+        Add a player's per ship stats.
+        :param ship_stats: the player's ShipStats.
+        """
+        if not ship_stats:
+            return
+        index = [self.__row(int(ship_id)) for ship_id in ship_stats.ship_ids]
+        np.add.at(self.__rows, index, ship_stats.rows)
+
+    def totals(self) -> dict:
+        """
+        :return: the stats of all ships summed as a stats dict.
+        """
+        return unflatten(self.rows.sum(axis=0))
@@ -1,4 +1,4 @@
-from asyncio import sleep
+from asyncio import CancelledError, ensure_future, gather, shield, sleep
 from datetime import date
 from json import dumps, load
 from pathlib import Path
@@ -9,119 +9,403 @@ from discord import Embed
 from wowspy import Region, WowsAsync
 
 from data import data_path
-from scripts.helpers import combine_objects
+from data_manager import DataManager, WowsStore
+from scripts.helpers import get_date
+from world_of_warships.batch_fetch import fetch_summaries, gather_limited
 from world_of_warships.embed_builder import build_clan_embed
-from world_of_warships.player import Player
-from world_of_warships.wtr import CONVERT_REGION, choose_colour, \
-    coeff_all_region, get_ship_dicts, wtr_absolute
+from world_of_warships.embed_cache import EmbedCache
+from world_of_warships.player import Player, RECENT_DAYS
+from world_of_warships.player_cache import PlayerCache
+from world_of_warships.stats_accumulator import StatsAccumulator
+from world_of_warships.wtr import choose_colour, coeff_all_region, \
+    get_ship_dicts
+from world_of_warships.wtr_snapshot import load_snapshot, save_snapshot
+from world_of_warships.wtr_table import compile_tables
 
 
 class WowsManager:
-    __slots__ = ('logger', 'wows_api', 'expected_and_coeff', 'ship_dict',
-                 'players', 'e_and_c_path', 'ship_path')
+    __slots__ = ('logger', 'wows_api', 'background_api',
+                 'expected_and_coeff', 'ship_dict',
+                 'wtr_tables', 'players', 'e_and_c_path', 'ship_path',
+                 'snapshot_path',
+                 'fetch_limit', 'chunk_size', 'inflight', 'store',
+                 'refresh_task', 'leaderboard_task', 'embeds', 'pruned_on')
 
-    def __init__(self, wows_api: WowsAsync, logger):
+    def __init__(self, wows_api: WowsAsync, logger, *,
+                 fetch_limit: int = 5, chunk_size: int = 100,
+                 cache_size: int = 5000, cache_ttl: float = 86400,
+                 cache_bytes: Optional[int] = None,
+                 embed_cache_size: int = 1000,
+                 store: Optional[WowsStore] = None,
+                 background_api: Optional[WowsAsync] = None):
         """
         :param wows_api: WowsAsync instance.
         :param logger: the logger.
+        :param fetch_limit: max number of concurrent requests when
+            fetching many players at once.
+        :param chunk_size: number of players in each batched request.
+        :param cache_size: max number of cached players.
+        :param cache_ttl: seconds after the last refresh before a cached
+            player expires.
+        :param cache_bytes: estimated memory budget for cached players in
+            bytes, None for no limit.
+        :param embed_cache_size: max number of cached rendered embeds.
+        :param store: a `WowsStore` to persist players in, optional.
+        :param background_api: WowsAsync instance for requests no one is
+            waiting on, defaults to `wows_api`
         """
         self.logger = logger
         self.wows_api = wows_api
+        self.background_api = background_api or wows_api
+        self.fetch_limit = fetch_limit
+        self.chunk_size = chunk_size
+        # (region, player id) -> (update task, updates ship stats)
+        self.inflight = {}
+        self.store = store
+        self.refresh_task = None
+        self.leaderboard_task = None
         self.expected_and_coeff = None
         self.ship_dict = None
-        self.players = {
-            Region.NA: {},
-            Region.EU: {},
-            Region.RU: {},
-            Region.AS: {}
-        }
+        self.wtr_tables = None
+        self.players = PlayerCache(
+            cache_size, cache_ttl, cache_bytes, Player.memory_usage
+        )
         self.e_and_c_path = data_path.joinpath('expected_and_coeff.json')
         self.ship_path = data_path.joinpath('ship_dict.json')
+        self.snapshot_path = data_path.joinpath('wtr_tables.bin')
+        self.embeds = EmbedCache(embed_cache_size)
+        # the date daily stats were last pruned on
+        self.pruned_on = None
 
     @classmethod
     async def wows_manager(cls, session_manager: SessionManager,
-                           wows_api: WowsAsync, logger):
+                           wows_api: WowsAsync, logger, **kwargs):
         """
         Get an instance of WowsManager. Use this instead of __init__
         :param session_manager: SessionManager instance.
         :param wows_api: WowsAsync instance.
         :param logger: the logger.
+        :param kwargs: keyword arguments passed to __init__
         :return: a new instance of WowsManager
         """
-        instance = cls(wows_api, logger)
-        await instance.update_data(session_manager)
+        instance = cls(wows_api, logger, **kwargs)
+        if instance.load_tables():
+            ensure_future(instance.update_data(session_manager))
+        else:
+            await instance.update_data(session_manager)
         return instance
 
-    def expected(self, region):
-        return self.expected_and_coeff[CONVERT_REGION[region]]['expected']
-
-    def coeff(self, region):
-        return self.expected_and_coeff[CONVERT_REGION[region]]['coefficients']
-
     def check_data(self):
-        return self.expected_and_coeff and self.ship_dict
+        return self.wtr_tables is not None
 
-    async def __update_data(self, coro, path: Path) -> Optional[dict]:
+    async def __fetch_data(self, coro, source: str) -> Optional[dict]:
         """
-        Helper method to update data used in wtr calculations.
-        Dumps the new data to file if new data if fetched.
+        Helper method to fetch data used in wtr calculations.
         :param coro: the coroutine to be called.
-        :param path: the path to the json file.
+        :param source: name of the data source for logging.
         :return: the new data if any.
         """
+        generic = f'Updating data from {source}'
+        self.logger.info(f'{generic}.')
         try:
             data = await coro
         except Exception as e:
-            self.logger.warn(str(e))
+            self.logger.warn(f'{generic} failed.\n{e}')
         else:
-            with path.open('w+') as f:
-                f.write(dumps(data))
+            self.logger.info(f'{generic} success.')
             return data
 
+    def __load_data(self, path: Path) -> Optional[dict]:
+        """
+        Helper method to load data used in wtr calculations from file.
+        :param path: the path to the json file.
+        :return: the data if the file can be read.
+        """
+        try:
+            with path.open() as f:
+                return load(f)
+        except (OSError, ValueError) as e:
+            self.logger.warn(str(e))
+
+    def load_tables(self) -> bool:
+        """
+        Load the `WTRTable`s from the binary snapshot, or from the json
+        files if there's no valid snapshot.
+        :return: True if the tables are loaded.
+        """
+        tables = load_snapshot(self.snapshot_path)
+        if tables is not None:
+            self.logger.info('Loaded WTR tables from snapshot.')
+            self.wtr_tables = tables
+            return True
+        coeff = self.__load_data(self.e_and_c_path)
+        ships = self.__load_data(self.ship_path)
+        if not coeff or not ships:
+            return False
+        try:
+            tables = compile_tables(coeff, ships)
+        except Exception as e:
+            self.logger.warn(f'Compiling WTR tables failed.\n{e}')
+            return False
+        self.expected_and_coeff, self.ship_dict, self.wtr_tables = \
+            coeff, ships, tables
+        self.__save_snapshot()
+        return True
+
+    def __save_snapshot(self):
+        """
+        Save the `WTRTable`s currently in use to the binary snapshot.
+        """
+        try:
+            save_snapshot(self.snapshot_path, self.wtr_tables)
+        except (OSError, ValueError) as e:
+            self.logger.warn(f'Saving WTR snapshot failed.\n{e}')
+
     async def update_data(self, session_manager: SessionManager):
         """
         Update data used for wtr calculations.
+        Both data sets are fetched concurrently and swapped in together
+        once the new `WTRTable`s are compiled. If fetching fails, the data
+        currently in use is kept, or loaded from file if there's none.
         :param session_manager: SessionManager instance.
         """
-        generic = 'Updating data from'
-        self.logger.info(f'{generic} Warships Today.')
-        coeff = await self.__update_data(
-            coeff_all_region(session_manager), self.e_and_c_path
+        coeff, ships = await gather(
+            self.__fetch_data(
+                coeff_all_region(session_manager), 'Warships Today'
+            ),
+            self.__fetch_data(
+                get_ship_dicts(self.background_api), 'Wargaming'
+            )
         )
-        if coeff:
-            self.expected_and_coeff = coeff
-            self.logger.info(f'{generic} Warships Today success.')
-        else:
-            self.logger.warn(f'{generic} from Warships Today failed.')
-            with self.e_and_c_path.open() as f:
-                self.expected_and_coeff = load(f)
+        if not coeff and not ships and self.wtr_tables is not None:
+            return
+        new_coeff, new_ships = coeff, ships
+        coeff = coeff or self.expected_and_coeff or \
+            self.__load_data(self.e_and_c_path)
+        ships = ships or self.ship_dict or self.__load_data(self.ship_path)
+
+        if coeff is None and self.wtr_tables is not None:
+            return
 
-        assert self.expected_and_coeff is not None
+        assert coeff is not None
+
+        if not ships:
+            self.expected_and_coeff = coeff
+            return
+        try:
+            tables = compile_tables(coeff, ships)
+        except Exception as e:
+            self.logger.warn(f'Compiling WTR tables failed.\n{e}')
+            return
+        self.expected_and_coeff, self.ship_dict, self.wtr_tables = \
+            coeff, ships, tables
+        self.embeds.clear()
+        self.__save_snapshot()
+        for data, path in ((new_coeff, self.e_and_c_path),
+                           (new_ships, self.ship_path)):
+            if data:
+                with path.open('w+') as f:
+                    f.write(dumps(data))
 
-        self.logger.info(f'{generic} from Wargaming.')
-        ships = await self.__update_data(
-            get_ship_dicts(self.wows_api), self.ship_path
+    def schedule_refresh(self, session_manager: SessionManager,
+                         interval: float):
+        """
+        Refresh data used for wtr calculations in the background, expired
+        players are removed from `self.players` on every refresh.
+        :param session_manager: SessionManager instance.
+        :param interval: seconds between each refresh.
+        """
+        if self.refresh_task:
+            self.refresh_task.cancel()
+        self.refresh_task = ensure_future(
+            self.__refresh_loop(session_manager, interval)
         )
-        if ships:
-            self.ship_dict = ships
-            self.logger.info(f'{generic} from Wargaming success.')
-        else:
-            self.logger.warn(f'{generic} from Wargaming failed.')
 
-    async def get_player(self, region: Region, id_: str) -> Player:
+    async def __refresh_loop(self, session_manager: SessionManager,
+                             interval: float):
+        """
+        See `WowsManager.schedule_refresh`
+        """
+        while True:
+            await sleep(interval)
+            self.players.purge_expired()
+            try:
+                await self.update_data(session_manager)
+            except CancelledError:
+                raise
+            except Exception as e:
+                self.logger.warn(str(e))
+
+    def get_player(self, region: Region, id_: str) -> Player:
         """
         Get a player by region and id.
         :param region: the player region.
         :param id_: the player id.
         :return: the player.
         """
-        if id_ not in self.players[region]:
-            self.players[region][id_] = Player(region, id_, self.logger)
-        player = self.players[region][id_]
-        while player.updating:
-            await sleep(0)
+        key = (region, id_)
+        player = self.players.get(key)
+        if player is None:
+            player = Player(region, id_, self.logger)
+            record = self.store.get_player(region.name, id_) \
+                if self.store else None
+            if record:
+                player.load(record)
+            self.players.put(key, player)
         return player
 
+    async def refresh(self, player: Player, update_ships: bool,
+                      background: bool = False) -> bool:
+        """
+        Update a player, concurrent calls for the same player share one
+        in-flight update and its result. If the in-flight update doesn't
+        update ship stats and this call needs them, a ship stats update
+        follows once it's done.
+        :param player: the player.
+        :param update_ships: True to update player ship stats.
+        :param background: True to make the requests with
+            `self.background_api`, ignored if there's an update in-flight.
+        :return: True if the player was updated.
+        """
+        key = (player.region, player.player_id)
+        inflight = self.inflight.get(key)
+        if inflight is not None:
+            task, ships = inflight
+            updated = await shield(task)
+            if ships or not update_ships:
+                return updated
+            return await self.refresh(player, True, background) or updated
+        api = self.background_api if background else self.wows_api
+        task = ensure_future(self.__update(player, update_ships, api))
+        self.inflight[key] = (task, update_ships)
+        task.add_done_callback(lambda _: self.inflight.pop(key, None))
+        return await shield(task)
+
+    async def __update(self, player: Player, update_ships: bool,
+                       wows_api: WowsAsync) -> bool:
+        """
+        Update a player and put it back into the cache, replacing any
+        entry loaded while the update was in-flight.
+        See `WowsManager.refresh`
+        """
+        updated = await player.update(
+            wows_api, self.wtr_tables[player.region], update_ships,
+            self.__daily_stats(player)
+        )
+        self.players.put((player.region, player.player_id), player)
+        if updated:
+            self.save_player(player)
+            if update_ships:
+                self.__save_wtr(player)
+        if player.daily_stats:
+            self.__save_daily_stats(player)
+        return updated
+
+    def __daily_stats(self, player: Player) -> Optional[dict]:
+        """
+        Get the saved daily stats snapshots of a player.
+        :param player: the player.
+        :return: a dict of {date: stats} of the last `RECENT_DAYS` days.
+        """
+        if not self.store:
+            return
+        try:
+            return self.store.get_daily_stats(
+                player.region.name, player.player_id, get_date(RECENT_DAYS)
+            )
+        except Exception as e:
+            self.logger.warn(str(e))
+
+    def __save_daily_stats(self, player: Player):
+        """
+        Save the new daily stats snapshots of a player. Snapshots older
+        than `RECENT_DAYS` are pruned on the first save of each day.
+        :param player: the player.
+        """
+        daily, player.daily_stats = player.daily_stats, None
+        if not self.store:
+            return
+        try:
+            self.store.add_daily_stats(
+                player.region.name, player.player_id, daily
+            )
+            today = get_date(0)
+            if self.pruned_on != today:
+                self.store.prune_daily_stats(get_date(RECENT_DAYS))
+                self.pruned_on = today
+        except Exception as e:
+            self.logger.warn(str(e))
+
+    def __save_wtr(self, player: Player):
+        """
+        Add the current WTR of a player to its WTR history.
+        :param player: the player.
+        """
+        battles = player.stats.get('battles')
+        if not self.store or player.wtr is None or not battles:
+            return
+        try:
+            self.store.add_wtr(
+                player.region.name, player.player_id, int(get_date(0)),
+                battles, player.wtr
+            )
+        except Exception as e:
+            self.logger.warn(str(e))
+
+    def wtr_history(self, region: Region, player_id: str) -> List[tuple]:
+        """
+        Get the saved WTR history of a player.
+        :param region: the player region.
+        :param player_id: the player id.
+        :return: a list of (date, battles, wtr) sorted by date.
+        """
+        if not self.store:
+            return []
+        return self.store.get_wtr_history(region.name, player_id)
+
+    def save_player(self, player: Player):
+        """
+        Save a player to `self.store` if there is one, and drop its cached
+        embed. Call this whenever the player stats change.
+        :param player: the player.
+        """
+        self.embeds.invalidate(('player', player.region, player.player_id))
+        if not self.store:
+            return
+        try:
+            self.store.set_player(
+                player.region.name, player.player_id, **player.record()
+            )
+        except Exception as e:
+            self.logger.warn(str(e))
+
+    async def __stale_players(self, region: Region, players: List[Player],
+                              wows_api: WowsAsync) -> List[Player]:
+        """
+        Fetch player summaries in batches to find the players whose ship
+        stats need updating. Hidden status of the players is updated.
+        :param region: the region.
+        :param players: the list of players.
+        :param wows_api: the WowsAsync instance to make the requests with.
+        :return: the list of players that need updating.
+        """
+        summaries = await fetch_summaries(
+            wows_api, region, [int(p.player_id) for p in players],
+            self.logger, self.chunk_size, self.fetch_limit
+        )
+        stale = []
+        for player in players:
+            summary = summaries.get(player.player_id)
+            if summary is not None:
+                player.hidden = summary.hidden
+                if summary.hidden:
+                    continue
+                if player.ship_stats and summary.battles is not None and \
+                        summary.battles == player.stats.get('battles'):
+                    continue
+            stale.append(player)
+        return stale
+
     async def get_clan_players(self, region: Region, ids: List[int]):
         """
         Get a list of players by ids.
@@ -129,15 +413,92 @@ class WowsManager:
         :param ids: the list of ids.
         :return: the list of Player if they have ship stats.
         """
-        players = []
-        for id_ in ids:
-            new = await self.get_player(region, str(id_))
-            new.ship_stats = await new.fetch_ship_stats(self.wows_api)
-            if new.ship_stats:
-                players.append(new)
-        for player in players:
-            player.updating = True
-        return players
+        members = [self.get_player(region, str(id_)) for id_ in ids]
+        stale = await self.__stale_players(region, members, self.wows_api)
+        ship_stats = await gather_limited(
+            (p.fetch_ship_stats(self.wows_api) for p in stale),
+            self.fetch_limit
+        )
+        for player, stats in zip(stale, ship_stats):
+            player.ship_stats = stats
+            self.players.mark_fresh((region, player.player_id))
+            self.save_player(player)
+        return [p for p in members if p.ship_stats and not p.hidden]
+
+    async def build_leaderboards(self, shame: dict):
+        """
+        Refresh all players registered in shamelists and save the WTR
+        leaderboard of every guild and region to `self.store`
+        :param shame: a dict of
+            {guild_id: {member_id: {region: player_id}}}
+            see `DataManager.get_all_shame`
+        """
+        if not self.store or not self.check_data():
+            return
+        shame = {
+            guild_id: {m: dict(regions) for m, regions in members.items()}
+            for guild_id, members in shame.items()
+        }
+        ids = {}
+        for members in shame.values():
+            for regions in members.values():
+                for region, player_id in regions.items():
+                    if player_id:
+                        ids.setdefault(Region[region], set()).add(player_id)
+        players = {}
+        for region, region_ids in ids.items():
+            members = [self.get_player(region, id_) for id_ in region_ids]
+            stale = await self.__stale_players(
+                region, members, self.background_api
+            )
+            await gather_limited(
+                (self.__try_refresh(p, True, True) for p in stale),
+                self.fetch_limit
+            )
+            table = self.wtr_tables[region]
+            for player in members:
+                if player.wtr is None and player.ship_stats:
+                    player.wtr = table.player_wtr(player.ship_stats)
+                players[(region.name, player.player_id)] = player
+        leaderboards = {}
+        for guild_id, members in shame.items():
+            for member_id, regions in members.items():
+                for region, player_id in regions.items():
+                    player = players.get((region, player_id))
+                    if not player or player.hidden or player.wtr is None:
+                        continue
+                    leaderboards.setdefault((guild_id, region), []).append((
+                        member_id, player_id, player.nick,
+                        player.stats.get('battles', 0), player.wtr
+                    ))
+        self.store.set_leaderboards(leaderboards)
+
+    def schedule_leaderboards(self, data_manager: DataManager,
+                              interval: float):
+        """
+        Build the shamelist leaderboards in the background.
+        :param data_manager: the DataManager with the shamelists.
+        :param interval: seconds between each build.
+        """
+        if self.leaderboard_task:
+            self.leaderboard_task.cancel()
+        self.leaderboard_task = ensure_future(
+            self.__leaderboard_loop(data_manager, interval)
+        )
+
+    async def __leaderboard_loop(self, data_manager: DataManager,
+                                 interval: float):
+        """
+        See `WowsManager.schedule_leaderboards`
+        """
+        while True:
+            try:
+                await self.build_leaderboards(data_manager.shame)
+            except CancelledError:
+                raise
+            except Exception as e:
+                self.logger.warn(str(e))
+            await sleep(interval)
 
     async def clan_meta(self, region: Region, id_: int) -> Optional[dict]:
         """
@@ -158,22 +519,26 @@ class WowsManager:
         else:
             return resp.get('data', {}).get(str(id_))
 
-    async def clan_embed(self, region, players: List[Player],
+    async def clan_embed(self, region, clan_id: int, players: List[Player],
                          clan_meta: dict) -> Embed:
         """
-        Generate a clan embed.
+        Generate a clan embed, or get it from `self.embeds` if the clan
+        stats haven't changed.
         :param region: the region.
+        :param clan_id: the clan id.
         :param players: the list of Players in the clan.
         :param clan_meta: the clan meta data.
         :return: the clan Embed.
         """
-        clan_sats = combine_objects(*[p.ship_stats for p in players])
-        wtr = await wtr_absolute(
-            self.expected(region),
-            self.coeff(region),
-            clan_sats,
-            self.ship_dict[region.name]
-        )
+        key = ('clan', region, clan_id)
+        version = clan_version(players, clan_meta)
+        embed = self.embeds.get(key, version)
+        if embed is not None:
+            return embed
+        clan_stats = StatsAccumulator()
+        for player in players:
+            clan_stats.add(player.ship_stats)
+        wtr = self.wtr_tables[region].wtr(clan_stats.ship_ids, clan_stats.rows)
         name = clan_meta.get('name', 'None') or 'None'
         description = clan_meta.get('description', 'None') or 'None'
         tag = clan_meta.get('tag', 'None') or 'None'
@@ -186,10 +551,11 @@ class WowsManager:
         member_count = clan_meta.get('members_count', 'None') or 'None'
         colour = choose_colour(wtr)
         embed = build_clan_embed(
-            Embed(colour=colour), combine_objects(*list(clan_sats.values())),
+            Embed(colour=colour), clan_stats.totals(),
             name, description, wtr, tag, active, creation_date,
             creator_name, leader_name, member_count
         )
+        self.embeds.put(key, version, embed)
         return embed
 
     async def player_embed(self, region: Region, player_id):
@@ -199,11 +565,19 @@ class WowsManager:
         :param player_id: the player id.
         :return: the Embed or a warships today signiture for fallback.
         """
-        player = await self.get_player(region, str(player_id))
-        embed = await player.get_embed(
-            self.wows_api, self.expected(region), self.coeff(region),
-            self.ship_dict[region.name]
-        )
+        player = self.get_player(region, str(player_id))
+        if player.hidden:
+            return player.warships_today_sig
+        await self.refresh(player, True)
+        # The update might have been made on another Player object if this
+        # one was loaded while an update was in-flight.
+        player = self.get_player(region, player.player_id)
+        key = ('player', region, player.player_id)
+        embed = self.embeds.get(key, player.version)
+        if embed is None:
+            embed = player.get_embed()
+            if embed is not None:
+                self.embeds.put(key, player.version, embed)
         return embed or player.warships_today_sig
 
     async def cache_players(self, region: Region, players: List[Player]):
@@ -213,16 +587,20 @@ class WowsManager:
         :param players: a list of Players.
         """
         for player in players:
-            try:
-                await player.update(
-                    self.wows_api,
-                    self.expected(region),
-                    self.coeff(region),
-                    self.ship_dict[region.name], False
-                )
-            except Exception as e:
-                self.logger.warn(str(e))
-            player.updating = False
+            await self.__try_refresh(player, False, True)
+
+    async def __try_refresh(self, player: Player, update_ships: bool,
+                            background: bool = False) -> bool:
+        """
+        `WowsManager.refresh` that logs errors instead of raising them.
+        """
+        try:
+            return await self.refresh(player, update_ships, background)
+        except CancelledError:
+            raise
+        except Exception as e:
+            self.logger.warn(str(e))
+            return False
 
     async def process_clan(self, region: Region, clan_id: int):
         """
@@ -244,4 +622,18 @@ class WowsManager:
                 description="The clan doesn't have any players.",
                 colour=0x930D0D
             ), None
-        return await self.clan_embed(region, players, meta), players
+        return await self.clan_embed(region, clan_id, players, meta), players
+
+
+def clan_version(players: List[Player], clan_meta: dict) -> int:
+    """
+    Get the version of a clan's stats, it changes whenever the clan embed
+    would change.
+    :param players: the list of Players in the clan.
+    :param clan_meta: the clan meta data.
+    :return: a hash of the member ids and their battle counts, and the
+        clan meta data.
+    """
+    members = sorted((p.player_id, p.ship_stats.battles) for p in players)
+    meta = sorted((key, str(val)) for key, val in clan_meta.items())
+    return hash((tuple(members), tuple(meta)))
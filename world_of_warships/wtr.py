@@ -1,3 +1,5 @@
+from asyncio import gather
+
 from aiohttp_wrapper import SessionManager
 from wowspy import Region, WowsAsync
 
@@ -27,13 +29,16 @@ async def get_coeff(region: str, session_manager: SessionManager) -> dict:
 
 async def coeff_all_region(session_manager: SessionManager) -> dict:
     """
-    Get coefficients for all regions.
+    Get coefficients for all regions, all regions are fetched concurrently.
     :param session_manager: the SessionManager.
     :return: coefficients for all regions.
     """
+    regions = ('na', 'eu', 'ru', 'asia')
+    resps = await gather(
+        *(get_coeff(region, session_manager) for region in regions)
+    )
     res = {}
-    for region in ('na', 'eu', 'ru', 'asia'):
-        resp = await get_coeff(region, session_manager)
+    for region, resp in zip(regions, resps):
         tmp = {}
         __expected = resp.get('expected', None)
         expected = {}
@@ -49,9 +54,18 @@ async def coeff_all_region(session_manager: SessionManager) -> dict:
 
 
 async def get_ship_dicts(wows_api: WowsAsync):
+    """
+    Get ship tiers for all regions, all regions are fetched concurrently.
+    :param wows_api: the WowsAsync instance.
+    :return: a dict of {region name: {ship_id: tier}}
+    """
+    regions = list(Region)
+    resps = await gather(*(
+        wows_api.warships(region, fields='tier', language='en')
+        for region in regions
+    ))
     res = {}
-    for region in Region:
-        resp = await wows_api.warships(region, fields='tier', language='en')
+    for region, resp in zip(regions, resps):
         data = resp['data']
         res[region.name] = {key: val['tier'] for key, val in data.items()}
     return res
@@ -136,51 +150,6 @@ def __adjust(value, average_level, base) -> float:
     return adjusted_base + for_adjusting * coef
 
 
-async def wtr_absolute(all_expected, coeff, actual: dict, ship_dict) -> int:
-    """
-    Calculate the absolute WTR for a player
-    :param all_expected: the expected stats values
-    :param coeff: the coefficents used in calculation
-    :param actual: the actual stats of the player
-    :param ship_dict: dict of ship_id mapped to ship tier
-    :return: the wtr of the player
-    """
-    total, total_battles = 0, 0
-    if not actual:
-        return 0
-    for ship_id, stat in actual.items():
-        expected = all_expected.get(str(ship_id), None)
-        if not expected:
-            continue
-        tier = ship_dict.get(ship_id, 7.5)
-        wtr, battles = await __wtr(expected, stat, tier, coeff)
-        total += wtr
-        total_battles += battles
-    return round(try_divide(total, total_battles))
-
-
-async def __wtr(expected, stats, tier, coeff):
-    """
-    Helper function for wtr_absolute
-    See wtr_absolute for parameters
-    """
-    battles = stats.get('battles', None)
-    if battles:
-        stats_for_calc = {
-            'capture_points': stats['capture_points'] / battles,
-            'planes_killed': stats['planes_killed'] / battles,
-            'damage_dealt': stats['damage_dealt'] / battles,
-            'frags': stats['frags'] / battles,
-            'dropped_capture_points':
-                stats['dropped_capture_points'] / battles,
-            'wins': stats['wins'] / battles
-        }
-        wtr = calc_wtr(expected, stats_for_calc, coeff, tier)
-        total = wtr * battles
-        return total, battles
-    return 0, 0
-
-
 def choose_colour(wtr: int) -> int:
     """
     Choose a colour to represent the wtr
@@ -0,0 +1,105 @@
+"""
+A compact binary snapshot of the compiled WTR reference tables.
+
+=== Format (little endian) ===
+Header:
+    4s  magic, b'YWTR'
+    H   format version
+    H   number of regions
+Then for each region:
+    4s  region name, null padded
+    4x  padding
+    7d  coefficients, in the order of `COEFFICIENTS`
+    I   number of records
+    4x  padding
+    and the fixed width records, see `RECORD`
+"""
+from mmap import ACCESS_READ, mmap
+from pathlib import Path
+from struct import Struct, error as StructError
+from typing import Dict, Optional
+
+import numpy as np
+from wowspy import Region
+
+from world_of_warships.wtr_table import EXPECTED_FIELDS, WTRTable
+
+MAGIC = b'YWTR'
+VERSION = 1
+
+COEFFICIENTS = (
+    'ship_frags_importance_weight', 'wins_weight', 'damage_weight',
+    'frags_weight', 'capture_weight', 'dropped_capture_weight',
+    'nominal_rating'
+)
+
+RECORD = np.dtype([
+    ('ship_id', '<i8'),
+    ('tier', '<f8'),
+    ('expected', '<f8', (len(EXPECTED_FIELDS),))
+])
+
+_HEADER = Struct('<4sHH')
+_REGION = Struct(f'<4s4x{len(COEFFICIENTS)}dI4x')
+
+
+def save_snapshot(path: Path, tables: Dict[Region, WTRTable]):
+    """
+    Write the WTR tables to a snapshot file.
+    The file is written to a temporary file first then renamed.
+    :param path: the snapshot file path.
+    :param tables: a dict of {Region: WTRTable}
+    """
+    tmp = path.with_name(path.name + '.tmp')
+    with tmp.open('wb') as f:
+        f.write(_HEADER.pack(MAGIC, VERSION, len(tables)))
+        for region, table in tables.items():
+            coefficients = table.coefficients
+            f.write(_REGION.pack(
+                region.name.encode(),
+                *(coefficients[c] for c in COEFFICIENTS),
+                len(table.ship_ids)
+            ))
+            records = np.empty(len(table.ship_ids), dtype=RECORD)
+            records['ship_id'] = table.ship_ids
+            records['tier'] = table.tiers
+            records['expected'] = table.expected
+            f.write(records.tobytes())
+    tmp.replace(path)
+
+
+def load_snapshot(path: Path) -> Optional[Dict[Region, WTRTable]]:
+    """
+    Load the WTR tables from a snapshot file. The records are memory
+    mapped instead of being read into memory.
+    :param path: the snapshot file path.
+    :return: a dict of {Region: WTRTable} if the file is a valid snapshot
+        with a table for every region.
+    """
+    try:
+        with path.open('rb') as f:
+            buffer = mmap(f.fileno(), 0, access=ACCESS_READ)
+    except (OSError, ValueError):
+        return
+    try:
+        magic, version, count = _HEADER.unpack_from(buffer, 0)
+        if magic != MAGIC or version != VERSION:
+            return
+        offset = _HEADER.size
+        res = {}
+        for _ in range(count):
+            name, *coefficients, length = _REGION.unpack_from(buffer, offset)
+            offset += _REGION.size
+            records = np.frombuffer(
+                buffer, dtype=RECORD, count=length, offset=offset
+            )
+            offset += records.nbytes
+            res[Region[name.rstrip(b'\0').decode()]] = WTRTable.from_arrays(
+                records['ship_id'], records['expected'], records['tier'],
+                dict(zip(COEFFICIENTS, coefficients))
+            )
+    except (KeyError, ValueError, UnicodeDecodeError, StructError):
+        return
+    if offset != len(buffer) or set(res) != set(Region):
+        return
+    return res
@@ -0,0 +1,190 @@
+from typing import Dict, Tuple
+
+import numpy as np
+from wowspy import Region
+
+from world_of_warships.wtr import CONVERT_REGION
+
+WTR_FIELDS = ('battles', 'wins', 'damage_dealt', 'frags', 'planes_killed',
+              'capture_points', 'dropped_capture_points')
+
+EXPECTED_FIELDS = WTR_FIELDS[1:]
+
+_WEIGHTS = ('wins_weight', 'damage_weight', 'frags_weight',
+            'capture_weight', 'dropped_capture_weight')
+
+NEUTRAL_LEVEL = 7.5
+PER_LEVEL_BONUS = 0.1
+
+
+class WTRTable:
+    """
+    Columnar WTR reference table for one region.
+
+    === Attributes ===
+    :type ship_ids: np.ndarray
+        Sorted ship ids that have expected values.
+    :type expected: np.ndarray
+        Expected values, one row per ship in `ship_ids`,
+        columns in the order of `WTR_FIELDS[1:]`
+    :type tiers: np.ndarray
+        Ship tier for each ship in `ship_ids`, 7.5 if unknown.
+    :type aircraft_coef: np.ndarray
+        The aircraft frags coefficient for each ship in `ship_ids`
+    :type has_frags: np.ndarray
+        True if the expected planes killed and frags sum is positive.
+    :type importance: float
+        The ship frags importance weight.
+    :type weights: np.ndarray
+        Weights for wins, damage, frags, capture and dropped capture.
+    :type nominal_rating: float
+        The nominal rating.
+    """
+    __slots__ = ('ship_ids', 'expected', 'tiers', 'aircraft_coef',
+                 'has_frags', 'importance', 'weights', 'nominal_rating')
+
+    def __init__(self, expected: dict, coefficients: dict, ship_dict: dict):
+        """
+        :param expected: a dict of {ship_id: expected values}
+        :param coefficients: the coefficents used in WTR calculation.
+        :param ship_dict: a dict of {ship_id: tier}
+        """
+        ids = sorted(int(key) for key in expected)
+        tiers = {int(key): val for key, val in ship_dict.items()}
+        self.__set_arrays(
+            np.array(ids, dtype=np.int64),
+            np.array(
+                [[expected[str(i)][f] for f in EXPECTED_FIELDS]
+                 for i in ids],
+                dtype=np.float64
+            ).reshape(-1, len(EXPECTED_FIELDS)),
+            np.array(
+                [tiers.get(i, NEUTRAL_LEVEL) for i in ids], dtype=np.float64
+            ),
+            coefficients
+        )
+
+    @classmethod
+    def from_arrays(cls, ship_ids: np.ndarray, expected: np.ndarray,
+                    tiers: np.ndarray, coefficients: dict) -> 'WTRTable':
+        """
+        Build a `WTRTable` from arrays that are already compiled.
+        :param ship_ids: sorted ship ids.
+        :param expected: expected values, one row per ship in `ship_ids`
+        :param tiers: ship tier for each ship in `ship_ids`
+        :param coefficients: the coefficents used in WTR calculation.
+        :return: the `WTRTable`
+        """
+        table = cls.__new__(cls)
+        table.__set_arrays(ship_ids, expected, tiers, coefficients)
+        return table
+
+    def __set_arrays(self, ship_ids: np.ndarray, expected: np.ndarray,
+                     tiers: np.ndarray, coefficients: dict):
+        """
+        Set the table arrays and derive the per ship coefficients.
+        See `WTRTable.from_arrays` for parameters.
+        """
+        self.ship_ids = ship_ids
+        self.expected = expected
+        self.tiers = tiers
+        frags, planes = expected[:, 2], expected[:, 3]
+        self.importance = float(coefficients['ship_frags_importance_weight'])
+        denominator = planes + self.importance * frags
+        self.has_frags = planes + frags > 0
+        self.aircraft_coef = np.divide(
+            planes, denominator,
+            out=np.zeros_like(planes), where=denominator != 0
+        )
+        self.weights = np.array(
+            [coefficients[w] for w in _WEIGHTS], dtype=np.float64
+        )
+        self.nominal_rating = float(coefficients['nominal_rating'])
+
+    @property
+    def coefficients(self) -> dict:
+        """
+        :return: the coefficents used in WTR calculation.
+        """
+        res = dict(zip(_WEIGHTS, self.weights.tolist()))
+        res['ship_frags_importance_weight'] = self.importance
+        res['nominal_rating'] = self.nominal_rating
+        return res
+
+    def lookup(self, ship_ids: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Find the table rows for a list of ship ids.
+        :param ship_ids: an array of ship ids.
+        :return: a tuple of (row index, mask of ids found in the table)
+        """
+        index = np.searchsorted(self.ship_ids, ship_ids)
+        index[index >= len(self.ship_ids)] = 0
+        found = (self.ship_ids[index] == ship_ids) if len(self.ship_ids) \
+            else np.zeros(len(ship_ids), dtype=bool)
+        return index, found
+
+    def wtr(self, ship_ids: np.ndarray, stats: np.ndarray) -> int:
+        """
+        Calculate WTR for per ship stats in one batched pass.
+        :param ship_ids: an array of ship ids.
+        :param stats: a 2d array of stats, one row per ship in `ship_ids`,
+            the first columns are in the order of `WTR_FIELDS`
+        :return: the WTR.
+        """
+        if not len(ship_ids):
+            return 0
+        index, found = self.lookup(ship_ids)
+        battles = stats[:, 0].astype(np.float64)
+        keep = found & (battles > 0)
+        if not keep.any():
+            return 0
+        index, battles = index[keep], battles[keep]
+        actual = stats[keep, 1:len(WTR_FIELDS)] / battles[:, None]
+        expected = self.expected[index]
+        ratio = np.divide(
+            actual, expected, out=np.zeros_like(actual), where=expected != 0
+        )
+        wins, damage, ship_frags, planes, capture, dropped = ratio.T
+        aircraft_coef = self.aircraft_coef[index]
+        frags = np.where(
+            self.has_frags[index],
+            ship_frags * (1 - aircraft_coef) + planes * aircraft_coef,
+            1
+        )
+        ww, dw, fw, cw, dcw = self.weights
+        value = (wins * ww + damage * dw + frags * fw +
+                 capture * cw + dropped * dcw) * self.nominal_rating
+        base = self.nominal_rating
+        coef = 1 + (self.tiers[index] - NEUTRAL_LEVEL) * PER_LEVEL_BONUS
+        adjusted = (np.minimum(value, base) +
+                    np.maximum(0, value - base) * coef)
+        return round(float((adjusted * battles).sum() / battles.sum()))
+
+    def player_wtr(self, ship_stats) -> int:
+        """
+        Calculate the WTR of a player.
+        :param ship_stats: the player's `ShipStats`, or None.
+        :return: the player WTR.
+        """
+        if not ship_stats:
+            return 0
+        return self.wtr(ship_stats.ship_ids, ship_stats.rows)
+
+
+def compile_tables(expected_and_coeff: dict,
+                   ship_dict: dict) -> Dict[Region, WTRTable]:
+    """
+    Compile the WTR reference data into a `WTRTable` for every region.
+    :param expected_and_coeff: the expected values and coefficients for
+        all regions, keyed by Warships Today region name.
+    :param ship_dict: a dict of {region name: {ship_id: tier}}
+    :return: a dict of {Region: WTRTable}
+    """
+    res = {}
+    for region in Region:
+        data = expected_and_coeff[CONVERT_REGION[region]]
+        res[region] = WTRTable(
+            data['expected'], data['coefficients'],
+            ship_dict.get(region.name, {})
+        )
+    return res
@@ -13,9 +13,18 @@ from bot.logger import get_console_handler, setup_logging
 from cogs import *
 from config import Config
 from data import data_path
-from data_manager import DataManager
+from data_manager import DataManager, WowsStore
+from music.download_policy import DownloadPolicy
+from music.file_index import FileIndex
+from music.music_cache import MusicCache
+from music.music_metrics import MusicMetrics
+from music.opus_cache import OpusCache
+from music.ytdl_info_cache import YTDLInfoCache
+from music.ytdl_pool import YTDLPool
 from scripts.clear_cache import clean
 from world_of_warships import WowsManager
+from world_of_warships.rate_limiter import BACKGROUND, INTERACTIVE, \
+    RateLimitedWows, RateLimiter
 
 IN_DOCKER = str(getenv('IN_DOCKER')) == '1'
 DB_PATH = Path('/db') if IN_DOCKER else data_path
@@ -38,9 +47,29 @@ async def run():
     )
     session_manager = anime_search.session_manager
     data_manager = DataManager(connect(f'{DB_PATH / "yasen_db"}'))
-    wows_api = WowsAsync(config.wows, session)
+    wows_api = RateLimitedWows(
+        WowsAsync(config.wows, session), RateLimiter(config.wows_rate_limit),
+        INTERACTIVE, config.wows_timeout
+    )
+    wows_store = WowsStore(connect(f'{DB_PATH / "wows_db"}'))
     wows_manager = await WowsManager.wows_manager(
-        session_manager, wows_api, logger
+        session_manager, wows_api, logger, store=wows_store,
+        background_api=wows_api.view(
+            BACKGROUND, config.wows_background_timeout
+        )
+    )
+    wows_manager.schedule_refresh(
+        session_manager, config.wtr_refresh_interval
+    )
+    wows_manager.schedule_leaderboards(
+        data_manager, config.leaderboard_interval
+    )
+    music_cache = MusicCache(
+        data_path.joinpath('music_cache'), config.music_cache_size, logger
+    )
+    music_metrics = MusicMetrics()
+    ytdl_pool = YTDLPool(
+        config.ytdl_workers, config.ytdl_max_downloads, music_metrics
     )
     bot = Yasen(
         logger=logger,
@@ -50,7 +79,16 @@ async def run():
         data_manager=data_manager,
         anime_search=anime_search,
         wows_manager=wows_manager,
-        wows_api=wows_api
+        wows_api=wows_api,
+        music_cache=music_cache,
+        ytdl_cache=YTDLInfoCache(),
+        ytdl_pool=ytdl_pool,
+        file_index=FileIndex(DB_PATH / 'music_index.db', logger),
+        opus_cache=OpusCache(
+            data_path.joinpath('opus_cache'), config.opus_cache_size, logger
+        ) if config.opus_cache_size else None,
+        download_policy=DownloadPolicy(music_cache, ytdl_pool, logger),
+        music_metrics=music_metrics
     )
     karen_files = [Path(f) for f in data_path.joinpath('Karen').iterdir()]
     kanna_files = [Path(f) for f in data_path.joinpath('Kanna').iterdir()]
@@ -62,7 +100,7 @@ async def run():
 
 
 if __name__ == '__main__':
-    clean(('dumps', 'music_cache'))
+    clean(('dumps',))
     loop = get_event_loop()
     b, c = loop.run_until_complete(run())
     try: